@@ -0,0 +1,29 @@
+"""
+ASGI config for deployment.
+
+Modo async: as views de leitura (dashboard, detalhes do paciente) usam o ORM
+async e, com uvicorn, esperas no banco e uploads lentos não prendem o worker.
+
+    gunicorn asgi:application -k uvicorn_worker.UvicornWorker --workers 2
+    uvicorn asgi:application --workers 2   # sem gunicorn
+
+O modo WSGI (gunicorn wsgi:application) continua funcionando; nele as views
+async rodam via async_to_sync.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao Python path
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR / 'backend'))
+
+# Conexões persistentes não combinam com o pool de threads do ORM async (ver settings)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+# Importa a aplicação ASGI do config
+from config.asgi import application
+
+# Exporta a aplicação
+__all__ = ['application']
@@ -30,7 +30,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise com suporte a ASGI (ver pacientes/estaticos.py)
+    'pacientes.estaticos.ArquivosEstaticosMiddleware',
+    'pacientes.metricas.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,7 +45,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com medição do tempo de renderização (ver pacientes/metricas.py)
+        'BACKEND': 'pacientes.metricas.TemplatesInstrumentados',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,16 +61,35 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
+# DB_CONN_MAX_AGE: no ASGI o asgi.py da raiz usa 0, porque o ORM async executa cada
+# requisição numa thread do pool e conexões persistentes se acumulariam por thread
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3'),
-        conn_max_age=600,
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '600')),
         conn_health_checks=True,
     )
 }
 
+# Cache (fragmentos da página de detalhes do paciente)
+# CACHE_BACKEND: locmem (padrão), file ou redis (compatível com Redis/Valkey, requer o pacote redis)
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'crm-medico'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.getenv('CACHE_LOCATION', _cache_location),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '600')),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -92,6 +114,58 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Os uploads são entregues por views com login (pacientes/midia.py), nunca direto em MEDIA_URL.
+# MEDIA_ACCEL delega o envio ao servidor web: 'nginx' (X-Accel-Redirect para uma
+# location "internal" em MEDIA_ACCEL_PREFIXO com alias para MEDIA_ROOT) ou
+# 'sendfile' (X-Sendfile, Apache/lighttpd). Vazio = o próprio Django envia.
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIXO = os.getenv('MEDIA_ACCEL_PREFIXO', '/midia-protegida/')
+
+# Tamanho máximo dos uploads (MB). Com o envio em partes (pacientes/uploads.py)
+# o arquivo nunca passa inteiro pela memória, então dá para subir estes limites.
+TAMANHO_MAXIMO_DOCUMENTO = int(os.getenv('TAMANHO_MAXIMO_DOCUMENTO_MB', '10')) * 1024 * 1024
+TAMANHO_MAXIMO_FOTO = int(os.getenv('TAMANHO_MAXIMO_FOTO_MB', '5')) * 1024 * 1024
+
+# Upload em partes: onde ficam os arquivos incompletos (fora de MEDIA_ROOT),
+# tamanho máximo de cada parte e por quanto tempo um upload parado pode ser retomado
+UPLOADS_PARCIAIS_DIR = Path(os.getenv('UPLOADS_PARCIAIS_DIR', BASE_DIR / 'uploads_parciais'))
+UPLOAD_TAMANHO_PARTE = 5 * 1024 * 1024
+UPLOAD_VALIDADE_HORAS = 24
+
+# Fila de tarefas: com True executa logo após o commit, sem precisar do worker
+# (útil em desenvolvimento). Em produção rode: python manage.py processar_tarefas
+TAREFAS_SINCRONAS = os.getenv('TAREFAS_SINCRONAS', 'False') == 'True'
+
+# Métricas por view em /metrics (formato Prometheus). O endpoint exige usuário staff
+# ou o cabeçalho "Authorization: Bearer <METRICAS_TOKEN>" (para o scraper).
+# Requisições acima de METRICAS_LIMITE_LENTA_MS vão para o log com as consultas mais lentas.
+METRICAS_ATIVAS = os.getenv('METRICAS_ATIVAS', 'True') == 'True'
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+METRICAS_LIMITE_LENTA_MS = int(os.getenv('METRICAS_LIMITE_LENTA_MS', '1000'))
+
+# Views acima do orçamento de @orcamento_consultas, ou com N+1, geram um aviso no log;
+# com True a requisição falha (OrcamentoConsultasMixin liga isto nos testes)
+ORCAMENTO_CONSULTAS_ESTRITO = os.getenv('ORCAMENTO_CONSULTAS_ESTRITO', 'False') == 'True'
+
+# Sincronização incremental (/api/sincronizacao/, ver pacientes/sincronizacao.py):
+# alterações dos últimos MARGEM segundos ficam para a próxima chamada (transações ainda
+# sem commit); remoções são guardadas por RETENCAO dias, tokens mais antigos recebem 410
+SINCRONIZACAO_MARGEM_SEGUNDOS = int(os.getenv('SINCRONIZACAO_MARGEM_SEGUNDOS', '30'))
+SINCRONIZACAO_RETENCAO_DIAS = int(os.getenv('SINCRONIZACAO_RETENCAO_DIAS', '90'))
+
+# Diretório de pacientes em memória (pacientes/diretorio.py): a lista do dashboard, a busca
+# por CPF/telefone e as sugestões saem da memória do processo, para até MAXIMO_MEDICOS
+# médicos (os usados há mais tempo saem primeiro). A versão de cada médico fica no cache
+# padrão: com mais de um processo use CACHE_BACKEND=redis (ou file) para todos verem as alterações
+DIRETORIO_PACIENTES = os.getenv('DIRETORIO_PACIENTES', 'False') == 'True'
+DIRETORIO_PACIENTES_MAXIMO_MEDICOS = int(os.getenv('DIRETORIO_PACIENTES_MAXIMO_MEDICOS', '100'))
+
+# Arquivamento (python manage.py arquivar_pacientes): pacientes inativos há mais de
+# ARQUIVAMENTO_DIAS_INATIVO dias saem das tabelas principais; os arquivos deles vão
+# para MIDIA_FRIA_ROOT (fora de MEDIA_ROOT, pode ficar num disco mais barato)
+ARQUIVAMENTO_DIAS_INATIVO = int(os.getenv('ARQUIVAMENTO_DIAS_INATIVO', '365'))
+MIDIA_FRIA_ROOT = Path(os.getenv('MIDIA_FRIA_ROOT', BASE_DIR / 'media_arquivo'))
+
 # Login configuration
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
@@ -10,7 +10,7 @@ urlpatterns = [
     
 ]
 
-# Servir arquivos de mídia em desenvolvimento
+# Arquivos estáticos em desenvolvimento. A mídia (uploads) não tem rota pública:
+# é entregue pelas views protegidas de pacientes/midia.py
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -1,11 +1,13 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Paciente, Documento, Foto
+from .arquivamento import ConflitoRestauracao, restaurar_paciente
+from .models import Paciente, Documento, Foto, ArquivoBlob, Tarefa, Importacao, Remocao, PacienteArquivado
 
 
 @admin.register(Paciente)
 class PacienteAdmin(admin.ModelAdmin):
     list_display = ['nome_completo', 'cpf', 'telefone', 'medico', 'data_cadastro', 'ativo']
+    list_select_related = ['medico']
     list_filter = ['ativo', 'sexo', 'data_cadastro']
     search_fields = ['nome_completo', 'cpf', 'telefone', 'email']
     date_hierarchy = 'data_cadastro'
@@ -13,13 +15,66 @@ class PacienteAdmin(admin.ModelAdmin):
 
 @admin.register(Documento)
 class DocumentoAdmin(admin.ModelAdmin):
-    list_display = ['titulo', 'paciente', 'data_upload']
-    list_filter = ['data_upload']
+    list_display = ['titulo', 'paciente', 'data_upload', 'status_processamento']
+    list_select_related = ['paciente']
+    list_filter = ['data_upload', 'status_processamento']
     search_fields = ['titulo', 'paciente__nome_completo']
 
 
 @admin.register(Foto)
 class FotoAdmin(admin.ModelAdmin):
-    list_display = ['titulo', 'paciente', 'data_upload']
-    list_filter = ['data_upload']
-    search_fields = ['titulo', 'paciente__nome_completo']
\ No newline at end of file
+    list_display = ['titulo', 'paciente', 'data_upload', 'status_processamento']
+    list_select_related = ['paciente']
+    list_filter = ['data_upload', 'status_processamento']
+    search_fields = ['titulo', 'paciente__nome_completo']
+
+
+@admin.register(ArquivoBlob)
+class ArquivoBlobAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'tamanho', 'referencias', 'criado_em']
+    search_fields = ['hash']
+    readonly_fields = ['hash', 'nome', 'tamanho', 'referencias', 'criado_em']
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ['tipo', 'status', 'tentativas', 'criada_em', 'executar_apos', 'concluida_em']
+    list_filter = ['status', 'tipo']
+    readonly_fields = ['erro']
+
+
+@admin.register(Importacao)
+class ImportacaoAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'medico', 'status', 'total_linhas', 'importados', 'com_erro', 'criada_em']
+    list_select_related = ['medico']
+    list_filter = ['status']
+
+
+@admin.register(Remocao)
+class RemocaoAdmin(admin.ModelAdmin):
+    list_display = ['tipo', 'objeto_id', 'medico', 'removido_em']
+    list_select_related = ['medico']
+    list_filter = ['tipo']
+
+
+@admin.register(PacienteArquivado)
+class PacienteArquivadoAdmin(admin.ModelAdmin):
+    list_display = ['nome_completo', 'cpf', 'medico', 'total_documentos', 'total_fotos', 'arquivado_em']
+    list_select_related = ['medico']
+    search_fields = ['nome_completo', 'cpf']
+    date_hierarchy = 'arquivado_em'
+    # "dados" pode ser grande (texto extraído dos PDFs): fica fora do formulário
+    exclude = ['dados']
+    readonly_fields = ['id', 'medico', 'nome_completo', 'cpf', 'total_documentos', 'total_fotos', 'arquivado_em']
+    actions = ['restaurar']
+    
+    @admin.action(description='Restaurar e reativar os pacientes selecionados')
+    def restaurar(self, request, queryset):
+        restaurados = 0
+        for pk in queryset.values_list('pk', flat=True):
+            try:
+                restaurar_paciente(pk, reativar=True)
+                restaurados += 1
+            except ConflitoRestauracao as erro:
+                self.message_user(request, f'Paciente #{pk}: {erro}', messages.ERROR)
+        self.message_user(request, f'{restaurados} paciente(s) restaurado(s).', messages.SUCCESS)
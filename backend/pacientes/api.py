@@ -0,0 +1,505 @@
+# pacientes/api.py
+"""
+API JSON (/api/...) dos pacientes, documentos e fotos do médico logado.
+
+- Autenticação pela sessão do site; sem login a resposta é 401 (e não o
+  redirect do login_required). Escritas exigem o token CSRF (cabeçalho
+  X-CSRFToken), como os formulários.
+- ?fields=nome_completo,telefone devolve só esses campos, e o queryset carrega
+  só as colunas que eles usam (only()). Campo desconhecido: 400.
+- Listas paginadas por cursor (ver pacientes/paginacao.py), com ?limite=:
+  {"resultados": [...], "proximo": "<url da próxima página>" ou null}.
+- ETag e Last-Modified vêm de ultima_atualizacao, lida numa consulta leve pelo
+  decorador condition antes da view: com If-None-Match/If-Modified-Since em dia
+  a resposta é 304 sem carregar nem serializar nada, e If-Match numa escrita
+  devolve 412 se o recurso mudou desde a leitura. Documentos e fotos usam a
+  própria ultima_atualizacao; as listas deles, o máximo dela e a contagem.
+- /api/pacientes/sugestoes/?q=: autocompletar da busca do dashboard (só
+  prefixos de nome, CPF ou telefone, ver busca.sugestoes; com DIRETORIO_PACIENTES,
+  pelo diretório em memória).
+- /api/sincronizacao/?token=: alterações e remoções desde o último token, para
+  clientes offline (ver pacientes/sincronizacao.py).
+- Escrita pelos mesmos formulários do site (mesmas validações de CPF etc.):
+  pacientes em JSON; documentos e fotos em multipart (`arquivo`/`imagem` ou
+  `upload` de um upload em partes concluído) e, na edição, JSON com titulo e
+  descricao.
+- DELETE de paciente é exclusão lógica (ativo=false), como no site: depois
+  dele o paciente, os documentos e as fotos dele dão 404 (a sincronização
+  ainda o envia com ativo=false). Um PUT sem "ativo" mantém o valor atual.
+  Documentos e fotos são apagados de fato.
+"""
+import hashlib
+import json
+from functools import wraps
+from operator import attrgetter
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.forms import modelform_factory
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .busca import sugestoes
+from .diretorio import obter_diretorio
+from .fila import enfileirar
+from .forms import DocumentoForm, FotoForm, PacienteForm
+from .models import Documento, Foto, Paciente
+from .orcamento import orcamento_consultas
+from .paginacao import paginar_por_cursor
+from .sincronizacao import TokenExpirado, TokenInvalido, fontes_do_medico, sincronizar
+from .uploads import arquivos_enviados, concluir_upload
+
+
+POR_PAGINA = 50
+MAXIMO_POR_PAGINA = 200
+
+# Autocompletar: quantos pacientes e com quais campos
+SUGESTOES = 10
+CAMPOS_SUGESTAO = ('id', 'nome_completo', 'cpf', 'telefone')
+
+# Linhas por fonte em cada chamada da sincronização
+POR_SINCRONIZACAO = 500
+MAXIMO_POR_SINCRONIZACAO = 2000
+
+LEITURA = ('GET', 'HEAD')
+
+
+class ErroRequisicao(ValueError):
+    """Parâmetro ou corpo inválido: vira uma resposta 400 com a mensagem"""
+
+
+def _coluna(nome):
+    """Campo da API que é a própria coluna do modelo"""
+    return (nome,), attrgetter(nome)
+
+
+class Recurso:
+    """Campos que a API expõe de um modelo: nome -> (colunas necessárias, função que lê o valor)"""
+
+    def __init__(self, campos, ordem, fora_do_padrao=()):
+        self.campos = campos
+        self.ordem = ordem  # campo de data da paginação por cursor
+        # Sem ?fields vão todos, menos os pesados (texto extraído dos PDFs)
+        self.padrao = tuple(nome for nome in campos if nome not in fora_do_padrao)
+
+    def campos_pedidos(self, request):
+        pedido = request.GET.get('fields')
+        if pedido is None:
+            return self.padrao
+        campos = tuple(dict.fromkeys(nome.strip() for nome in pedido.split(',') if nome.strip()))
+        desconhecidos = [nome for nome in campos if nome not in self.campos]
+        if desconhecidos or not campos:
+            raise ErroRequisicao(
+                f'Campos inválidos: {", ".join(desconhecidos) or "(nenhum)"}. '
+                f'Disponíveis: {", ".join(self.campos)}.'
+            )
+        return campos
+
+    def carregar(self, queryset, campos):
+        """Só as colunas usadas pelos campos pedidos (e as da paginação)"""
+        colunas = {'id', self.ordem}
+        for nome in campos:
+            colunas.update(self.campos[nome][0])
+        return queryset.only(*colunas)
+
+    def serializar(self, objeto, campos):
+        return {nome: self.campos[nome][1](objeto) for nome in campos}
+
+
+PACIENTE = Recurso({
+    **{nome: _coluna(nome) for nome in (
+        'id', 'nome_completo', 'data_nascimento', 'cpf', 'sexo', 'telefone', 'email',
+        'cep', 'endereco', 'cidade', 'estado', 'tipo_sanguineo', 'alergias', 'medicamentos_uso',
+        'historico_familiar', 'observacoes', 'ativo', 'data_cadastro', 'ultima_atualizacao',
+    )},
+    'idade': (('data_nascimento',), Paciente.get_idade),
+    'url': ((), lambda paciente: reverse('api_paciente', args=[paciente.pk])),
+}, ordem='data_cadastro')
+
+DOCUMENTO = Recurso({
+    **{nome: _coluna(nome) for nome in (
+        'id', 'titulo', 'descricao', 'nome_original', 'data_upload', 'ultima_atualizacao',
+        'status_processamento', 'checksum', 'texto_extraido',
+    )},
+    'paciente': (('paciente',), attrgetter('paciente_id')),
+    'arquivo': ((), lambda documento: reverse('documento_arquivo', args=[documento.pk])),
+    'url': ((), lambda documento: reverse('api_documento', args=[documento.pk])),
+}, ordem='data_upload', fora_do_padrao=('texto_extraido',))
+
+FOTO = Recurso({
+    **{nome: _coluna(nome) for nome in (
+        'id', 'titulo', 'descricao', 'nome_original', 'data_upload', 'ultima_atualizacao',
+        'status_processamento', 'checksum', 'miniaturas_geradas',
+    )},
+    'paciente': (('paciente',), attrgetter('paciente_id')),
+    'imagem': ((), attrgetter('url_imagem')),
+    'miniatura': (('miniaturas_geradas',), lambda foto: foto.url_miniatura if foto.miniaturas_geradas else None),
+    'url': ((), lambda foto: reverse('api_foto', args=[foto.pk])),
+}, ordem='data_upload')
+
+# Edição de documentos e fotos: só os metadados (o arquivo não muda)
+EdicaoDocumentoForm = modelform_factory(Documento, fields=['titulo', 'descricao'])
+EdicaoFotoForm = modelform_factory(Foto, fields=['titulo', 'descricao'])
+
+
+def api(view):
+    """Como login_required, mas com 401 em JSON; ErroRequisicao vira 400"""
+    @wraps(view)
+    def executar(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'erro': 'Autenticação necessária.'}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except ErroRequisicao as e:
+            return JsonResponse({'erro': str(e)}, status=400)
+    return executar
+
+
+# ==================== VERSÕES (ETag / Last-Modified) ====================
+
+def _versao(request, consultar):
+    """
+    Versão do recurso (datetime, ou None se não existe: a view responde 404).
+    Fica guardada na requisição: etag_func e last_modified_func fazem uma consulta só.
+    """
+    if not hasattr(request, '_versao_api'):
+        request._versao_api = consultar()
+    return request._versao_api
+
+
+def _assinatura(texto):
+    return hashlib.md5(texto.encode()).hexdigest()[:12]
+
+
+def _etag(versao, *partes):
+    if versao is None:
+        return None
+    return '-'.join([str(int(versao.timestamp() * 1_000_000)), *map(str, partes)])
+
+
+def _versao_paciente(request, pk):
+    return _versao(request, lambda: Paciente.objects.filter(
+        pk=pk, medico=request.user, ativo=True
+    ).values_list('ultima_atualizacao', flat=True).first())
+
+
+def _versao_documento(request, pk):
+    return _versao(request, lambda: Documento.objects.filter(
+        pk=pk, paciente__medico=request.user, paciente__ativo=True
+    ).values_list('ultima_atualizacao', flat=True).first())
+
+
+def _versao_foto(request, pk):
+    return _versao(request, lambda: Foto.objects.filter(
+        pk=pk, paciente__medico=request.user, paciente__ativo=True
+    ).values_list('ultima_atualizacao', flat=True).first())
+
+
+def _etag_objeto(versao, request):
+    # Com ?fields a representação é outra; sem, o ETag é o mesmo do If-Match das escritas
+    campos = request.GET.get('fields')
+    return _etag(versao, _assinatura(campos)) if campos is not None else _etag(versao)
+
+
+def _etag_lista(versao, request, *partes):
+    return _etag(versao, *partes, _assinatura(request.GET.urlencode()))
+
+
+def _etag_pacientes(request):
+    # Remoções não mudam o máximo de ultima_atualizacao, mas mudam a contagem
+    totais = _versao(request, lambda: Paciente.objects.filter(medico=request.user, ativo=True).aggregate(
+        versao=Max('ultima_atualizacao'), total=Count('id'),
+    ))
+    return _etag_lista(totais['versao'], request, totais['total']) if totais['total'] else 'vazia'
+
+
+# ==================== RESPOSTAS ====================
+
+def _ler_json(request):
+    try:
+        dados = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ErroRequisicao('JSON inválido.')
+    if not isinstance(dados, dict):
+        raise ErroRequisicao('O corpo deve ser um objeto JSON.')
+    return dados
+
+
+def _limite(request, padrao=POR_PAGINA, maximo=MAXIMO_POR_PAGINA):
+    try:
+        limite = int(request.GET.get('limite', padrao))
+    except ValueError:
+        raise ErroRequisicao('limite inválido.')
+    return max(1, min(limite, maximo))
+
+
+def _listar(request, recurso, queryset):
+    campos = recurso.campos_pedidos(request)
+    pagina, proximo_cursor = paginar_por_cursor(
+        recurso.carregar(queryset, campos), request.GET.get('cursor'), _limite(request), recurso.ordem,
+    )
+    proximo = None
+    if proximo_cursor:
+        parametros = request.GET.copy()
+        parametros['cursor'] = proximo_cursor
+        proximo = f'{request.path}?{parametros.urlencode()}'
+    return JsonResponse({
+        'resultados': [recurso.serializar(objeto, campos) for objeto in pagina],
+        'proximo': proximo,
+    })
+
+
+def _objeto(request, recurso, objeto, status=200):
+    response = JsonResponse(recurso.serializar(objeto, recurso.campos_pedidos(request)), status=status)
+    if status == 201:
+        response['Location'] = recurso.campos['url'][1](objeto)
+    return response
+
+
+def _erros(form):
+    return JsonResponse({'erros': form.errors.get_json_data()}, status=400)
+
+
+def _salvar_edicao(request, recurso, form_class, objeto, campos_form, parcial, padroes=None):
+    """
+    PUT substitui todos os campos do formulário; PATCH só os enviados.
+    `padroes` completa o PUT para campos que ausentes mudariam o registro (checkbox: ausente = False).
+    """
+    dados = _ler_json(request)
+    if parcial:
+        dados = {**model_to_dict(objeto, fields=campos_form), **dados}
+    elif padroes:
+        dados = {**padroes, **dados}
+    form = form_class(dados, instance=objeto)
+    if not form.is_valid():
+        return _erros(form)
+    form.save()
+    return _objeto(request, recurso, objeto)
+
+
+# ==================== PACIENTES ====================
+
+@api
+@orcamento_consultas(10)
+@condition(etag_func=_etag_pacientes)
+def pacientes_api(request):
+    """GET: pacientes ativos (mais recentes primeiro); POST: cadastra"""
+    if request.method in LEITURA:
+        return _listar(request, PACIENTE, Paciente.objects.filter(medico=request.user, ativo=True))
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+
+    dados = _ler_json(request)
+    dados.setdefault('ativo', True)
+    form = PacienteForm(dados)
+    if not form.is_valid():
+        return _erros(form)
+    paciente = form.save(commit=False)
+    paciente.medico = request.user
+    paciente.save()
+    return _objeto(request, PACIENTE, paciente, status=201)
+
+
+@api
+@orcamento_consultas(4)
+def sugestoes_api(request):
+    """Até SUGESTOES pacientes ativos cujo nome, CPF ou telefone começa com ?q="""
+    if request.method not in LEITURA:
+        return HttpResponseNotAllowed(['GET'])
+
+    termo = request.GET.get('q', '').strip()
+    if not termo:
+        encontrados = []
+    elif settings.DIRETORIO_PACIENTES:
+        encontrados = obter_diretorio(request.user.pk).sugestoes(termo, SUGESTOES)
+    else:
+        encontrados = sugestoes(
+            PACIENTE.carregar(Paciente.objects.filter(medico=request.user, ativo=True), CAMPOS_SUGESTAO),
+            termo, SUGESTOES,
+        )
+    response = JsonResponse({'resultados': [
+        {
+            **PACIENTE.serializar(paciente, CAMPOS_SUGESTAO),
+            'pagina': reverse('paciente_detalhes', args=[paciente.pk]),
+        }
+        for paciente in encontrados
+    ]})
+    # Apagar uma letra repete uma consulta recente: o navegador responde do próprio cache
+    response['Cache-Control'] = 'private, max-age=30'
+    return response
+
+
+@api
+@orcamento_consultas(10)
+@condition(
+    etag_func=lambda request, pk: _etag_objeto(_versao_paciente(request, pk), request),
+    last_modified_func=_versao_paciente,
+)
+def paciente_api(request, pk):
+    """GET, PUT, PATCH, DELETE de um paciente (excluídos, ativo=False, dão 404 como na lista)"""
+    if request.method in LEITURA:
+        campos = PACIENTE.campos_pedidos(request)
+        paciente = get_object_or_404(
+            PACIENTE.carregar(Paciente.objects.all(), campos), pk=pk, medico=request.user, ativo=True
+        )
+        return JsonResponse(PACIENTE.serializar(paciente, campos))
+
+    paciente = get_object_or_404(Paciente, pk=pk, medico=request.user, ativo=True)
+    if request.method in ('PUT', 'PATCH'):
+        # Um PUT sem "ativo" não pode excluir o paciente
+        response = _salvar_edicao(
+            request, PACIENTE, PacienteForm, paciente, PacienteForm._meta.fields, request.method == 'PATCH',
+            padroes={'ativo': paciente.ativo},
+        )
+        if response.status_code == 200:
+            # Versão nova, para o If-Match da próxima escrita
+            response['ETag'] = quote_etag(_etag(paciente.ultima_atualizacao))
+        return response
+    if request.method == 'DELETE':
+        paciente.desativar()
+        return HttpResponse(status=204)
+    return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH', 'DELETE'])
+
+
+# ==================== DOCUMENTOS E FOTOS ====================
+
+def _anexos(request, paciente_pk, recurso, form_class, tipo, campo_arquivo, tarefa):
+    """Lista (GET) ou adiciona (POST multipart) documentos/fotos do paciente"""
+    paciente = get_object_or_404(Paciente, pk=paciente_pk, medico=request.user, ativo=True)
+    if request.method in LEITURA:
+        return _listar(request, recurso, form_class._meta.model.objects.filter(paciente=paciente))
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+
+    with arquivos_enviados(request, paciente, tipo, campo_arquivo) as (upload, arquivos):
+        form = form_class(request.POST, arquivos)
+        if not form.is_valid():
+            return _erros(form)
+        objeto = form.save(commit=False)
+        objeto.paciente = paciente
+        objeto.save()
+        concluir_upload(upload, arquivos)
+    # Processamento no worker, como no site (checksum, texto, miniaturas)
+    enfileirar(tarefa, **{f'{tipo}_id': objeto.pk})
+    return _objeto(request, recurso, objeto, status=201)
+
+
+def _anexo(request, modelo, pk, recurso, form_class):
+    """GET, PATCH (titulo/descricao) e DELETE de um documento/foto"""
+    if request.method in LEITURA:
+        campos = recurso.campos_pedidos(request)
+        objeto = get_object_or_404(
+            recurso.carregar(modelo.objects.all(), campos), pk=pk, paciente__medico=request.user,
+            paciente__ativo=True,
+        )
+        return JsonResponse(recurso.serializar(objeto, campos))
+
+    objeto = get_object_or_404(modelo, pk=pk, paciente__medico=request.user, paciente__ativo=True)
+    if request.method == 'PATCH':
+        return _salvar_edicao(request, recurso, form_class, objeto, form_class._meta.fields, parcial=True)
+    if request.method == 'DELETE':
+        objeto.delete()
+        return HttpResponse(status=204)
+    return HttpResponseNotAllowed(['GET', 'PATCH', 'DELETE'])
+
+
+def _etag_anexos(relacao):
+    """
+    ETag da lista de documentos/fotos do paciente: máximo de ultima_atualizacao e contagem
+    (remoções só mudam a contagem), numa consulta que também confere o paciente (None: 404).
+    Sem Last-Modified: uma remoção não muda o máximo.
+    """
+    def etag(request, paciente_pk):
+        totais = _versao(request, lambda: Paciente.objects.filter(
+            pk=paciente_pk, medico=request.user, ativo=True
+        ).annotate(
+            versao=Max(f'{relacao}__ultima_atualizacao'), total=Count(relacao),
+        ).values('ultima_atualizacao', 'versao', 'total').first())
+        if totais is None:
+            return None
+        return _etag_lista(totais['versao'] or totais['ultima_atualizacao'], request, totais['total'])
+    return etag
+
+
+@api
+@orcamento_consultas(12)
+@condition(etag_func=_etag_anexos('documentos'))
+def documentos_api(request, paciente_pk):
+    """GET: documentos do paciente (mais recentes primeiro); POST: adiciona"""
+    return _anexos(request, paciente_pk, DOCUMENTO, DocumentoForm, 'documento', 'arquivo', 'processar_documento')
+
+
+@api
+@orcamento_consultas(12)
+@condition(
+    etag_func=lambda request, pk: _etag_objeto(_versao_documento(request, pk), request),
+    last_modified_func=_versao_documento,
+)
+def documento_api(request, pk):
+    """GET, PATCH e DELETE de um documento"""
+    return _anexo(request, Documento, pk, DOCUMENTO, EdicaoDocumentoForm)
+
+
+@api
+@orcamento_consultas(12)
+@condition(etag_func=_etag_anexos('fotos'))
+def fotos_api(request, paciente_pk):
+    """GET: fotos do paciente (mais recentes primeiro); POST: adiciona"""
+    return _anexos(request, paciente_pk, FOTO, FotoForm, 'foto', 'imagem', 'processar_foto')
+
+
+@api
+@orcamento_consultas(12)
+@condition(
+    etag_func=lambda request, pk: _etag_objeto(_versao_foto(request, pk), request),
+    last_modified_func=_versao_foto,
+)
+def foto_api(request, pk):
+    """GET, PATCH e DELETE de uma foto"""
+    return _anexo(request, Foto, pk, FOTO, EdicaoFotoForm)
+
+
+# ==================== SINCRONIZAÇÃO ====================
+
+@api
+@orcamento_consultas(8)
+def sincronizacao_api(request):
+    """
+    Alterações desde ?token= (sem token: tudo, em páginas). O cliente grava as linhas
+    (upsert pelo id), apaga os ids de "removidos" e guarda o token; com "mais" true,
+    chama de novo em seguida.
+    """
+    if request.method not in LEITURA:
+        return HttpResponseNotAllowed(['GET'])
+
+    fontes = fontes_do_medico(request.user)
+    for fonte, recurso in (('pacientes', PACIENTE), ('documentos', DOCUMENTO), ('fotos', FOTO)):
+        fontes[fonte] = recurso.carregar(fontes[fonte], recurso.padrao)
+    fontes['removidos'] = fontes['removidos'].only('tipo', 'objeto_id', 'removido_em')
+
+    try:
+        alteradas, token, mais = sincronizar(
+            fontes, request.GET.get('token'), _limite(request, POR_SINCRONIZACAO, MAXIMO_POR_SINCRONIZACAO),
+        )
+    except TokenInvalido as e:
+        raise ErroRequisicao(str(e))
+    except TokenExpirado as e:
+        return JsonResponse({'erro': str(e)}, status=410)
+
+    removidos = {'pacientes': [], 'documentos': [], 'fotos': []}
+    for remocao in alteradas['removidos']:
+        removidos[f'{remocao.tipo}s'].append(remocao.objeto_id)
+    response = JsonResponse({
+        'pacientes': [PACIENTE.serializar(paciente, PACIENTE.padrao) for paciente in alteradas['pacientes']],
+        'documentos': [DOCUMENTO.serializar(documento, DOCUMENTO.padrao) for documento in alteradas['documentos']],
+        'fotos': [FOTO.serializar(foto, FOTO.padrao) for foto in alteradas['fotos']],
+        'removidos': removidos,
+        'token': token,
+        'mais': mais,
+    })
+    response['Cache-Control'] = 'no-store'
+    return response
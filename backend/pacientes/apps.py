@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class PacientesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pacientes"
+
+    def ready(self):
+        from . import signals, tarefas  # noqa: F401 (registra receivers e tarefas)
+
+        from .metricas import instalar_medicao_sql
+
+        post_migrate.connect(garantir_indice_busca, sender=self)
+        connection_created.connect(instalar_medicao_sql)
+
+
+def garantir_indice_busca(sender, using, **kwargs):
+    """Recria triggers/índices de busca que uma recriação de tabela possa ter removido"""
+    from django.db import connections
+
+    from .busca import instalar_indice_busca
+
+    # Só instala o que as colunas já migradas permitem (ver busca.ESTRUTURAS_BUSCA)
+    instalar_indice_busca(connections[using])
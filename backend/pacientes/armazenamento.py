@@ -0,0 +1,99 @@
+# pacientes/armazenamento.py
+"""
+Storage com deduplicação por conteúdo para documentos e fotos.
+
+Cada upload é gravado uma única vez em blobs/ab/cd/<sha256>.<ext>: o SHA-256 é
+calculado enquanto o arquivo é copiado para um temporário (uma só leitura) e, se
+o blob já existir, a cópia é descartada. ArquivoBlob guarda quantos registros
+usam cada blob; delete() libera uma referência e só apaga o arquivo quando
+nenhum Documento/Foto o usa mais.
+
+Arquivos antigos (documentos/%Y/%m/%d/...) continuam funcionando: delete() os
+apaga diretamente, como um FileSystemStorage comum.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+PASTA_BLOBS = 'blobs'
+
+NOME_BLOB = re.compile(rf'^{PASTA_BLOBS}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.\w+)?$')
+
+
+def hash_blob(nome):
+    """SHA-256 contido no nome do blob (None para arquivos fora de blobs/)"""
+    correspondencia = NOME_BLOB.match(nome or '')
+    return correspondencia.group(1) if correspondencia else None
+
+
+def nome_blob(sha256, extensao):
+    return f'{PASTA_BLOBS}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extensao}'
+
+
+class ArmazenamentoDeduplicado(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final vem do conteúdo (ver _save): não há colisão para resolver
+        return name
+
+    def _save(self, name, content):
+        from .models import ArquivoBlob
+
+        pasta_temporaria = self.path(os.path.join(PASTA_BLOBS, 'tmp'))
+        os.makedirs(pasta_temporaria, exist_ok=True)
+
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        with tempfile.NamedTemporaryFile(dir=pasta_temporaria, delete=False) as temporario:
+            for bloco in content.chunks():
+                sha256.update(bloco)
+                temporario.write(bloco)
+                tamanho += len(bloco)
+
+        try:
+            # O registro do blob fica travado até o arquivo estar no lugar,
+            # então um delete() simultâneo do mesmo conteúdo não o apaga no meio
+            with transaction.atomic():
+                nome = ArquivoBlob.adquirir(
+                    sha256.hexdigest(),
+                    nome_blob(sha256.hexdigest(), os.path.splitext(name)[1].lower()),
+                    tamanho,
+                )
+                destino = self.path(nome)
+                if os.path.exists(destino):
+                    # Blob reaproveitado fica "recente" para o limpar_midia_orfa não o apagar agora
+                    os.utime(destino)
+                else:
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    os.replace(temporario.name, destino)
+                    os.chmod(destino, self.file_permissions_mode or 0o644)
+        finally:
+            if os.path.exists(temporario.name):
+                os.remove(temporario.name)
+
+        return nome
+
+    def delete(self, name):
+        """Libera uma referência do blob; o arquivo só é apagado quando ela era a última"""
+        sha256 = hash_blob(name)
+        if sha256 is None:
+            return super().delete(name)
+
+        from .models import ArquivoBlob
+
+        with transaction.atomic():
+            if ArquivoBlob.liberar(sha256):
+                super().delete(name)
+
+
+armazenamento_deduplicado = ArmazenamentoDeduplicado()
+
+
+def obter_armazenamento():
+    """Usado em storage= dos campos (callable, para não gravar o caminho nas migrations)"""
+    return armazenamento_deduplicado
@@ -0,0 +1,183 @@
+# pacientes/arquivamento.py
+"""
+Arquivamento de pacientes inativos (ver os comandos arquivar_pacientes e restaurar_pacientes).
+
+Excluir um paciente só o desativa (Paciente.desativar). Depois de
+ARQUIVAMENTO_DIAS_INATIVO dias sem alterações, arquivar_inativos tira o
+paciente, os documentos e as fotos das tabelas principais: os campos vão para
+uma linha de PacienteArquivado (JSON no formato do serializer "python" do
+Django) e os arquivos são copiados para MIDIA_FRIA_ROOT/<id do paciente>/.
+Assim o dashboard, a busca (FTS/trigramas) e a sincronização só percorrem os
+registros em uso.
+
+- Os registros arquivados saem pelo delete() normal: os signals liberam os
+  blobs (o arquivo só sai de MEDIA_ROOT se ninguém mais o usa), acertam os
+  contadores e gravam as remoções que a sincronização entrega aos clientes.
+- restaurar_paciente recria tudo com os mesmos ids e datas, devolve os arquivos
+  ao storage deduplicado e apaga as remoções (para a sincronização os registros
+  apenas voltam a aparecer, como alterados).
+- O médico restaura os próprios pacientes arquivados em Pacientes inativos, e o
+  cadastro pelo site com o CPF de um deles oferece a restauração. Por outros
+  caminhos (API, importação) o CPF pode ser cadastrado de novo; nesse caso a
+  restauração falha com ConflitoRestauracao.
+"""
+import logging
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core import serializers
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .diretorio import invalidar_diretorio
+from .fila import enfileirar
+from .models import Documento, EstatisticasMedico, Foto, Paciente, PacienteArquivado, Remocao
+
+
+logger = logging.getLogger(__name__)
+
+# Campo de arquivo de cada modelo arquivado junto com o paciente
+ANEXOS = {'documentos': (Documento, 'arquivo'), 'fotos': (Foto, 'imagem')}
+
+
+class ConflitoRestauracao(Exception):
+    """O CPF do paciente arquivado já foi cadastrado de novo nas tabelas principais"""
+
+
+def pasta_fria(paciente_id):
+    return Path(settings.MIDIA_FRIA_ROOT) / str(paciente_id)
+
+
+def candidatos(dias=None):
+    """Pacientes inativos sem alterações há mais de `dias` (padrão: ARQUIVAMENTO_DIAS_INATIVO)"""
+    dias = settings.ARQUIVAMENTO_DIAS_INATIVO if dias is None else dias
+    return Paciente.objects.filter(ativo=False, ultima_atualizacao__lt=timezone.now() - timedelta(days=dias))
+
+
+def _copiar_para_fria(arquivo, pasta):
+    if not arquivo.name or not arquivo.storage.exists(arquivo.name):
+        logger.warning('Arquivo %s não existe: arquivado só o registro', arquivo.name)
+        return
+    destino = pasta / arquivo.name
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    with arquivo.storage.open(arquivo.name, 'rb') as origem, open(destino, 'wb') as copia:
+        shutil.copyfileobj(origem, copia)
+
+
+def arquivar_paciente(pk, antes_de):
+    """
+    Arquiva o paciente se ele continua inativo e sem alterações desde `antes_de`.
+    Retorna o PacienteArquivado (ou None se o paciente não se qualifica mais).
+    """
+    pasta = pasta_fria(pk)
+    try:
+        with transaction.atomic():
+            # A trava impede que um documento novo entre no meio (e suma na cascata sem ser copiado)
+            paciente = Paciente.objects.select_for_update().filter(
+                pk=pk, ativo=False, ultima_atualizacao__lt=antes_de,
+            ).first()
+            if paciente is None:
+                return None
+
+            dados = {'paciente': serializers.serialize('python', [paciente])[0]}
+            for chave, (modelo, campo) in ANEXOS.items():
+                objetos = list(modelo.objects.filter(paciente=paciente).order_by('pk'))
+                for objeto in objetos:
+                    _copiar_para_fria(getattr(objeto, campo), pasta)
+                dados[chave] = serializers.serialize('python', objetos)
+
+            arquivado = PacienteArquivado.objects.create(
+                id=paciente.pk,
+                medico_id=paciente.medico_id,
+                nome_completo=paciente.nome_completo,
+                cpf=paciente.cpf,
+                total_documentos=len(dados['documentos']),
+                total_fotos=len(dados['fotos']),
+                dados=dados,
+            )
+            paciente.delete()
+    except Exception:
+        shutil.rmtree(pasta, ignore_errors=True)
+        raise
+    return arquivado
+
+
+def arquivar_inativos(dias=None, limite=None):
+    """Arquiva os candidatos um a um (uma transação por paciente); retorna quantos"""
+    antes_de = timezone.now() - timedelta(days=settings.ARQUIVAMENTO_DIAS_INATIVO if dias is None else dias)
+    pks = candidatos(dias).order_by('ultima_atualizacao', 'pk').values_list('pk', flat=True)
+    if limite:
+        pks = pks[:limite]
+    return sum(1 for pk in list(pks) if arquivar_paciente(pk, antes_de))
+
+
+def _restaurar_arquivo(arquivo, pasta):
+    """Devolve a cópia fria ao storage do campo; retorna o nome (do blob) no storage"""
+    origem = pasta / arquivo.name
+    if not arquivo.name or not origem.exists():
+        return arquivo.name
+    with open(origem, 'rb') as aberto:
+        return arquivo.storage.save(arquivo.name, File(aberto))
+
+
+def _devolver_datas(modelo, campo, datas):
+    # bulk_create aplica o auto_now_add: as datas originais voltam num único UPDATE
+    if datas:
+        modelo.objects.filter(pk__in=datas).update(**{campo: Case(
+            *[When(pk=pk, then=Value(data)) for pk, data in datas.items()], output_field=modelo._meta.get_field(campo),
+        )})
+
+
+@transaction.atomic
+def restaurar_paciente(pk, reativar=False):
+    """Recria o paciente arquivado com documentos e fotos; retorna o Paciente"""
+    arquivado = PacienteArquivado.objects.select_for_update().get(pk=pk)
+    if Paciente.objects.filter(cpf=arquivado.cpf).exists():
+        raise ConflitoRestauracao(f'Já existe um paciente com o CPF {arquivado.cpf}.')
+
+    paciente = next(serializers.deserialize('python', [arquivado.dados['paciente']])).object
+    if reativar:
+        paciente.ativo = True
+    data_cadastro = paciente.data_cadastro
+    Paciente.objects.bulk_create([paciente])
+    _devolver_datas(Paciente, 'data_cadastro', {paciente.pk: data_cadastro})
+
+    pasta = pasta_fria(arquivado.pk)
+    restaurados = {}
+    for chave, (modelo, campo) in ANEXOS.items():
+        objetos = [
+            desserializado.object for desserializado in serializers.deserialize('python', arquivado.dados[chave])
+        ]
+        datas = {objeto.pk: objeto.data_upload for objeto in objetos}
+        for objeto in objetos:
+            arquivo = getattr(objeto, campo)
+            arquivo.name = _restaurar_arquivo(arquivo, pasta)
+            if modelo is Foto:
+                # As miniaturas podem ter sido apagadas junto com o blob: o worker as gera de novo
+                objeto.miniaturas_geradas = False
+                objeto.status_processamento = 'pendente'
+        modelo.objects.bulk_create(objetos)
+        _devolver_datas(modelo, 'data_upload', datas)
+        restaurados[chave] = objetos
+
+    fotos = restaurados['fotos']
+    for foto in fotos:
+        enfileirar('processar_foto', foto_id=foto.pk)
+
+    Remocao.objects.filter(medico_id=arquivado.medico_id).filter(
+        Q(tipo='paciente', objeto_id=paciente.pk)
+        | Q(tipo='documento', objeto_id__in=[documento.pk for documento in restaurados['documentos']])
+        | Q(tipo='foto', objeto_id__in=[foto.pk for foto in fotos])
+    ).delete()
+    # bulk_create não dispara os signals dos contadores e do diretório
+    EstatisticasMedico.recalcular(arquivado.medico_id)
+    medico_id = arquivado.medico_id
+    transaction.on_commit(lambda: invalidar_diretorio(medico_id))
+
+    arquivado.delete()
+    transaction.on_commit(lambda: shutil.rmtree(pasta, ignore_errors=True))
+    return paciente
@@ -0,0 +1,289 @@
+# pacientes/busca.py
+"""
+Busca de pacientes por nome e de documentos pelo conteúdo.
+
+O backend é escolhido pelo banco em uso (ou pela setting PACIENTES_BUSCA_BACKEND):
+- PostgreSQL: índice GIN com pg_trgm sobre nome_busca, ranqueado por similaridade;
+- SQLite: tabela virtual FTS5 mantida por triggers, ranqueada por bm25;
+- demais bancos: icontains simples.
+
+nome_busca já é gravado sem acentos e em minúsculas (ver Paciente.normalizar_campos_busca),
+então "Joao" encontra "João" em qualquer backend.
+
+As sugestões do autocompletar (sugestoes) usam só prefixos: do nome, pelo índice
+parcial paciente_ativos_nome_idx, ou do CPF/telefone, pelos índices de dígitos.
+
+Documentos são buscados por Documento.texto_busca (título, descrição e texto
+extraído do PDF): FTS5 no SQLite e tsvector com índice GIN no PostgreSQL.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .normalizacao import filtro_prefixo_digitos, normalizar_texto, proximo_prefixo, somente_digitos
+
+
+TABELA_FTS = 'pacientes_paciente_fts'
+INDICE_TRGM = 'paciente_nome_busca_trgm_idx'
+TABELA_FTS_DOCUMENTOS = 'pacientes_documento_fts'
+INDICE_TSVECTOR_DOCUMENTOS = 'documento_texto_busca_idx'
+
+# A expressão da consulta precisa ser idêntica à do índice para o PostgreSQL usá-lo
+TSVECTOR_DOCUMENTOS = "to_tsvector('portuguese', pacientes_documento.texto_busca)"
+
+SQL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        nome_busca, content='pacientes_paciente', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON pacientes_paciente BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, nome_busca) VALUES (new.id, new.nome_busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON pacientes_paciente BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE OF nome_busca ON pacientes_paciente BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca) VALUES ('delete', old.id, old.nome_busca);
+        INSERT INTO {TABELA_FTS}(rowid, nome_busca) VALUES (new.id, new.nome_busca);
+    END""",
+]
+
+SQL_SQLITE_DOCUMENTOS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS_DOCUMENTOS} USING fts5(
+        texto_busca, content='pacientes_documento', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_DOCUMENTOS}_ai AFTER INSERT ON pacientes_documento BEGIN
+        INSERT INTO {TABELA_FTS_DOCUMENTOS}(rowid, texto_busca) VALUES (new.id, new.texto_busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_DOCUMENTOS}_ad AFTER DELETE ON pacientes_documento BEGIN
+        INSERT INTO {TABELA_FTS_DOCUMENTOS}({TABELA_FTS_DOCUMENTOS}, rowid, texto_busca)
+            VALUES ('delete', old.id, old.texto_busca);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_DOCUMENTOS}_au AFTER UPDATE OF texto_busca ON pacientes_documento BEGIN
+        INSERT INTO {TABELA_FTS_DOCUMENTOS}({TABELA_FTS_DOCUMENTOS}, rowid, texto_busca)
+            VALUES ('delete', old.id, old.texto_busca);
+        INSERT INTO {TABELA_FTS_DOCUMENTOS}(rowid, texto_busca) VALUES (new.id, new.texto_busca);
+    END""",
+]
+
+SQL_POSTGRES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS {INDICE_TRGM} ON pacientes_paciente USING gin (nome_busca gin_trgm_ops)',
+]
+
+SQL_POSTGRES_DOCUMENTOS = [
+    f"CREATE INDEX IF NOT EXISTS {INDICE_TSVECTOR_DOCUMENTOS} ON pacientes_documento "
+    f"USING gin (to_tsvector('portuguese', texto_busca))",
+]
+
+# Tabela -> (coluna indexada, tabela FTS5, SQL do SQLite, SQL do PostgreSQL)
+ESTRUTURAS_BUSCA = {
+    'pacientes_paciente': ('nome_busca', TABELA_FTS, SQL_SQLITE, SQL_POSTGRES),
+    'pacientes_documento': ('texto_busca', TABELA_FTS_DOCUMENTOS, SQL_SQLITE_DOCUMENTOS, SQL_POSTGRES_DOCUMENTOS),
+}
+
+
+def _colunas(conexao, cursor, tabela):
+    if tabela not in conexao.introspection.table_names(cursor):
+        return set()
+    return {coluna.name for coluna in conexao.introspection.get_table_description(cursor, tabela)}
+
+
+def instalar_indice_busca(conexao):
+    """
+    Cria (de forma idempotente) a estrutura de busca do banco.
+
+    No SQLite, o Django recria a tabela em algumas migrações e os triggers se perdem;
+    por isso isto também roda no post_migrate e reconstrói o índice quando necessário.
+    Cada estrutura só é criada quando a coluna que ela indexa já existe (migrações antigas
+    chamam esta função antes de Documento.texto_busca existir).
+    """
+    with conexao.cursor() as cursor:
+        for tabela, (coluna, tabela_fts, sql_sqlite, sql_postgres) in ESTRUTURAS_BUSCA.items():
+            if coluna not in _colunas(conexao, cursor, tabela):
+                continue
+            if conexao.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                    [f'{tabela_fts}_%'],
+                )
+                completo = cursor.fetchone()[0] == 3
+                for sql in sql_sqlite:
+                    cursor.execute(sql)
+                if not completo:
+                    cursor.execute(f"INSERT INTO {tabela_fts}({tabela_fts}) VALUES ('rebuild')")
+            elif conexao.vendor == 'postgresql':
+                for sql in sql_postgres:
+                    cursor.execute(sql)
+
+
+def remover_indice_busca(conexao, tabelas=None):
+    """Desfaz instalar_indice_busca (usado ao reverter a migração), para todas ou só as `tabelas`"""
+    with conexao.cursor() as cursor:
+        for tabela, (_, tabela_fts, _, _) in ESTRUTURAS_BUSCA.items():
+            if tabelas is not None and tabela not in tabelas:
+                continue
+            if conexao.vendor == 'sqlite':
+                for sufixo in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {tabela_fts}_{sufixo}')
+                cursor.execute(f'DROP TABLE IF EXISTS {tabela_fts}')
+            elif conexao.vendor == 'postgresql':
+                indice = INDICE_TRGM if tabela == 'pacientes_paciente' else INDICE_TSVECTOR_DOCUMENTOS
+                cursor.execute(f'DROP INDEX IF EXISTS {indice}')
+
+
+class BuscaSimples:
+    """Backend genérico: substring sem acentos, sem ranqueamento por relevância"""
+
+    def filtrar(self, queryset, termo):
+        """Restringe o queryset aos pacientes cujo nome corresponde ao termo"""
+        return queryset.filter(nome_busca__contains=normalizar_texto(termo))
+
+    def ranquear(self, queryset, termo, limite):
+        """Lista os `limite` pacientes mais relevantes para o termo"""
+        return list(self.filtrar(queryset, termo).order_by('-data_cadastro', '-id')[:limite])
+
+    def filtrar_prefixo(self, queryset, termo):
+        """Pacientes cujo nome começa com o termo (autocompletar)"""
+        return queryset.filter(nome_busca__startswith=normalizar_texto(termo))
+
+    def filtrar_documentos(self, queryset, termo):
+        """Restringe o queryset de documentos aos que contêm todas as palavras do termo"""
+        palavras = normalizar_texto(termo).split()
+        if not palavras:
+            return queryset.none()
+        filtro = Q()
+        for palavra in palavras:
+            filtro &= Q(texto_busca__contains=palavra)
+        return queryset.filter(filtro)
+
+
+class BuscaSQLite(BuscaSimples):
+    """Backend FTS5: cada palavra digitada vira um prefixo ("joao"* "sil"*), ordenado por bm25"""
+
+    def _consulta_fts(self, termo):
+        palavras = normalizar_texto(termo).replace('"', ' ').split()
+        return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+    def filtrar(self, queryset, termo):
+        consulta = self._consulta_fts(termo)
+        if not consulta:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s', [consulta]
+        ))
+
+    def filtrar_prefixo(self, queryset, termo):
+        # O LIKE do SQLite ignora maiúsculas e por isso não usa o índice; o intervalo
+        # [prefixo, próximo prefixo) na collation binária é o mesmo filtro, pelo B-tree
+        prefixo = normalizar_texto(termo)
+        if not prefixo:
+            return queryset.none()
+        return queryset.filter(nome_busca__gte=prefixo, nome_busca__lt=proximo_prefixo(prefixo))
+
+    def ranquear(self, queryset, termo, limite):
+        consulta = self._consulta_fts(termo)
+        if not consulta:
+            return []
+
+        # Ordena no próprio FTS5 (rank = bm25) restrito aos ids do queryset. Precisa ser
+        # JOIN: com "rowid IN (subconsulta)" o SQLite calcula o rank a cada sonda e um
+        # sobrenome comum leva segundos (ver o comando medir_desempenho)
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {TABELA_FTS}.rowid FROM {TABELA_FTS} JOIN ({sql}) AS filtrados '
+                f'ON filtrados.pk = {TABELA_FTS}.rowid WHERE {TABELA_FTS} MATCH %s '
+                f'ORDER BY {TABELA_FTS}.rank LIMIT %s',
+                [*params, consulta, limite],
+            )
+            ids = [linha[0] for linha in cursor.fetchall()]
+
+        pacientes = queryset.in_bulk(ids)
+        return [pacientes[pk] for pk in ids if pk in pacientes]
+
+    def filtrar_documentos(self, queryset, termo):
+        consulta = self._consulta_fts(termo)
+        if not consulta:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {TABELA_FTS_DOCUMENTOS} WHERE {TABELA_FTS_DOCUMENTOS} MATCH %s', [consulta]
+        ))
+
+
+class BuscaPostgres(BuscaSimples):
+    """Backend pg_trgm: substring ou similaridade de palavras, ordenado pela similaridade"""
+
+    def __init__(self):
+        # Import tardio: django.contrib.postgres exige o driver psycopg instalado
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.db.models import CharField
+
+        CharField.register_lookup(TrigramWordSimilar)
+
+    def filtrar(self, queryset, termo):
+        termo = normalizar_texto(termo)
+        return queryset.filter(
+            Q(nome_busca__contains=termo) | Q(nome_busca__trigram_word_similar=termo)
+        )
+
+    def ranquear(self, queryset, termo, limite):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        return list(
+            self.filtrar(queryset, termo)
+            .annotate(relevancia=TrigramWordSimilarity(normalizar_texto(termo), 'nome_busca'))
+            .order_by('-relevancia', '-data_cadastro', '-id')[:limite]
+        )
+
+    def filtrar_documentos(self, queryset, termo):
+        # Só letras e dígitos viram termos do tsquery (prefixo: "hemo" encontra "hemograma")
+        palavras = re.findall(r'\w+', normalizar_texto(termo))
+        if not palavras:
+            return queryset.none()
+        consulta = ' & '.join(f'{palavra}:*' for palavra in palavras)
+        return queryset.filter(RawSQL(
+            f"{TSVECTOR_DOCUMENTOS} @@ to_tsquery('portuguese', %s)", [consulta], output_field=BooleanField()
+        ))
+
+
+BACKENDS_POR_BANCO = {
+    'postgresql': 'pacientes.busca.BuscaPostgres',
+    'sqlite': 'pacientes.busca.BuscaSQLite',
+}
+
+
+def sugestoes(pacientes, termo, limite):
+    """
+    Até `limite` pacientes cujo nome (em ordem alfabética) ou, se o termo só tem
+    dígitos, CPF e depois telefone começam com o termo. Uma ou duas consultas.
+    """
+    if any(c.isalpha() for c in termo):
+        return list(obter_backend_busca().filtrar_prefixo(pacientes, termo).order_by('nome_busca', 'id')[:limite])
+
+    digitos = somente_digitos(termo)
+    if not digitos:
+        return []
+    encontrados = list(
+        pacientes.filter(filtro_prefixo_digitos('cpf_digitos', digitos, 11)).order_by('cpf_digitos', 'id')[:limite]
+    )
+    if len(encontrados) < limite:
+        encontrados += pacientes.filter(filtro_prefixo_digitos('telefone_digitos', digitos, 20)).exclude(
+            pk__in=[paciente.pk for paciente in encontrados]
+        ).order_by('telefone_digitos', 'id')[:limite - len(encontrados)]
+    return encontrados
+
+
+@lru_cache(maxsize=None)
+def obter_backend_busca():
+    """Instancia o backend configurado ou o adequado ao banco padrão"""
+    caminho = getattr(settings, 'PACIENTES_BUSCA_BACKEND', None) or BACKENDS_POR_BANCO.get(
+        connection.vendor, 'pacientes.busca.BuscaSimples'
+    )
+    return import_string(caminho)()
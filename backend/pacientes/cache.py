@@ -0,0 +1,73 @@
+# pacientes/cache.py
+"""
+Cache dos fragmentos renderizados da página de detalhes do paciente.
+
+A chave inclui (medico, paciente, versão dos fragmentos). A versão é um contador por
+paciente no próprio cache: os signals de Documento/Foto e o worker a incrementam
+(ver invalidar_paciente), então a entrada antiga simplesmente deixa de ser usada e
+expira pelo TIMEOUT do cache. A linha do paciente não é tocada: ultima_atualizacao
+continua marcando só edições dele (sincronização, ETag da API, arquivamento).
+"""
+import time
+
+from django.core.cache import cache
+
+
+PREFIXO_METRICAS = 'pacientes:cache'
+PREFIXO_VERSAO = 'pacientes:detalhes:versao'
+
+
+def _versao_detalhes(paciente_id):
+    chave = f'{PREFIXO_VERSAO}:{paciente_id}'
+    versao = cache.get(chave)
+    if versao is None:
+        # Versão nova (ou que saiu do cache): começa de um valor que nenhuma chave antiga usou
+        cache.add(chave, time.time_ns(), timeout=None)
+        versao = cache.get(chave)
+    return versao
+
+
+def chave_detalhes(medico_id, paciente):
+    return f'paciente:detalhes:{medico_id}:{paciente.pk}:{_versao_detalhes(paciente.pk)}'
+
+
+def obter_ou_gerar(chave, gerar):
+    """Retorna o valor em cache ou gera, guarda e retorna; contabiliza acertos e falhas"""
+    valor = cache.get(chave)
+    if valor is not None:
+        _contar('acertos')
+        return valor
+
+    _contar('falhas')
+    valor = gerar()
+    cache.set(chave, valor)
+    return valor
+
+
+def invalidar_paciente(paciente_id):
+    """Muda a versão dos fragmentos do paciente, invalidando os que estão em cache"""
+    chave = f'{PREFIXO_VERSAO}:{paciente_id}'
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Sem versão guardada: a próxima leitura cria uma nova, que já invalida
+        pass
+
+
+def _contar(evento):
+    chave = f'{PREFIXO_METRICAS}:{evento}'
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Contador ainda não existe: cria (ou incrementa, se outro processo criou antes)
+        if not cache.add(chave, 1, timeout=None):
+            cache.incr(chave)
+
+
+def estatisticas_cache():
+    """Contadores de acertos/falhas (compartilhados entre processos com cache file/Redis)"""
+    valores = cache.get_many([f'{PREFIXO_METRICAS}:acertos', f'{PREFIXO_METRICAS}:falhas'])
+    return {
+        'acertos': valores.get(f'{PREFIXO_METRICAS}:acertos', 0),
+        'falhas': valores.get(f'{PREFIXO_METRICAS}:falhas', 0),
+    }
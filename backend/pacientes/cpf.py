@@ -0,0 +1,121 @@
+# pacientes/cpf.py
+"""
+Validação de CPF em lote.
+
+`validar_cpfs` valida milhares de CPFs de uma vez: os dígitos verificadores são
+calculados em uma única passada por CPF e a checagem de duplicidade no banco é
+feita com poucas consultas `cpf IN (...)`, em vez de uma consulta por CPF.
+"""
+from dataclasses import dataclass
+
+from .normalizacao import somente_digitos
+
+
+# Limite de parâmetros por consulta IN (abaixo do limite do SQLite antigo, 999)
+TAMANHO_CONSULTA = 500
+
+ERRO_TAMANHO = 'O CPF deve conter exatamente 11 dígitos.'
+ERRO_DIGITOS = 'CPF inválido. Por favor, verifique os números digitados.'
+ERRO_CADASTRADO = 'Este CPF já está cadastrado.'
+ERRO_REPETIDO = 'CPF repetido na mesma importação.'
+
+
+@dataclass
+class ResultadoCpf:
+    original: str
+    digitos: str
+    formatado: str = ''
+    erro: str = ''
+
+    @property
+    def valido(self):
+        return not self.erro
+
+
+def formatar_cpf(digitos):
+    """'12345678909' -> '123.456.789-09'"""
+    return f'{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}'
+
+
+def _digito(soma):
+    resto = soma % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def digitos_conferem(digitos):
+    """
+    Confere os dois dígitos verificadores de um CPF com 11 dígitos.
+
+    As duas somas ponderadas saem da mesma passada: com d = dígitos da base,
+    soma2 = Σ d[i]·(11-i) = soma1 + Σ d[i] + 2·dv1, pois os pesos diferem em 1.
+    """
+    valores = [codigo - 48 for codigo in digitos.encode('ascii')]
+    if valores.count(valores[0]) == 11:
+        return False  # ex: 111.111.111-11
+
+    soma1 = simples = 0
+    for peso, valor in zip(range(10, 1, -1), valores):
+        soma1 += peso * valor
+        simples += valor
+
+    dv1 = _digito(soma1)
+    if valores[9] != dv1:
+        return False
+    return valores[10] == _digito(soma1 + simples + 2 * dv1)
+
+
+def completar_cpf(base):
+    """Base com 9 dígitos -> CPF com os dígitos verificadores ('123456789' -> '12345678909')"""
+    valores = [codigo - 48 for codigo in base.encode('ascii')]
+    soma1 = sum(peso * valor for peso, valor in zip(range(10, 1, -1), valores))
+    dv1 = _digito(soma1)
+    return f'{base}{dv1}{_digito(soma1 + sum(valores) + 2 * dv1)}'
+
+
+def cpfs_existentes(formatados, excluir_pk=None):
+    """Conjunto dos CPFs (formatados) que já estão cadastrados, em consultas IN por blocos"""
+    from .models import Paciente
+
+    formatados = list(dict.fromkeys(formatados))
+    existentes = set()
+    for inicio in range(0, len(formatados), TAMANHO_CONSULTA):
+        consulta = Paciente.objects.filter(cpf__in=formatados[inicio:inicio + TAMANHO_CONSULTA])
+        if excluir_pk is not None:
+            consulta = consulta.exclude(pk=excluir_pk)
+        existentes.update(consulta.values_list('cpf', flat=True))
+    return existentes
+
+
+def validar_cpfs(cpfs, verificar_existentes=True, excluir_pk=None):
+    """
+    Valida uma sequência de CPFs e devolve um ResultadoCpf por item, na mesma ordem.
+
+    Marca como erro CPFs com tamanho errado, dígitos verificadores inválidos,
+    repetidos dentro da própria sequência e (opcionalmente) já cadastrados.
+    `excluir_pk` ignora o próprio paciente ao editar.
+    """
+    resultados = []
+    vistos = set()
+
+    for original in cpfs:
+        digitos = somente_digitos(original)
+        resultado = ResultadoCpf(original, digitos)
+        resultados.append(resultado)
+
+        if len(digitos) != 11:
+            resultado.erro = ERRO_TAMANHO
+        elif not digitos_conferem(digitos):
+            resultado.erro = ERRO_DIGITOS
+        else:
+            resultado.formatado = formatar_cpf(digitos)
+            if resultado.formatado in vistos:
+                resultado.erro = ERRO_REPETIDO
+            vistos.add(resultado.formatado)
+
+    if verificar_existentes and vistos:
+        existentes = cpfs_existentes(vistos, excluir_pk)
+        for resultado in resultados:
+            if resultado.valido and resultado.formatado in existentes:
+                resultado.erro = ERRO_CADASTRADO
+
+    return resultados
@@ -0,0 +1,219 @@
+# pacientes/desempenho.py
+"""
+Benchmark das views principais (ver o comando medir_desempenho).
+
+Cada cenário faz requisições pelo test client do Django, no próprio processo:
+passa por todos os middlewares, views e templates, mas não pelo servidor HTTP
+(gunicorn/uvicorn), então os números servem para comparar versões do código na
+mesma máquina, não para estimar a capacidade do servidor. Para cada cenário são
+guardados p50/p90/p99, média, máximo, requisições por segundo e consultas SQL
+por requisição; o resultado é um dict pronto para virar JSON e ser comparado
+com uma execução anterior (comparar_resultados).
+"""
+import math
+import random
+import subprocess
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Documento, Paciente, Tarefa
+from .sinteticos import NOMES_FEMININOS, NOMES_MASCULINOS, SOBRENOMES, pdf_simples
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método nearest-rank (a lista já deve estar ordenada)"""
+    if not ordenados:
+        return 0.0
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir(duracoes, consultas):
+    # Vazão sequencial: uma requisição por vez, pelo tempo somado das próprias requisições
+    ordenados = sorted(duracoes)
+    return {
+        'requisicoes': len(ordenados),
+        'p50_ms': round(percentil(ordenados, 50) * 1000, 3),
+        'p90_ms': round(percentil(ordenados, 90) * 1000, 3),
+        'p99_ms': round(percentil(ordenados, 99) * 1000, 3),
+        'media_ms': round(sum(ordenados) / len(ordenados) * 1000, 3),
+        'max_ms': round(ordenados[-1] * 1000, 3),
+        'requisicoes_por_segundo': round(len(ordenados) / sum(ordenados), 1),
+        'consultas_por_requisicao': round(consultas / len(ordenados), 1),
+    }
+
+
+class Benchmark:
+    """Executa os cenários para um médico e acumula as amostras por view"""
+
+    def __init__(self, medico, semente=None):
+        self.medico = medico
+        self.aleatorio = random.Random(semente)
+        hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+        self.cliente = Client(HTTP_HOST=(hosts[0].lstrip('.') if hosts else 'localhost'))
+        self.cliente.force_login(medico)
+        self.pacientes = list(
+            Paciente.objects.filter(medico=medico, ativo=True).values_list('pk', 'cpf_digitos')[:5000]
+        )
+        if not self.pacientes:
+            raise ValueError(f'O médico {medico} não tem pacientes (rode gerar_dados_sinteticos).')
+        self.pdf = pdf_simples(['Benchmark de upload', 'Hemograma completo'])
+        self.consultas = 0
+        self.amostras = defaultdict(list)
+        self.falhas = defaultdict(int)
+
+    def _contar_consulta(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+    def medir(self, nome, metodo, *args, status=(200,), **kwargs):
+        """Faz a requisição, guarda (duração, consultas) e devolve a resposta"""
+        consultas_antes = self.consultas
+        inicio = time.perf_counter()
+        response = getattr(self.cliente, metodo)(*args, **kwargs)
+        # Respostas em streaming só terminam quando o conteúdo é consumido
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        self.amostras[nome].append((time.perf_counter() - inicio, self.consultas - consultas_antes))
+        if response.status_code not in status:
+            self.falhas[nome] += 1
+        return response
+
+    def paciente(self):
+        return self.aleatorio.choice(self.pacientes)
+
+    # ---- cenários (cada um faz uma iteração) ----
+
+    def dashboard(self):
+        self.medir('dashboard', 'get', reverse('dashboard'))
+
+    def dashboard_busca_nome(self):
+        self.medir('dashboard_busca_nome', 'get', reverse('dashboard'),
+                   data={'busca': self.aleatorio.choice(SOBRENOMES)})
+
+    def dashboard_busca_cpf(self):
+        self.medir('dashboard_busca_cpf', 'get', reverse('dashboard'), data={'busca': self.paciente()[1][:6]})
+
+    def dashboard_busca_documentos(self):
+        self.medir('dashboard_busca_documentos', 'get', reverse('dashboard'),
+                   data={'busca': self.aleatorio.choice(['hemograma', 'glicose', 'ritmo sinusal']), 'documentos': '1'})
+
+    def sugestoes(self):
+        """Autocompletar: prefixo de 2 a 5 letras de um nome, ou dígitos do começo de um CPF"""
+        if self.aleatorio.random() < 0.75:
+            nome = self.aleatorio.choice(NOMES_FEMININOS + NOMES_MASCULINOS)
+            termo = nome[:self.aleatorio.randint(2, 5)]
+        else:
+            termo = self.paciente()[1][:self.aleatorio.randint(3, 6)]
+        self.medir('sugestoes', 'get', reverse('api_sugestoes'), data={'q': termo})
+
+    def paciente_detalhes(self):
+        self.medir('paciente_detalhes', 'get', reverse('paciente_detalhes', args=[self.paciente()[0]]))
+
+    def documento_adicionar(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.medir('documento_adicionar', 'post', reverse('documento_adicionar', args=[self.paciente()[0]]),
+                   status=(302,), data={
+                       'titulo': 'Benchmark', 'descricao': '',
+                       'arquivo': SimpleUploadedFile('benchmark.pdf', self.pdf, 'application/pdf'),
+                   })
+
+    def upload_em_partes(self):
+        """Fluxo completo: cria o upload, envia uma parte e conclui pelo formulário"""
+        paciente_pk = self.paciente()[0]
+        response = self.medir('upload_criar', 'post', reverse('upload_criar', args=[paciente_pk, 'documento']),
+                              status=(201,), data={'nome': 'benchmark.pdf', 'tamanho': len(self.pdf)})
+        if response.status_code != 201:
+            return
+        dados = response.json()
+        # generic(): o test client não tem atalho para PATCH com corpo binário
+        self.medir('upload_parcial', 'generic', 'PATCH', status=(204,), path=dados['url'],
+                   data=self.pdf, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0')
+        self.medir('documento_adicionar_upload', 'post', reverse('documento_adicionar', args=[paciente_pk]),
+                   status=(302,), data={'titulo': 'Benchmark', 'descricao': '', 'upload': dados['id']})
+
+    CENARIOS = {
+        'dashboard': dashboard,
+        'dashboard_busca_nome': dashboard_busca_nome,
+        'dashboard_busca_cpf': dashboard_busca_cpf,
+        'dashboard_busca_documentos': dashboard_busca_documentos,
+        'sugestoes': sugestoes,
+        'paciente_detalhes': paciente_detalhes,
+        'documento_adicionar': documento_adicionar,
+        'upload_em_partes': upload_em_partes,
+    }
+
+    def executar(self, cenarios, requisicoes, aquecimento=10):
+        """Roda cada cenário `aquecimento` vezes sem medir e depois `requisicoes` vezes"""
+        ultimo_documento = Documento.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        ultima_tarefa = Tarefa.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        resultados = {}
+        try:
+            with connection.execute_wrapper(self._contar_consulta):
+                for nome in cenarios:
+                    cenario = self.CENARIOS[nome]
+                    for _ in range(aquecimento):
+                        cenario(self)
+                    self.amostras.clear()
+                    self.falhas.clear()
+
+                    for _ in range(requisicoes):
+                        cenario(self)
+
+                    # upload_em_partes gera uma série por view do fluxo
+                    for view, amostras in self.amostras.items():
+                        resultados[view] = resumir(
+                            [duracao for duracao, _ in amostras], sum(consultas for _, consultas in amostras),
+                        )
+                        resultados[view]['falhas'] = self.falhas[view]
+        finally:
+            # Apaga o que os cenários de upload criaram (os signals liberam os arquivos)
+            criados = Documento.objects.filter(pk__gt=ultimo_documento, paciente__medico=self.medico)
+            Tarefa.objects.filter(
+                pk__gt=ultima_tarefa, tipo='processar_documento',
+                parametros__documento_id__in=list(criados.values_list('pk', flat=True)),
+            ).delete()
+            criados.delete()
+        return resultados
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except OSError:
+        return ''
+
+
+def ambiente(medico):
+    return {
+        'data': timezone.now().isoformat(),
+        'commit': versao_codigo(),
+        'banco': connection.vendor,
+        'debug': settings.DEBUG,
+        'tarefas_sincronas': getattr(settings, 'TAREFAS_SINCRONAS', False),
+        'diretorio_pacientes': settings.DIRETORIO_PACIENTES,
+        'pacientes_do_medico': Paciente.objects.filter(medico=medico, ativo=True).count(),
+        'total_pacientes': Paciente.objects.count(),
+    }
+
+
+def comparar_resultados(anterior, atual):
+    """Linhas (view, métrica, antes, depois, variação %) das métricas de latência e vazão"""
+    linhas = []
+    for view, metricas in atual.items():
+        if view not in anterior:
+            continue
+        for chave in ('p50_ms', 'p99_ms', 'requisicoes_por_segundo'):
+            antes, depois = anterior[view][chave], metricas[chave]
+            variacao = (depois - antes) / antes * 100 if antes else 0.0
+            linhas.append((view, chave, antes, depois, variacao))
+    return linhas
@@ -0,0 +1,304 @@
+# pacientes/diretorio.py
+"""
+Diretório de pacientes em memória, por médico (opcional: DIRETORIO_PACIENTES=True).
+
+Para cada médico usado recentemente, o processo guarda os pacientes ativos em
+objetos compactos (__slots__, só as colunas da lista do dashboard e das buscas
+por prefixo), em listas ordenadas por cadastro, nome, CPF e telefone. A lista
+do dashboard, a busca por CPF/telefone e as sugestões viram bisect nessas
+listas, sem consulta ao banco. A busca por nome do dashboard continua no banco
+(FTS5/pg_trgm), que ordena por relevância.
+
+- Cada processo guarda no máximo DIRETORIO_PACIENTES_MAXIMO_MEDICOS diretórios
+  (LRU). Um diretório montado não muda mais: uma alteração monta outro e troca
+  a referência, então as threads leem sem trava. O novo copia as listas (cópia
+  de ponteiros) e só tira e insere o paciente alterado nelas, por bisect; não
+  reordena nada.
+- A versão de cada médico fica no cache compartilhado (CACHES['default']).
+  Depois do commit, os signals de Paciente a incrementam, publicam a alteração
+  no cache com o número da versão e a aplicam no diretório do próprio processo.
+  Os outros processos veem a versão nova no próximo uso e aplicam as alterações
+  publicadas desde a versão que têm (até MAXIMO_ALTERACOES). Só quando falta
+  alguma (expirou, invalidar_diretorio) ou são muitas o diretório é remontado,
+  pela cópia guardada no cache com essa versão ou pelo banco (uma consulta,
+  guardada em seguida).
+- bulk_create e update() não disparam signals: quem os usa chama invalidar_diretorio.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import Paciente
+from .normalizacao import normalizar_texto, proximo_prefixo, somente_digitos
+from .paginacao import codificar_cursor, decodificar_cursor
+
+
+PREFIXO_CACHE = 'pacientes:diretorio'
+
+# Alterações publicadas que um processo atrasado aplica antes de preferir remontar o diretório
+MAXIMO_ALTERACOES = 200
+VALIDADE_ALTERACOES = 60 * 60
+
+CAMPOS = (
+    'id', 'nome_completo', 'nome_busca', 'cpf', 'cpf_digitos', 'telefone', 'telefone_digitos',
+    'cidade', 'estado', 'data_nascimento', 'data_cadastro',
+)
+
+_diretorios = OrderedDict()  # medico_id -> Diretorio, do menos ao mais recente
+_trava = threading.Lock()
+
+
+class EntradaDiretorio:
+    """Paciente no diretório; tem os atributos que os cards e a API usam (pk, get_idade...)"""
+
+    __slots__ = CAMPOS
+
+    def __init__(self, *valores):
+        for campo, valor in zip(CAMPOS, valores):
+            setattr(self, campo, valor)
+
+    @classmethod
+    def de_paciente(cls, paciente):
+        return cls(*(getattr(paciente, campo) for campo in CAMPOS))
+
+    @property
+    def pk(self):
+        return self.id
+
+    # Mesmo cálculo do modelo (só usa data_nascimento)
+    get_idade = Paciente.get_idade
+
+    def valores(self):
+        return tuple(getattr(self, campo) for campo in CAMPOS)
+
+
+def _chave_cadastro(entrada):
+    return entrada.data_cadastro, entrada.id
+
+
+# Lista ordenada do Diretorio -> chave da ordenação (única: todas terminam no id)
+ORDENACOES = (
+    ('por_cadastro', _chave_cadastro),
+    ('por_nome', attrgetter('nome_busca', 'id')),
+    ('por_cpf', attrgetter('cpf_digitos', 'id')),
+    ('por_telefone', attrgetter('telefone_digitos', 'id')),
+)
+
+
+def _com_prefixo(ordenadas, campo, prefixo):
+    """Fatia das entradas (ordenadas por campo) cujo campo começa com o prefixo"""
+    if not prefixo:
+        return ordenadas
+    chave = attrgetter(campo)
+    inicio = bisect_left(ordenadas, prefixo, key=chave)
+    return ordenadas[inicio:bisect_left(ordenadas, proximo_prefixo(prefixo), lo=inicio, key=chave)]
+
+
+class Diretorio:
+    """Pacientes ativos de um médico, com uma lista ordenada por cada forma de consulta"""
+
+    __slots__ = ('versao', 'por_id', 'por_cadastro', 'por_nome', 'por_cpf', 'por_telefone')
+
+    def __init__(self, entradas, versao):
+        self.versao = versao
+        self.por_id = {entrada.id: entrada for entrada in entradas}
+        for lista, chave in ORDENACOES:
+            setattr(self, lista, sorted(entradas, key=chave))
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def alterado(self, alteracoes, versao):
+        """
+        Novo diretório com as alterações [(pk, entrada)] aplicadas em ordem (entrada
+        None: paciente removido). Este continua intacto para quem ainda o lê.
+        """
+        novo = Diretorio.__new__(Diretorio)
+        novo.versao = versao
+        novo.por_id = dict(self.por_id)
+        listas = [(list(getattr(self, lista)), chave) for lista, chave in ORDENACOES]
+        for pk, entrada in alteracoes:
+            anterior = novo.por_id.pop(pk, None)
+            if entrada is not None:
+                novo.por_id[pk] = entrada
+            for ordenadas, chave in listas:
+                if anterior is not None:
+                    del ordenadas[bisect_left(ordenadas, chave(anterior), key=chave)]
+                if entrada is not None:
+                    insort(ordenadas, entrada, key=chave)
+        for (lista, _), (ordenadas, _) in zip(ORDENACOES, listas):
+            setattr(novo, lista, ordenadas)
+        return novo
+
+    def pagina(self, entradas, cursor, tamanho):
+        """
+        Página de `entradas` (ordenadas por cadastro, como por_cadastro) na ordem do
+        dashboard, mais recentes primeiro, com o mesmo cursor de paginar_por_cursor.
+        """
+        fim = len(entradas)
+        chave = decodificar_cursor(cursor)
+        if chave:
+            try:
+                fim = bisect_left(entradas, chave, key=_chave_cadastro)
+            except TypeError:
+                pass  # cursor com data sem fuso: começa do início, como um cursor inválido
+        # Um item a mais só para saber se existe próxima página
+        itens = entradas[max(0, fim - tamanho - 1):fim][::-1]
+        proximo_cursor = codificar_cursor(itens[tamanho - 1]) if len(itens) > tamanho else None
+        return itens[:tamanho], proximo_cursor
+
+    def buscar_digitos(self, digitos):
+        """
+        Pacientes cujo CPF ou telefone começa com os dígitos, ordenados por cadastro;
+        sem nenhum, os que contêm os dígitos em qualquer posição (como no banco).
+        """
+        if not digitos:
+            # Busca só com pontuação: o prefixo vazio casaria com todos, como no banco
+            return []
+        encontrados = {
+            entrada.id: entrada
+            for campo, ordenadas in (('cpf_digitos', self.por_cpf), ('telefone_digitos', self.por_telefone))
+            for entrada in _com_prefixo(ordenadas, campo, digitos)
+        }
+        if not encontrados:
+            # por_cadastro já está na ordem do resultado
+            return [
+                entrada for entrada in self.por_cadastro
+                if digitos in entrada.cpf_digitos or digitos in entrada.telefone_digitos
+            ]
+        return sorted(encontrados.values(), key=_chave_cadastro)
+
+    def sugestoes(self, termo, limite):
+        """Mesmo resultado de busca.sugestoes, pelas listas em memória"""
+        if any(c.isalpha() for c in termo):
+            return _com_prefixo(self.por_nome, 'nome_busca', normalizar_texto(termo))[:limite]
+
+        digitos = somente_digitos(termo)
+        if not digitos:
+            return []
+        encontrados = _com_prefixo(self.por_cpf, 'cpf_digitos', digitos)[:limite]
+        if len(encontrados) < limite:
+            vistos = {entrada.id for entrada in encontrados}
+            encontrados += [
+                entrada for entrada in _com_prefixo(self.por_telefone, 'telefone_digitos', digitos)
+                if entrada.id not in vistos
+            ][:limite - len(encontrados)]
+        return encontrados
+
+
+# ==================== VERSÕES E CACHE COMPARTILHADO ====================
+
+def _chave_versao(medico_id):
+    return f'{PREFIXO_CACHE}:versao:{medico_id}'
+
+
+def _versao(medico_id):
+    versao = cache.get(_chave_versao(medico_id))
+    if versao is None:
+        # Versão nova (ou que saiu do cache): começa de um valor que nenhum processo tem guardado
+        cache.add(_chave_versao(medico_id), time.time_ns(), timeout=None)
+        versao = cache.get(_chave_versao(medico_id))
+    return versao
+
+
+def _nova_versao(medico_id):
+    try:
+        return cache.incr(_chave_versao(medico_id))
+    except ValueError:
+        return _versao(medico_id)
+
+
+def _chave_alteracao(medico_id, versao):
+    return f'{PREFIXO_CACHE}:alteracao:{medico_id}:{versao}'
+
+
+def _cache_compartilhado():
+    # Com locmem o "compartilhado" é a memória do próprio processo: a cópia só duplicaria o diretório.
+    # caches['default'] e não `cache`, que é um proxy (isinstance nele nunca casa)
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def _carregar(medico_id, versao):
+    chave = f'{PREFIXO_CACHE}:{medico_id}:{versao}'
+    linhas = cache.get(chave) if _cache_compartilhado() else None
+    if linhas is None:
+        linhas = list(
+            Paciente.objects.filter(medico_id=medico_id, ativo=True).order_by().values_list(*CAMPOS)
+        )
+        if _cache_compartilhado():
+            cache.set(chave, linhas)
+    return Diretorio([EntradaDiretorio(*linha) for linha in linhas], versao)
+
+
+def _guardar(medico_id, diretorio):
+    with _trava:
+        _diretorios[medico_id] = diretorio
+        _diretorios.move_to_end(medico_id)
+        while len(_diretorios) > settings.DIRETORIO_PACIENTES_MAXIMO_MEDICOS:
+            _diretorios.popitem(last=False)
+
+
+def _atualizar(medico_id, diretorio, versao):
+    """
+    O diretório levado à `versao` pelas alterações publicadas pelos outros processos,
+    ou None se alguma falta (expirou, invalidar_diretorio) ou são mais que MAXIMO_ALTERACOES.
+    """
+    if not _cache_compartilhado() or not 0 < versao - diretorio.versao <= MAXIMO_ALTERACOES:
+        return None
+    chaves = [_chave_alteracao(medico_id, numero) for numero in range(diretorio.versao + 1, versao + 1)]
+    publicadas = cache.get_many(chaves)
+    if len(publicadas) != len(chaves):
+        return None
+    alteracoes = [
+        (pk, EntradaDiretorio(*valores) if valores is not None else None)
+        for pk, valores in (publicadas[chave] for chave in chaves)
+    ]
+    return diretorio.alterado(alteracoes, versao)
+
+
+def obter_diretorio(medico_id):
+    """Diretório do médico em dia com a versão do cache compartilhado (atualiza ou monta se preciso)"""
+    versao = _versao(medico_id)
+    with _trava:
+        diretorio = _diretorios.get(medico_id)
+        if diretorio is not None and diretorio.versao == versao:
+            _diretorios.move_to_end(medico_id)
+            return diretorio
+
+    if diretorio is not None:
+        diretorio = _atualizar(medico_id, diretorio, versao)
+    if diretorio is None:
+        diretorio = _carregar(medico_id, versao)
+    _guardar(medico_id, diretorio)
+    return diretorio
+
+
+def registrar_alteracao(medico_id, pk, entrada):
+    """Chamada pelos signals depois do commit: `entrada` None quando o paciente saiu (inativo/apagado)"""
+    versao = _nova_versao(medico_id)
+    if _cache_compartilhado():
+        cache.set(
+            _chave_alteracao(medico_id, versao),
+            (pk, entrada.valores() if entrada is not None else None),
+            timeout=VALIDADE_ALTERACOES,
+        )
+    with _trava:
+        atual = _diretorios.get(medico_id)
+    # Aplica direto sobre o diretório da versão imediatamente anterior; se outro processo
+    # alterou no meio, o próximo uso aplica as alterações publicadas (ou remonta)
+    if atual is not None and atual.versao == versao - 1:
+        _guardar(medico_id, atual.alterado([(pk, entrada)], versao))
+
+
+def invalidar_diretorio(medico_id):
+    """Para alterações sem signals (bulk_create, update()): todos os processos remontam"""
+    if settings.DIRETORIO_PACIENTES:
+        _nova_versao(medico_id)
+        with _trava:
+            _diretorios.pop(medico_id, None)
@@ -0,0 +1,37 @@
+# pacientes/estaticos.py
+"""
+WhiteNoise utilizável no modo ASGI.
+
+O WhiteNoiseMiddleware (6.x) é só síncrono: no ASGI o Django o executaria numa
+thread e chamaria o resto da pilha por async_to_sync, prendendo uma thread por
+requisição e anulando o ganho das views async. Esta subclasse atende o arquivo
+estático da mesma forma (a busca é um dict em memória) e só repassa o await
+para o próximo middleware.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class ArquivosEstaticosMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
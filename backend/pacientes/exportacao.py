@@ -0,0 +1,241 @@
+# pacientes/exportacao.py
+"""
+Exportação da base de pacientes de um médico em CSV, JSONL ou XLSX.
+
+Tudo é gerado em streaming: os pacientes são lidos com iterator(chunk_size=...)
+(cursor no servidor no PostgreSQL) e cada função devolve um gerador de bytes,
+usado tanto pelo StreamingHttpResponse quanto pelo comando exportar_pacientes.
+O uso de memória fica constante, independente do tamanho da base.
+"""
+import csv
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from datetime import date, datetime
+
+from .models import Paciente, Documento, Foto
+
+
+logger = logging.getLogger(__name__)
+
+# Registros buscados por ida ao banco
+TAMANHO_BLOCO = 2000
+
+# Tamanho dos pedaços lidos dos arquivos (XLSX temporário, documentos e fotos)
+TAMANHO_PEDACO = 64 * 1024
+
+# Mesmos nomes de coluna aceitos pela importação, então o arquivo pode ser reimportado
+CAMPOS_EXPORTACAO = [
+    'id', 'nome_completo', 'data_nascimento', 'cpf', 'sexo',
+    'telefone', 'email',
+    'cep', 'endereco', 'cidade', 'estado',
+    'tipo_sanguineo', 'alergias', 'medicamentos_uso',
+    'historico_familiar', 'observacoes', 'ativo',
+    'data_cadastro', 'ultima_atualizacao',
+]
+
+CABECALHO_ARQUIVOS = ['tipo', 'paciente_id', 'titulo', 'caminho']
+
+# Formato -> (extensão, content type)
+FORMATOS_EXPORTACAO = {
+    'csv': ('csv', 'text/csv; charset=utf-8'),
+    'jsonl': ('jsonl', 'application/x-ndjson; charset=utf-8'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def _valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if valor is None:
+        return ''
+    return valor
+
+
+def linhas_pacientes(medico):
+    """Gera uma tupla por paciente do médico (na ordem de CAMPOS_EXPORTACAO)"""
+    registros = (
+        Paciente.objects.filter(medico=medico)
+        .order_by('id')
+        .values_list(*CAMPOS_EXPORTACAO)
+        .iterator(chunk_size=TAMANHO_BLOCO)
+    )
+    for registro in registros:
+        yield tuple(_valor(valor) for valor in registro)
+
+
+class Eco:
+    """'Arquivo' que só devolve o que recebe: permite usar o csv.writer como gerador"""
+
+    def write(self, valor):
+        return valor
+
+
+def gerar_csv(medico):
+    escritor = csv.writer(Eco())
+    # BOM para o Excel abrir os acentos corretamente (a importação aceita utf-8-sig)
+    yield '\ufeff'.encode('utf-8') + escritor.writerow(CAMPOS_EXPORTACAO).encode('utf-8')
+    for linha in linhas_pacientes(medico):
+        yield escritor.writerow(linha).encode('utf-8')
+
+
+def gerar_jsonl(medico):
+    for linha in linhas_pacientes(medico):
+        yield (json.dumps(dict(zip(CAMPOS_EXPORTACAO, linha)), ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def gerar_xlsx(medico):
+    """
+    O XLSX é um ZIP que só pode ser fechado no fim: grava em um arquivo temporário
+    com o modo write_only do openpyxl (linhas vão direto para o disco) e depois
+    envia o arquivo em pedaços.
+    """
+    # Import tardio: openpyxl só é necessário para planilhas do Excel
+    from openpyxl import Workbook
+
+    with tempfile.TemporaryFile() as temporario:
+        planilha = Workbook(write_only=True)
+        aba = planilha.create_sheet('Pacientes')
+        aba.append(CAMPOS_EXPORTACAO)
+        for linha in linhas_pacientes(medico):
+            aba.append(linha)
+        planilha.save(temporario)
+
+        temporario.seek(0)
+        while pedaco := temporario.read(TAMANHO_PEDACO):
+            yield pedaco
+
+
+GERADORES = {
+    'csv': gerar_csv,
+    'jsonl': gerar_jsonl,
+    'xlsx': gerar_xlsx,
+}
+
+
+def gerar_exportacao(medico, formato):
+    """Gerador de bytes da exportação no formato pedido ('csv', 'jsonl' ou 'xlsx')"""
+    return GERADORES[formato](medico)
+
+
+class SaidaZip:
+    """
+    Destino sem seek para o zipfile: acumula o que foi escrito até ser recolhido.
+
+    Sem tell()/seek() o zipfile grava os tamanhos em data descriptors depois de
+    cada arquivo, então o ZIP pode ser enviado enquanto é montado.
+    """
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def recolher(self):
+        dados = b''.join(self.partes)
+        self.partes.clear()
+        return dados
+
+
+def _nome_unico(nome, usados):
+    """'exame.pdf' já usado na pasta -> 'exame_2.pdf' (sem diferenciar maiúsculas, como no Windows)"""
+    base, extensao = os.path.splitext(nome)
+    candidato, numero = nome, 1
+    while candidato.casefold() in usados:
+        numero += 1
+        candidato = f'{base}_{numero}{extensao}'
+    usados.add(candidato.casefold())
+    return candidato
+
+
+def _arquivos_medico(medico):
+    """
+    Gera (tipo, paciente_id, titulo, storage, nome no storage, nome no ZIP) dos documentos e fotos.
+
+    No ZIP cada arquivo fica em documentos/<paciente>/ ou fotos/<paciente>/ com o nome
+    enviado pelo usuário (nome_original). Em ordem de paciente, só os nomes da pasta
+    atual ficam em memória, e as duas passadas geram os mesmos nomes.
+    """
+    for modelo, tipo, campo in ((Documento, 'documento', 'arquivo'), (Foto, 'foto', 'imagem')):
+        # O storage do campo (deduplicado, mídia fria...), não o default_storage
+        storage = modelo._meta.get_field(campo).storage
+        registros = (
+            modelo.objects.filter(paciente__medico=medico)
+            .order_by('paciente_id', 'id')
+            .values_list('paciente_id', 'titulo', campo, 'nome_original')
+            .iterator(chunk_size=TAMANHO_BLOCO)
+        )
+        pasta, usados = None, set()
+        for paciente_id, titulo, nome, nome_original in registros:
+            if not nome:
+                continue
+            if paciente_id != pasta:
+                pasta, usados = paciente_id, set()
+            nome_zip = _nome_unico(os.path.basename(nome_original) or os.path.basename(nome), usados)
+            yield tipo, paciente_id, titulo, storage, nome, f'{tipo}s/{paciente_id}/{nome_zip}'
+
+
+def _info_zip(nome, compressao):
+    info = zipfile.ZipInfo(nome, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = compressao
+    return info
+
+
+def _montar_zip(saida, medico, formato, incluir_arquivos):
+    """Escreve o ZIP em `saida`, pausando (yield) sempre que pode haver bytes para enviar"""
+    extensao, _ = FORMATOS_EXPORTACAO[formato]
+
+    with zipfile.ZipFile(saida, 'w') as pacote:
+        with pacote.open(_info_zip(f'pacientes.{extensao}', zipfile.ZIP_DEFLATED), 'w', force_zip64=True) as destino:
+            for pedaco in gerar_exportacao(medico, formato):
+                destino.write(pedaco)
+                yield
+
+        if incluir_arquivos:
+            # O índice vem antes dos arquivos: uma passada a mais na consulta, sem guardar nada em memória
+            indice = csv.writer(Eco())
+            with pacote.open(_info_zip('arquivos.csv', zipfile.ZIP_DEFLATED), 'w', force_zip64=True) as destino:
+                destino.write(indice.writerow(CABECALHO_ARQUIVOS).encode('utf-8'))
+                for tipo, paciente_id, titulo, _, _, caminho in _arquivos_medico(medico):
+                    destino.write(indice.writerow([tipo, paciente_id, titulo, caminho]).encode('utf-8'))
+                    yield
+
+            for _, _, _, storage, nome, caminho in _arquivos_medico(medico):
+                try:
+                    origem = storage.open(nome, 'rb')
+                except FileNotFoundError:
+                    logger.warning('Arquivo ausente na exportação: %s', nome)
+                    continue
+
+                with origem, pacote.open(_info_zip(caminho, zipfile.ZIP_STORED), 'w', force_zip64=True) as destino:
+                    while pedaco := origem.read(TAMANHO_PEDACO):
+                        destino.write(pedaco)
+                        yield
+
+
+def gerar_zip(medico, formato, incluir_arquivos=True):
+    """
+    ZIP com a exportação dos pacientes e, opcionalmente, os documentos e fotos.
+
+    PDFs e imagens já são comprimidos e entram sem compressão (ZIP_STORED);
+    as planilhas usam ZIP_DEFLATED. O índice arquivos.csv relaciona cada
+    arquivo ao paciente.
+    """
+    saida = SaidaZip()
+    for _ in _montar_zip(saida, medico, formato, incluir_arquivos):
+        if dados := saida.recolher():
+            yield dados
+    # Diretório central, gravado quando o ZipFile é fechado
+    yield saida.recolher()
+
+
+def nome_arquivo_exportacao(formato, incluir_arquivos=False):
+    extensao = 'zip' if incluir_arquivos else FORMATOS_EXPORTACAO[formato][0]
+    return f'pacientes_{date.today():%Y%m%d}.{extensao}'
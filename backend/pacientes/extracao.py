@@ -0,0 +1,77 @@
+# pacientes/extracao.py
+"""
+Extração do texto dos PDFs para a busca por conteúdo dos documentos.
+
+Roda no worker, depois do checksum (ver tarefas.processar_documento), e é
+incremental: texto_checksum guarda de qual versão do arquivo o texto veio, então
+um documento já extraído não é relido, e um PDF idêntico enviado de novo
+reaproveita o texto do primeiro em vez de abrir o arquivo.
+"""
+import logging
+
+from django.utils import timezone
+
+from .models import Documento
+
+
+logger = logging.getLogger(__name__)
+
+# tsvector do PostgreSQL tem limite de 1MB: o resto de PDFs muito longos é ignorado
+LIMITE_CARACTERES = 500_000
+
+
+def extrair_texto_pdf(arquivo, nome=''):
+    """Texto de todas as páginas do PDF (vazio se o arquivo não puder ser lido)"""
+    # Import tardio: pypdf só é necessário no worker
+    from pypdf import PdfReader
+
+    partes = []
+    total = 0
+    try:
+        for pagina in PdfReader(arquivo).pages:
+            texto = pagina.extract_text() or ''
+            partes.append(texto)
+            total += len(texto)
+            if total >= LIMITE_CARACTERES:
+                break
+    except Exception as erro:
+        # PDFs corrompidos ou criptografados levantam exceções variadas no pypdf
+        logger.warning('Não foi possível extrair o texto de %s: %s', nome, erro)
+    return '\n'.join(partes)[:LIMITE_CARACTERES]
+
+
+def _texto_conhecido(documento):
+    """Texto já extraído de outro documento com o mesmo conteúdo, ou None"""
+    return (
+        Documento.objects.filter(checksum=documento.checksum, texto_checksum=documento.checksum)
+        .exclude(pk=documento.pk)
+        .values_list('texto_extraido', flat=True)
+        .first()
+    )
+
+
+def extrair_texto(documento):
+    """
+    Extrai (se ainda não extraído para este checksum) e grava o texto do documento.
+
+    Retorna False quando o texto já estava atualizado.
+    """
+    if documento.checksum and documento.texto_checksum == documento.checksum:
+        return False
+
+    texto = _texto_conhecido(documento) if documento.checksum else None
+    if texto is None:
+        with documento.arquivo.open('rb') as arquivo:
+            texto = extrair_texto_pdf(arquivo, documento.arquivo.name)
+
+    documento.texto_extraido = texto
+    documento.texto_checksum = documento.checksum
+    documento.normalizar_texto_busca()
+    # update(): só as colunas do texto, sem disparar signals (o trigger do FTS5 cuida do índice)
+    Documento.objects.filter(pk=documento.pk).update(
+        texto_extraido=documento.texto_extraido,
+        texto_checksum=documento.texto_checksum,
+        texto_busca=documento.texto_busca,
+        ultima_atualizacao=timezone.now(),
+    )
+    return True
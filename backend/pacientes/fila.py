@@ -0,0 +1,164 @@
+# pacientes/fila.py
+"""
+Fila de tarefas em segundo plano usando o próprio banco (sem broker).
+
+- `@tarefa('nome')` registra a função que executa um tipo de tarefa;
+- `enfileirar('nome', **parametros)` grava a tarefa (na mesma transação da view);
+- `python manage.py processar_tarefas` roda o worker.
+
+A reserva é um UPDATE condicional (status='pendente' -> 'processando'), que funciona
+igual no PostgreSQL e no SQLite e impede que dois workers peguem a mesma tarefa.
+Enquanto a tarefa roda, uma thread do worker renova `renovada_em`; só uma tarefa
+sem renovação (worker morto) volta para a fila, e só se ainda tiver tentativas.
+"""
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tarefa
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRO_TAREFAS = {}
+
+# A tarefa em execução renova o prazo nesse intervalo; "processando" sem
+# renovação há mais de PRAZO_RENOVACAO vem de um worker que morreu
+INTERVALO_RENOVACAO = timedelta(seconds=30)
+PRAZO_RENOVACAO = timedelta(minutes=3)
+
+
+def tarefa(nome, max_tentativas=3):
+    """Decorator que registra a função como executora do tipo de tarefa `nome`"""
+    def registrar(funcao):
+        funcao.max_tentativas = max_tentativas
+        REGISTRO_TAREFAS[nome] = funcao
+        return funcao
+    return registrar
+
+
+def enfileirar(tipo, **parametros):
+    """
+    Agenda a tarefa para o worker.
+
+    Com TAREFAS_SINCRONAS=True (desenvolvimento), executa logo após o commit.
+    """
+    funcao = REGISTRO_TAREFAS.get(tipo)
+    nova = Tarefa.objects.create(
+        tipo=tipo,
+        parametros=parametros,
+        max_tentativas=getattr(funcao, 'max_tentativas', 3),
+    )
+    if getattr(settings, 'TAREFAS_SINCRONAS', False):
+        transaction.on_commit(lambda: executar_pendente(nova.pk))
+    return nova
+
+
+def executar_pendente(pk):
+    """Reserva e executa uma tarefa específica, se ela ainda estiver pendente"""
+    if _reservar(pk):
+        executar(Tarefa.objects.get(pk=pk))
+
+
+def _reservar(pk):
+    agora = timezone.now()
+    return Tarefa.objects.filter(pk=pk, status='pendente', tentativas__lt=F('max_tentativas')).update(
+        status='processando',
+        iniciada_em=agora,
+        renovada_em=agora,
+        tentativas=F('tentativas') + 1,
+    ) == 1
+
+
+def reservar_proxima():
+    """Reserva a próxima tarefa liberada; retorna None se a fila estiver vazia"""
+    while True:
+        pk = (
+            Tarefa.objects.filter(
+                status='pendente', executar_apos__lte=timezone.now(), tentativas__lt=F('max_tentativas'),
+            )
+            .order_by('executar_apos', 'id')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        if _reservar(pk):
+            return Tarefa.objects.get(pk=pk)
+        # Outro worker reservou primeiro: tenta a seguinte
+
+
+def executar(tarefa_reservada):
+    """Executa uma tarefa já reservada, reagendando com espera crescente em caso de erro"""
+    funcao = REGISTRO_TAREFAS.get(tarefa_reservada.tipo)
+
+    try:
+        if funcao is None:
+            raise LookupError(f'Tipo de tarefa desconhecido: {tarefa_reservada.tipo}')
+        with _renovando(tarefa_reservada.pk):
+            funcao(**tarefa_reservada.parametros)
+    except Exception:
+        logger.exception('Falha na tarefa %s', tarefa_reservada)
+        tarefa_reservada.erro = traceback.format_exc()
+        if tarefa_reservada.tentativas < tarefa_reservada.max_tentativas:
+            tarefa_reservada.status = 'pendente'
+            tarefa_reservada.executar_apos = timezone.now() + timedelta(
+                seconds=30 * 2 ** tarefa_reservada.tentativas
+            )
+        else:
+            tarefa_reservada.status = 'erro'
+        tarefa_reservada.save(update_fields=['status', 'erro', 'executar_apos'])
+        return False
+
+    tarefa_reservada.status = 'concluida'
+    tarefa_reservada.concluida_em = timezone.now()
+    tarefa_reservada.save(update_fields=['status', 'concluida_em'])
+    return True
+
+
+@contextmanager
+def _renovando(pk):
+    """Renova o prazo da tarefa numa thread enquanto o bloco executa"""
+    parar = threading.Event()
+
+    def renovar():
+        try:
+            while not parar.wait(INTERVALO_RENOVACAO.total_seconds()):
+                try:
+                    Tarefa.objects.filter(pk=pk, status='processando').update(renovada_em=timezone.now())
+                except DatabaseError:
+                    # Banco ocupado (SQLite travado pela própria tarefa): tenta no próximo intervalo
+                    logger.warning('Não foi possível renovar a tarefa #%s', pk, exc_info=True)
+        finally:
+            connections.close_all()
+
+    renovacao = threading.Thread(target=renovar, name=f'renovacao-tarefa-{pk}', daemon=True)
+    renovacao.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        renovacao.join()
+
+
+def recuperar_travadas():
+    """
+    Tarefas abandonadas por um worker interrompido (sem renovação há mais de
+    PRAZO_RENOVACAO) voltam para a fila; as que já usaram todas as tentativas
+    ficam com erro, sem rodar de novo. Retorna (devolvidas, com_erro).
+    """
+    limite = timezone.now() - PRAZO_RENOVACAO
+    abandonadas = Tarefa.objects.filter(status='processando').filter(
+        Q(renovada_em__lt=limite) | Q(renovada_em__isnull=True, iniciada_em__lt=limite)
+    )
+    com_erro = abandonadas.filter(tentativas__gte=F('max_tentativas')).update(
+        status='erro', erro='Worker interrompido durante a execução; sem tentativas restantes.',
+    )
+    return abandonadas.update(status='pendente'), com_erro
@@ -1,42 +1,25 @@
 # pacientes/forms.py
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date
 import re
-from .models import Paciente, Documento, Foto
+from .models import Paciente, PacienteArquivado, Documento, Foto, Importacao
+from .normalizacao import somente_digitos
+from .cpf import ERRO_CADASTRADO, digitos_conferem, validar_cpfs
 
 
 def validar_cpf(cpf):
     """Valida CPF usando algoritmo oficial"""
     # Remove caracteres não numéricos
-    cpf = re.sub(r'[^0-9]', '', cpf)
+    cpf = somente_digitos(cpf)
     
     # Verifica se tem 11 dígitos
     if len(cpf) != 11:
         return False
     
-    # Verifica se todos os dígitos são iguais (ex: 111.111.111-11)
-    if cpf == cpf[0] * 11:
-        return False
-    
-    # Valida primeiro dígito verificador
-    soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-    resto = soma % 11
-    digito1 = 0 if resto < 2 else 11 - resto
-    
-    if int(cpf[9]) != digito1:
-        return False
-    
-    # Valida segundo dígito verificador
-    soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-    resto = soma % 11
-    digito2 = 0 if resto < 2 else 11 - resto
-    
-    if int(cpf[10]) != digito2:
-        return False
-    
-    return True
+    return digitos_conferem(cpf)
 
 
 class PacienteForm(forms.ModelForm):
@@ -125,6 +108,25 @@ class PacienteForm(forms.ModelForm):
             'ativo': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
     
+    def __init__(self, *args, verificar_cpf_duplicado=True, medico=None, **kwargs):
+        # A importação em massa desliga a checagem por linha e verifica os CPFs por lote
+        self.verificar_cpf_duplicado = verificar_cpf_duplicado
+        # Com o médico, um CPF de paciente que ele excluiu ou que foi arquivado vira
+        # a oferta de reativar/restaurar (paciente_inativo/paciente_arquivado) em vez de um cadastro novo
+        self.medico = medico
+        self.paciente_inativo = None
+        self.paciente_arquivado = None
+        super().__init__(*args, **kwargs)
+    
+    def validate_unique(self):
+        """O CPF já foi conferido em clean_cpf (ou por lote na importação): pula a consulta unique repetida"""
+        exclude = self._get_validation_exclusions()
+        exclude.add('cpf')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+    
     def clean_nome_completo(self):
         """Valida que o nome contenha apenas letras e espaços"""
         nome = self.cleaned_data.get('nome_completo', '')
@@ -146,38 +148,40 @@ class PacienteForm(forms.ModelForm):
         """Valida CPF"""
         cpf = self.cleaned_data.get('cpf', '')
         
-        # Remove caracteres não numéricos
-        cpf_numeros = re.sub(r'[^0-9]', '', cpf)
-        
-        # Verifica quantidade de caracteres
-        if len(cpf_numeros) != 11:
-            raise ValidationError('O CPF deve conter exatamente 11 dígitos.')
-        
-        # Valida CPF usando algoritmo oficial
-        if not validar_cpf(cpf_numeros):
-            raise ValidationError('CPF inválido. Por favor, verifique os números digitados.')
+        # Dígitos verificadores e, se pedido, CPF já cadastrado (exceto o próprio paciente na edição)
+        resultado, = validar_cpfs(
+            [cpf],
+            verificar_existentes=self.verificar_cpf_duplicado,
+            excluir_pk=self.instance.pk,
+        )
         
-        # Formata CPF: 000.000.000-00
-        cpf_formatado = f'{cpf_numeros[:3]}.{cpf_numeros[3:6]}.{cpf_numeros[6:9]}-{cpf_numeros[9:]}'
+        if resultado.erro == ERRO_CADASTRADO and self.instance.pk:
+            raise ValidationError('Este CPF já está cadastrado para outro paciente.')
+        if resultado.erro == ERRO_CADASTRADO and self.medico:
+            self.paciente_inativo = Paciente.objects.filter(
+                cpf=resultado.formatado, medico=self.medico, ativo=False
+            ).only('id', 'nome_completo').first()
+            if self.paciente_inativo:
+                raise ValidationError('Este CPF é de um paciente que você excluiu. Reative o cadastro dele.')
+        if resultado.erro:
+            raise ValidationError(resultado.erro)
         
-        # Verifica se CPF já existe (exceto para edição)
-        if self.instance.pk:
-            # Está editando
-            if Paciente.objects.filter(cpf=cpf_formatado).exclude(pk=self.instance.pk).exists():
-                raise ValidationError('Este CPF já está cadastrado para outro paciente.')
-        else:
-            # Está criando novo
-            if Paciente.objects.filter(cpf=cpf_formatado).exists():
-                raise ValidationError('Este CPF já está cadastrado.')
+        if self.medico and self.verificar_cpf_duplicado and not self.instance.pk:
+            self.paciente_arquivado = PacienteArquivado.objects.filter(
+                cpf=resultado.formatado, medico=self.medico
+            ).only('id', 'nome_completo').first()
+            if self.paciente_arquivado:
+                raise ValidationError('Este CPF é de um paciente arquivado. Restaure o cadastro dele.')
         
-        return cpf_formatado
+        # Formatado: 000.000.000-00
+        return resultado.formatado
     
     def clean_telefone(self):
         """Valida telefone com DDD (11 dígitos)"""
         telefone = self.cleaned_data.get('telefone', '')
         
         # Remove caracteres não numéricos
-        telefone_numeros = re.sub(r'[^0-9]', '', telefone)
+        telefone_numeros = somente_digitos(telefone)
         
         # Verifica se tem exatamente 11 dígitos
         if len(telefone_numeros) != 11:
@@ -202,7 +206,7 @@ class PacienteForm(forms.ModelForm):
         cep = self.cleaned_data.get('cep', '')
         
         # Remove caracteres não numéricos
-        cep_numeros = re.sub(r'[^0-9]', '', cep)
+        cep_numeros = somente_digitos(cep)
         
         # Verifica se tem exatamente 8 dígitos
         if len(cep_numeros) != 8:
@@ -262,9 +266,11 @@ class DocumentoForm(forms.ModelForm):
             if not arquivo.name.lower().endswith('.pdf'):
                 raise ValidationError('Apenas arquivos PDF são permitidos.')
             
-            # Verifica tamanho (máximo 10MB)
-            if arquivo.size > 10 * 1024 * 1024:
-                raise ValidationError('O arquivo não pode ser maior que 10MB.')
+            # Verifica tamanho (limite em settings.TAMANHO_MAXIMO_DOCUMENTO)
+            if arquivo.size > settings.TAMANHO_MAXIMO_DOCUMENTO:
+                raise ValidationError(
+                    f'O arquivo não pode ser maior que {settings.TAMANHO_MAXIMO_DOCUMENTO // (1024 * 1024)}MB.'
+                )
         
         return arquivo
 
@@ -291,8 +297,30 @@ class FotoForm(forms.ModelForm):
             if not any(imagem.name.lower().endswith(ext) for ext in extensoes_validas):
                 raise ValidationError('Apenas arquivos de imagem são permitidos (JPG, PNG, GIF).')
             
-            # Verifica tamanho (máximo 5MB)
-            if imagem.size > 5 * 1024 * 1024:
-                raise ValidationError('A imagem não pode ser maior que 5MB.')
+            # Verifica tamanho (limite em settings.TAMANHO_MAXIMO_FOTO)
+            if imagem.size > settings.TAMANHO_MAXIMO_FOTO:
+                raise ValidationError(
+                    f'A imagem não pode ser maior que {settings.TAMANHO_MAXIMO_FOTO // (1024 * 1024)}MB.'
+                )
         
-        return imagem
\ No newline at end of file
+        return imagem
+
+
+class ImportacaoForm(forms.ModelForm):
+    """Formulário para envio de planilha de pacientes"""
+    
+    class Meta:
+        model = Importacao
+        fields = ['arquivo']
+        widgets = {
+            'arquivo': forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+        }
+    
+    def clean_arquivo(self):
+        """Valida que o arquivo é CSV ou XLSX"""
+        arquivo = self.cleaned_data.get('arquivo')
+        
+        if arquivo and not arquivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError('Envie uma planilha CSV ou XLSX.')
+        
+        return arquivo
@@ -0,0 +1,119 @@
+# pacientes/imagens.py
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+logger = logging.getLogger(__name__)
+
+# Larguras geradas para o srcset (a galeria mostra as fotos em caixas de ~120px)
+LARGURAS_MINIATURA = (240, 480, 960)
+
+ORIENTACAO_EXIF = 0x0112
+
+# Extensão do arquivo -> (formato do Pillow, opções de gravação)
+FORMATOS_MINIATURA = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def nome_variante(nome_imagem, largura, extensao):
+    """Nome determinístico da variante (ex: miniaturas/fotos/2025/01/02/exame_480w.webp)"""
+    base, _ = os.path.splitext(nome_imagem)
+    return f'miniaturas/{base}_{largura}w.{extensao}'
+
+
+def remover_variantes(nome_imagem):
+    """Apaga as miniaturas de uma imagem que não existe mais"""
+    for largura in LARGURAS_MINIATURA:
+        for extensao in FORMATOS_MINIATURA:
+            default_storage.delete(nome_variante(nome_imagem, largura, extensao))
+
+
+def gerar_variantes(nome_imagem, arquivo):
+    """
+    Gera as miniaturas WebP/JPEG de uma imagem.
+
+    Variantes que já existem em disco são reaproveitadas, então rodar de novo é barato.
+    Retorna False se o arquivo não for uma imagem que o Pillow consiga abrir.
+    """
+    faltando = [
+        (largura, extensao)
+        for largura in LARGURAS_MINIATURA
+        for extensao in FORMATOS_MINIATURA
+        if not default_storage.exists(nome_variante(nome_imagem, largura, extensao))
+    ]
+    if not faltando:
+        return True
+
+    try:
+        with Image.open(arquivo) as imagem:
+            # Aplica a rotação do EXIF antes de descartar os metadados
+            imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+    except (UnidentifiedImageError, OSError) as erro:
+        logger.warning('Não foi possível gerar miniaturas de %s: %s', nome_imagem, erro)
+        return False
+
+    for largura, extensao in faltando:
+        variante = imagem.copy()
+        # thumbnail() nunca amplia: imagens menores ficam no tamanho original
+        variante.thumbnail((largura, largura * 4), Image.LANCZOS)
+
+        formato, opcoes = FORMATOS_MINIATURA[extensao]
+        buffer = BytesIO()
+        variante.save(buffer, formato, **opcoes)
+        default_storage.save(nome_variante(nome_imagem, largura, extensao), ContentFile(buffer.getvalue()))
+
+    return True
+
+
+def gerar_miniaturas(foto):
+    """Gera as variantes da foto e marca miniaturas_geradas"""
+    with foto.imagem.open('rb') as arquivo:
+        geradas = gerar_variantes(foto.imagem.name, arquivo)
+
+    if geradas and not foto.miniaturas_geradas:
+        foto.miniaturas_geradas = True
+        foto.save(update_fields=['miniaturas_geradas', 'ultima_atualizacao'])
+    return geradas
+
+
+def remover_metadados(foto):
+    """
+    Regrava a foto sem EXIF (GPS, aparelho, data), aplicando antes a rotação indicada.
+
+    GIFs não têm EXIF e ficam como estão. Retorna True se o arquivo foi substituído.
+    """
+    with foto.imagem.open('rb') as arquivo:
+        with Image.open(arquivo) as imagem:
+            formato = imagem.format
+            if formato not in ('JPEG', 'PNG', 'WEBP') or not (imagem.getexif() or imagem.info.get('exif')):
+                return False
+
+            # O Pillow só grava EXIF quando recebe exif=..., então basta regravar
+            opcoes = {}
+            if imagem.getexif().get(ORIENTACAO_EXIF, 1) != 1:
+                imagem = ImageOps.exif_transpose(imagem)
+                if formato == 'JPEG':
+                    opcoes = {'quality': 92}
+            elif formato == 'JPEG':
+                # Sem rotação dá para manter as tabelas de quantização originais (sem perda extra)
+                opcoes = {'quality': 'keep'}
+            buffer = BytesIO()
+            imagem.save(buffer, formato, **opcoes)
+
+    # Grava a versão nova antes de liberar a antiga (com deduplicação o nome muda com o conteúdo).
+    # Na mesma transação do save(): se ele falhar, a referência ao blob novo é desfeita
+    anterior, storage = foto.imagem.name, foto.imagem.storage
+    with transaction.atomic():
+        # Atribuir o nome (e não alterar imagem.name) descarta o arquivo antigo já aberto no FieldFile
+        foto.imagem = storage.save(anterior, ContentFile(buffer.getvalue()))
+        foto.save(update_fields=['imagem', 'ultima_atualizacao'])
+    storage.delete(anterior)
+    return True
@@ -0,0 +1,180 @@
+# pacientes/importacao.py
+"""
+Importação de pacientes em massa a partir de CSV/XLSX.
+
+A planilha é lida linha a linha (geradores) e gravada em lotes com bulk_create,
+então o uso de memória não depende do tamanho do arquivo. Cada linha passa pelas
+mesmas validações do PacienteForm; a checagem de CPF duplicado é feita por lote
+(uma consulta por lote) em vez de uma por linha.
+"""
+import codecs
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from django.db import IntegrityError, transaction
+
+from .cpf import ERRO_CADASTRADO, validar_cpfs
+from .diretorio import invalidar_diretorio
+from .forms import PacienteForm
+from .models import Paciente, EstatisticasMedico
+from .normalizacao import normalizar_texto
+
+
+TAMANHO_LOTE = 500
+
+# Valores aceitos como "não" na coluna ativo (vazio ou ausente = ativo)
+VALORES_INATIVO = {'0', 'n', 'nao', 'false', 'inativo'}
+
+CABECALHO_RELATORIO = ['linha', 'campo', 'erro']
+
+
+@dataclass
+class ResultadoImportacao:
+    total: int = 0
+    importados: int = 0
+    com_erro: int = 0
+
+
+def _normalizar_cabecalho(nome):
+    """'Nome Completo' -> 'nome_completo', 'Data de Nascimento' -> 'data_de_nascimento'"""
+    return normalizar_texto(str(nome or '')).replace(' ', '_')
+
+
+def _valor_celula(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor).strip()
+
+
+def ler_csv(arquivo):
+    """Gera um dict por linha de um CSV (UTF-8, separador ',' ou ';')"""
+    texto = codecs.iterdecode(arquivo, 'utf-8-sig')
+    primeira = next(texto, '')
+    separador = ';' if primeira.count(';') > primeira.count(',') else ','
+
+    def linhas():
+        yield primeira
+        yield from texto
+
+    leitor = csv.reader(linhas(), delimiter=separador)
+    cabecalho = [_normalizar_cabecalho(nome) for nome in next(leitor, [])]
+    for valores in leitor:
+        if any(valores):
+            yield dict(zip(cabecalho, (valor.strip() for valor in valores)))
+
+
+def ler_xlsx(arquivo):
+    """Gera um dict por linha da primeira aba de um XLSX (modo read_only, em streaming)"""
+    # Import tardio: openpyxl só é necessário para planilhas do Excel
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [_normalizar_cabecalho(nome) for nome in next(linhas, [])]
+        for valores in linhas:
+            if any(valor not in (None, '') for valor in valores):
+                yield dict(zip(cabecalho, (_valor_celula(valor) for valor in valores)))
+    finally:
+        planilha.close()
+
+
+def ler_planilha(arquivo, nome):
+    """Escolhe o leitor pela extensão do arquivo"""
+    if nome.lower().endswith('.xlsx'):
+        return ler_xlsx(arquivo)
+    return ler_csv(arquivo)
+
+
+def _dados_formulario(linha):
+    dados = dict(linha)
+    # Aceita tanto "data_nascimento" quanto o rótulo "Data de Nascimento"
+    if 'data_de_nascimento' in dados:
+        dados.setdefault('data_nascimento', dados.pop('data_de_nascimento'))
+    dados['ativo'] = normalizar_texto(dados.get('ativo', '')) not in VALORES_INATIVO
+    return dados
+
+
+def importar_pacientes(medico, linhas, relatorio=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Valida e grava as linhas para o médico.
+
+    `relatorio` é um csv.writer (ou similar) que recebe uma linha por erro.
+    Retorna um ResultadoImportacao com os totais.
+    """
+    resultado = ResultadoImportacao()
+    lote = []
+
+    def registrar_erro(numero, campo, mensagem):
+        if relatorio is not None:
+            relatorio.writerow([numero, campo, mensagem])
+
+    def gravar_lote():
+        gravados = _gravar_lote(lote, registrar_erro)
+        resultado.importados += gravados
+        resultado.com_erro += len(lote) - gravados
+        lote.clear()
+
+    # A linha 1 é o cabeçalho
+    for numero, linha in enumerate(linhas, start=2):
+        resultado.total += 1
+        form = PacienteForm(data=_dados_formulario(linha), verificar_cpf_duplicado=False)
+
+        if not form.is_valid():
+            resultado.com_erro += 1
+            for campo, erros in form.errors.items():
+                for erro in erros:
+                    registrar_erro(numero, campo, erro)
+            continue
+
+        paciente = form.save(commit=False)
+        paciente.medico = medico
+        paciente.normalizar_campos_busca()
+        lote.append((numero, paciente))
+
+        if len(lote) >= tamanho_lote:
+            gravar_lote()
+
+    if lote:
+        gravar_lote()
+
+    # bulk_create não dispara signals: recalcula os contadores do dashboard
+    if resultado.importados:
+        EstatisticasMedico.recalcular(medico.pk)
+        transaction.on_commit(lambda: invalidar_diretorio(medico.pk))
+
+    return resultado
+
+
+def _gravar_lote(lote, registrar_erro):
+    """Descarta CPFs duplicados (no lote ou já cadastrados) e grava o resto; retorna quantos gravou"""
+    # Uma chamada por lote: repetidos no lote e já cadastrados (consultas IN por blocos)
+    resultados = validar_cpfs(paciente.cpf for _, paciente in lote)
+
+    novos = []
+    for (numero, paciente), resultado in zip(lote, resultados):
+        if resultado.erro:
+            registrar_erro(numero, 'cpf', f'CPF {paciente.cpf}: {resultado.erro}')
+        else:
+            novos.append((numero, paciente))
+
+    try:
+        with transaction.atomic():
+            Paciente.objects.bulk_create([paciente for _, paciente in novos])
+        return len(novos)
+    except IntegrityError:
+        # Outro cadastro usou um dos CPFs entre a checagem e o insert: grava um a um
+        gravados = 0
+        for numero, paciente in novos:
+            try:
+                with transaction.atomic():
+                    Paciente.objects.bulk_create([paciente])
+                gravados += 1
+            except IntegrityError:
+                registrar_erro(numero, 'cpf', f'CPF {paciente.cpf}: {ERRO_CADASTRADO}')
+        return gravados
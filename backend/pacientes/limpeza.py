@@ -0,0 +1,106 @@
+# pacientes/limpeza.py
+"""
+Coleta de arquivos órfãos em MEDIA_ROOT (ver o comando limpar_midia_orfa).
+
+A árvore é percorrida em ordem (nome a nome, em profundidade), então o ponto
+onde a varredura parou é só o caminho do último arquivo visto: dá para retomar
+sem reler o que já foi conferido. Os arquivos são comparados com o banco em
+lotes, com consultas IN (uma por tabela/coluna) em vez de uma por arquivo.
+"""
+import json
+import os
+import re
+
+from .armazenamento import PASTA_BLOBS, hash_blob
+from .models import ArquivoBlob, Documento, Foto, Importacao
+
+
+ARQUIVO_ESTADO = '.limpar_midia_orfa.json'
+
+MINIATURA = re.compile(r'^miniaturas/(.+)_\d+w\.\w+$')
+
+# Extensões aceitas no upload de fotos (miniaturas não guardam a extensão do original)
+EXTENSOES_FOTO = ('.jpg', '.jpeg', '.png', '.gif')
+
+
+def percorrer(raiz, depois_de=None, partes=()):
+    """
+    Gera (partes do caminho, os.DirEntry) de cada arquivo, em ordem.
+
+    `depois_de` são as partes do último arquivo já conferido: pastas inteiras
+    anteriores a ele nem são abertas.
+    """
+    with os.scandir(os.path.join(raiz, *partes)) as entradas:
+        entradas = sorted(entradas, key=lambda entrada: entrada.name)
+
+    for entrada in entradas:
+        atual = partes + (entrada.name,)
+        if entrada.is_dir(follow_symlinks=False):
+            if depois_de is None or atual > depois_de[:len(atual)]:
+                yield from percorrer(raiz, None, atual)
+            elif atual == depois_de[:len(atual)]:
+                yield from percorrer(raiz, depois_de, atual)
+        elif entrada.is_file(follow_symlinks=False):
+            if depois_de is None or atual > depois_de:
+                yield atual, entrada
+
+
+def carregar_estado(raiz):
+    try:
+        with open(os.path.join(raiz, ARQUIVO_ESTADO)) as arquivo:
+            return tuple(json.load(arquivo)['ultimo'])
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def salvar_estado(raiz, partes):
+    caminho = os.path.join(raiz, ARQUIVO_ESTADO)
+    with open(caminho + '.tmp', 'w') as arquivo:
+        json.dump({'ultimo': list(partes)}, arquivo)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def apagar_estado(raiz):
+    try:
+        os.remove(os.path.join(raiz, ARQUIVO_ESTADO))
+    except FileNotFoundError:
+        pass
+
+
+def _existentes(queryset, campo, valores):
+    if not valores:
+        return set()
+    return set(queryset.filter(**{f'{campo}__in': list(valores)}).values_list(campo, flat=True))
+
+
+def nomes_referenciados(nomes):
+    """Dos nomes (relativos a MEDIA_ROOT) recebidos, retorna os que ainda são usados por algum registro"""
+    hashes = {}       # sha256 -> nomes (blobs e miniaturas de blobs)
+    fotos = {}        # nome da foto antiga -> miniaturas
+    diretos = set()   # documentos, fotos e planilhas com nome antigo
+
+    for nome in nomes:
+        if nome.startswith(f'{PASTA_BLOBS}/tmp/'):
+            continue  # cópia temporária de upload interrompido
+        miniatura = MINIATURA.match(nome)
+        base = miniatura.group(1) if miniatura else None
+        sha256 = hash_blob(base if miniatura else nome)
+        if sha256:
+            hashes.setdefault(sha256, []).append(nome)
+        elif miniatura:
+            for extensao in EXTENSOES_FOTO:
+                fotos.setdefault(base + extensao, []).append(nome)
+                fotos.setdefault(base + extensao.upper(), []).append(nome)
+        else:
+            diretos.add(nome)
+
+    referenciados = set()
+    for sha256 in _existentes(ArquivoBlob.objects, 'hash', hashes):
+        referenciados.update(hashes[sha256])
+    for original in _existentes(Foto.objects, 'imagem', fotos):
+        referenciados.update(fotos[original])
+    referenciados |= _existentes(Documento.objects, 'arquivo', diretos)
+    referenciados |= _existentes(Foto.objects, 'imagem', diretos)
+    referenciados |= _existentes(Importacao.objects, 'arquivo', diretos)
+    referenciados |= _existentes(Importacao.objects, 'relatorio', diretos)
+    return referenciados
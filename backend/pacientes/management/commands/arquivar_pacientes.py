@@ -0,0 +1,28 @@
+# pacientes/management/commands/arquivar_pacientes.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pacientes.arquivamento import arquivar_inativos, candidatos
+
+
+class Command(BaseCommand):
+    help = (
+        'Move os pacientes inativos há muito tempo (com documentos e fotos) para as tabelas de arquivo '
+        'e os arquivos deles para MIDIA_FRIA_ROOT'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.ARQUIVAMENTO_DIAS_INATIVO,
+                            help='Arquiva os inativos sem alterações há mais de N dias '
+                                 '(padrão: ARQUIVAMENTO_DIAS_INATIVO)')
+        parser.add_argument('--limite', type=int, default=0, help='Arquiva no máximo N pacientes nesta execução')
+        parser.add_argument('--simular', action='store_true', help='Só conta os candidatos, sem arquivar')
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            total = candidatos(options['dias']).count()
+            self.stdout.write(f'{total} paciente(s) seriam arquivado(s).')
+            return
+
+        arquivados = arquivar_inativos(options['dias'], options['limite'])
+        self.stdout.write(self.style.SUCCESS(f'{arquivados} paciente(s) arquivado(s).'))
@@ -0,0 +1,42 @@
+# pacientes/management/commands/exportar_pacientes.py
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pacientes.exportacao import FORMATOS_EXPORTACAO, gerar_exportacao, gerar_zip
+
+
+class Command(BaseCommand):
+    help = 'Exporta os pacientes de um médico em CSV, JSONL ou XLSX (opcionalmente em ZIP com documentos e fotos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medico', required=True, help='Usuário (username) dono dos pacientes')
+        parser.add_argument('--formato', choices=sorted(FORMATOS_EXPORTACAO), default='csv')
+        parser.add_argument('--arquivos', action='store_true',
+                            help='Gera um ZIP com a exportação e os documentos/fotos dos pacientes')
+        parser.add_argument('--saida', help='Arquivo de destino (padrão: saída padrão)')
+
+    def handle(self, *args, **options):
+        try:
+            medico = User.objects.get(username=options['medico'])
+        except User.DoesNotExist:
+            raise CommandError(f'Médico "{options["medico"]}" não encontrado.')
+
+        if options['arquivos']:
+            conteudo = gerar_zip(medico, options['formato'])
+        else:
+            conteudo = gerar_exportacao(medico, options['formato'])
+
+        saida = open(options['saida'], 'wb') if options['saida'] else sys.stdout.buffer
+        try:
+            total = 0
+            for pedaco in conteudo:
+                saida.write(pedaco)
+                total += len(pedaco)
+        finally:
+            if saida is not sys.stdout.buffer:
+                saida.close()
+
+        if options['saida']:
+            self.stdout.write(self.style.SUCCESS(f'Exportação gravada em {options["saida"]} ({total} bytes).'))
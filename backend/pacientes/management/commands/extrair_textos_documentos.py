@@ -0,0 +1,39 @@
+# pacientes/management/commands/extrair_textos_documentos.py
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from pacientes.extracao import extrair_texto
+from pacientes.models import Documento
+from pacientes.tarefas import calcular_checksum
+
+
+class Command(BaseCommand):
+    help = 'Extrai o texto dos PDFs enviados antes da busca por conteúdo (só os que mudaram desde a última extração)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help='Extrai de novo também os documentos já atualizados (ex.: depois de trocar a versão do pypdf)',
+        )
+
+    def handle(self, *args, **options):
+        if options['todos']:
+            # Sem isto, extrair_texto reaproveitaria o texto antigo de outro documento igual
+            Documento.objects.update(texto_checksum='')
+        documentos = Documento.objects.filter(Q(checksum='') | ~Q(texto_checksum=F('checksum')))
+
+        extraidos = falhas = 0
+        campos = ('pk', 'arquivo', 'titulo', 'descricao', 'checksum', 'texto_checksum')
+        for documento in documentos.only(*campos).iterator(chunk_size=500):
+            try:
+                if not documento.checksum:
+                    documento.checksum = calcular_checksum(documento.arquivo)
+                    Documento.objects.filter(pk=documento.pk).update(checksum=documento.checksum)
+                extrair_texto(documento)
+            except FileNotFoundError:
+                falhas += 1
+                self.stderr.write(f'Documento {documento.pk}: arquivo ausente')
+                continue
+            extraidos += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{extraidos} documento(s) processado(s), {falhas} falha(s).'))
@@ -0,0 +1,71 @@
+# pacientes/management/commands/gerar_dados_sinteticos.py
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pacientes.diretorio import invalidar_diretorio
+from pacientes.models import EstatisticasMedico
+from pacientes.sinteticos import GeradorPacientes, liberar_modelos, preparar_documentos, preparar_fotos
+
+
+class Command(BaseCommand):
+    help = 'Gera pacientes (CPFs válidos), documentos e fotos sintéticos em massa, para testes de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pacientes', type=int, default=10000, help='Total de pacientes (padrão: 10000)')
+        parser.add_argument('--medicos', type=int, default=1,
+                            help='Médicos entre os quais os pacientes são divididos (padrão: 1)')
+        parser.add_argument('--prefixo', default='medico_sintetico',
+                            help='Usuários criados como <prefixo>1, <prefixo>2... (padrão: medico_sintetico)')
+        parser.add_argument('--senha', default='sintetico', help='Senha dos médicos criados (padrão: sintetico)')
+        parser.add_argument('--documentos', type=float, default=2,
+                            help='Média de documentos por paciente (padrão: 2)')
+        parser.add_argument('--fotos', type=float, default=1, help='Média de fotos por paciente (padrão: 1)')
+        parser.add_argument('--lote', type=int, default=5000, help='Pacientes por bulk_create (padrão: 5000)')
+        parser.add_argument('--semente', type=int, help='Semente aleatória (mesma semente, mesmos dados)')
+
+    def handle(self, *args, **options):
+        if options['pacientes'] < 1 or options['medicos'] < 1 or options['lote'] < 1:
+            raise CommandError('--pacientes, --medicos e --lote devem ser maiores que zero.')
+
+        senha = make_password(options['senha'])
+        medicos = []
+        for numero in range(1, options['medicos'] + 1):
+            medico, _ = User.objects.get_or_create(
+                username=f'{options["prefixo"]}{numero}', defaults={'password': senha},
+            )
+            medicos.append(medico)
+
+        documentos = preparar_documentos() if options['documentos'] else []
+        fotos = preparar_fotos() if options['fotos'] else []
+        gerador = GeradorPacientes(options['semente'])
+
+        inicio = time.monotonic()
+        pacientes = total_documentos = total_fotos = 0
+        try:
+            while pacientes < options['pacientes']:
+                gravados, novos_documentos, novas_fotos = gerador.gravar_lote(
+                    medicos, min(options['lote'], options['pacientes'] - pacientes),
+                    documentos, fotos, options['documentos'], options['fotos'],
+                )
+                pacientes += gravados
+                total_documentos += novos_documentos
+                total_fotos += novas_fotos
+                decorrido = time.monotonic() - inicio
+                self.stdout.write(
+                    f'{pacientes}/{options["pacientes"]} pacientes ({pacientes / decorrido:.0f}/s), '
+                    f'{total_documentos} documentos, {total_fotos} fotos'
+                )
+        finally:
+            liberar_modelos(documentos + fotos)
+            # bulk_create não dispara signals: recalcula os contadores do dashboard
+            for medico in medicos:
+                EstatisticasMedico.recalcular(medico.pk)
+                invalidar_diretorio(medico.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{pacientes} paciente(s), {total_documentos} documento(s) e {total_fotos} foto(s) gerados '
+            f'em {time.monotonic() - inicio:.1f}s para {", ".join(medico.username for medico in medicos)}.'
+        ))
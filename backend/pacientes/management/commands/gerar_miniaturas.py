@@ -0,0 +1,32 @@
+# pacientes/management/commands/gerar_miniaturas.py
+from django.core.management.base import BaseCommand
+
+from pacientes.imagens import gerar_miniaturas
+from pacientes.models import Foto
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas (srcset) das fotos enviadas antes do pipeline de imagens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Reprocessa também as fotos já marcadas (variantes existentes são reaproveitadas)',
+        )
+
+    def handle(self, *args, **options):
+        fotos = Foto.objects.all() if options['todas'] else Foto.objects.filter(miniaturas_geradas=False)
+        geradas = falhas = 0
+
+        for foto in fotos.only('pk', 'imagem', 'miniaturas_geradas').iterator(chunk_size=500):
+            try:
+                ok = gerar_miniaturas(foto)
+            except FileNotFoundError:
+                ok = False
+            if ok:
+                geradas += 1
+            else:
+                falhas += 1
+                self.stderr.write(f'Foto {foto.pk}: arquivo ausente ou não é uma imagem válida')
+
+        self.stdout.write(self.style.SUCCESS(f'{geradas} foto(s) processada(s), {falhas} falha(s).'))
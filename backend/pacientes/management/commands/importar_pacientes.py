@@ -0,0 +1,42 @@
+# pacientes/management/commands/importar_pacientes.py
+import csv
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pacientes.importacao import CABECALHO_RELATORIO, TAMANHO_LOTE, importar_pacientes, ler_planilha
+
+
+class Command(BaseCommand):
+    help = 'Importa pacientes de uma planilha CSV/XLSX (colunas com os nomes dos campos do cadastro)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo .csv ou .xlsx')
+        parser.add_argument('--medico', required=True, help='Usuário (username) dono dos pacientes')
+        parser.add_argument('--relatorio', help='Grava os erros neste CSV (padrão: saída de erro)')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                            help=f'Pacientes por bulk_create (padrão: {TAMANHO_LOTE})')
+
+    def handle(self, *args, **options):
+        try:
+            medico = User.objects.get(username=options['medico'])
+        except User.DoesNotExist:
+            raise CommandError(f'Médico "{options["medico"]}" não encontrado.')
+
+        saida = open(options['relatorio'], 'w', newline='', encoding='utf-8') if options['relatorio'] else sys.stderr
+        try:
+            relatorio = csv.writer(saida)
+            relatorio.writerow(CABECALHO_RELATORIO)
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importar_pacientes(
+                    medico, ler_planilha(arquivo, options['arquivo']), relatorio, options['lote']
+                )
+        finally:
+            if saida is not sys.stderr:
+                saida.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.importados} de {resultado.total} paciente(s) importado(s), '
+            f'{resultado.com_erro} linha(s) com erro.'
+        ))
@@ -0,0 +1,112 @@
+# pacientes/management/commands/limpar_midia_orfa.py
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pacientes.limpeza import (
+    ARQUIVO_ESTADO, apagar_estado, carregar_estado, nomes_referenciados, percorrer, salvar_estado,
+)
+from pacientes.models import ArquivoBlob
+from pacientes.uploads import remover_expirados
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove de MEDIA_ROOT os arquivos que nenhum documento, foto ou importação usa mais '
+        '(e os uploads em partes abandonados)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='Só lista os órfãos, sem apagar')
+        parser.add_argument('--idade-minima', type=int, default=60,
+                            help='Ignora arquivos modificados há menos de N minutos (uploads em andamento; padrão: 60)')
+        parser.add_argument('--limite', type=int, default=0,
+                            help='Confere no máximo N arquivos nesta execução; a próxima continua de onde parou')
+        parser.add_argument('--lote', type=int, default=500, help='Arquivos por consulta ao banco (padrão: 500)')
+        parser.add_argument('--reiniciar', action='store_true', help='Recomeça a varredura do início')
+        parser.add_argument('--recontar', action='store_true',
+                            help='Antes de varrer, recalcula as referências dos blobs a partir dos registros')
+
+    def handle(self, *args, **options):
+        expirados = remover_expirados()
+        if expirados:
+            self.stdout.write(f'{expirados} upload(s) em partes abandonado(s) removido(s).')
+
+        raiz = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(raiz):
+            self.stdout.write('MEDIA_ROOT não existe: nada a fazer.')
+            return
+
+        if options['recontar']:
+            removidos = ArquivoBlob.recontar()
+            self.stdout.write(f'{removidos} blob(s) sem uso descartado(s) na recontagem.')
+
+        depois_de = None if options['reiniciar'] else carregar_estado(raiz)
+        if depois_de:
+            self.stdout.write(f'Retomando após {"/".join(depois_de)}')
+
+        self.limite_mtime = time.time() - options['idade_minima'] * 60
+        self.simular = options['simular']
+        self.verbosity = options['verbosity']
+        self.conferidos = self.removidos = self.bytes_liberados = 0
+
+        lote = []
+        ultimo = None
+        interrompido = False
+        for partes, entrada in percorrer(raiz, depois_de):
+            if partes[0].startswith(ARQUIVO_ESTADO):
+                continue
+            lote.append((partes, entrada))
+            ultimo = partes
+
+            if len(lote) >= options['lote']:
+                self.processar(lote)
+                lote = []
+                if not self.simular:
+                    salvar_estado(raiz, ultimo)
+
+            if options['limite'] and self.conferidos + len(lote) >= options['limite']:
+                interrompido = True
+                break
+
+        if lote:
+            self.processar(lote)
+
+        if not self.simular:
+            if interrompido:
+                salvar_estado(raiz, ultimo)
+            else:
+                apagar_estado(raiz)
+
+        acao = 'seriam removido(s)' if self.simular else 'removido(s)'
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.conferidos} arquivo(s) conferido(s), {self.removidos} órfão(s) {acao} '
+            f'({self.bytes_liberados / 1024 / 1024:.1f} MB).'
+            + (' Varredura incompleta: rode de novo para continuar.' if interrompido else '')
+        ))
+
+    def processar(self, lote):
+        nomes = {'/'.join(partes): entrada for partes, entrada in lote}
+        referenciados = nomes_referenciados(nomes)
+        self.conferidos += len(nomes)
+
+        for nome, entrada in nomes.items():
+            if nome in referenciados:
+                continue
+            try:
+                # stat de novo na hora de apagar: um upload reaproveitando o blob atualiza o mtime
+                estado = os.stat(entrada.path)
+                if estado.st_mtime > self.limite_mtime:
+                    continue
+                if not self.simular:
+                    os.remove(entrada.path)
+            except FileNotFoundError:
+                continue
+
+            self.removidos += 1
+            self.bytes_liberados += estado.st_size
+            if self.verbosity > 1 or self.simular:
+                self.stdout.write(nome)
+
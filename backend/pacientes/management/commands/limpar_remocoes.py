@@ -0,0 +1,17 @@
+# pacientes/management/commands/limpar_remocoes.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pacientes.sincronizacao import limpar_remocoes
+
+
+class Command(BaseCommand):
+    help = 'Apaga os registros de remoção (sincronização incremental) mais antigos que a retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.SINCRONIZACAO_RETENCAO_DIAS,
+                            help='Guarda as remoções dos últimos N dias (padrão: SINCRONIZACAO_RETENCAO_DIAS)')
+
+    def handle(self, *args, **options):
+        removidas = limpar_remocoes(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{removidas} registro(s) de remoção apagado(s).'))
@@ -0,0 +1,66 @@
+# pacientes/management/commands/medir_desempenho.py
+import json
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pacientes.desempenho import Benchmark, ambiente, comparar_resultados
+
+
+class Command(BaseCommand):
+    help = 'Mede p50/p99 e vazão das views principais e grava o resultado em JSON para comparar execuções'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medico', default='medico_sintetico1',
+                            help='Usuário cujos pacientes são usados (padrão: medico_sintetico1)')
+        parser.add_argument('--cenarios', nargs='+', choices=list(Benchmark.CENARIOS),
+                            default=list(Benchmark.CENARIOS), help='Cenários a executar (padrão: todos)')
+        parser.add_argument('--requisicoes', type=int, default=200, help='Requisições por cenário (padrão: 200)')
+        parser.add_argument('--aquecimento', type=int, default=10,
+                            help='Requisições descartadas antes de medir (padrão: 10)')
+        parser.add_argument('--semente', type=int, default=0, help='Semente da escolha de pacientes e termos')
+        parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: benchmarks/<data>.json)')
+        parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+
+    def handle(self, *args, **options):
+        if options['requisicoes'] < 1:
+            raise CommandError('--requisicoes deve ser maior que zero.')
+        try:
+            medico = User.objects.get(username=options['medico'])
+            benchmark = Benchmark(medico, options['semente'])
+        except User.DoesNotExist:
+            raise CommandError(f'Médico "{options["medico"]}" não encontrado (rode gerar_dados_sinteticos).')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if settings.DEBUG:
+            self.stderr.write('Aviso: DEBUG=True guarda cada consulta em memória e deixa as views mais lentas.')
+
+        resultado = ambiente(medico)
+        resultado['cenarios'] = benchmark.executar(options['cenarios'], options['requisicoes'], options['aquecimento'])
+
+        self.stdout.write(f'{"view":<28} {"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"req/s":>8} {"SQL":>6}')
+        for view, metricas in resultado['cenarios'].items():
+            self.stdout.write(
+                f'{view:<28} {metricas["p50_ms"]:>9.2f} {metricas["p90_ms"]:>9.2f} {metricas["p99_ms"]:>9.2f} '
+                f'{metricas["requisicoes_por_segundo"]:>8.1f} {metricas["consultas_por_requisicao"]:>6.1f}'
+                + (f'  ({metricas["falhas"]} falha(s))' if metricas['falhas'] else '')
+            )
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+            self.stdout.write(f'\nComparação com {options["comparar"]} ({anterior.get("commit") or "?"}):')
+            for view, chave, antes, depois, variacao in comparar_resultados(anterior['cenarios'], resultado['cenarios']):
+                self.stdout.write(f'{view:<28} {chave:<24} {antes:>9.2f} -> {depois:>9.2f} ({variacao:+.1f}%)')
+
+        saida = options['saida'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f'{timezone.localtime():%Y%m%d-%H%M%S}.json'
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Resultado gravado em {saida}'))
@@ -0,0 +1,52 @@
+# pacientes/management/commands/processar_tarefas.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from pacientes import tarefas  # noqa: F401 (registra as tarefas)
+from pacientes.fila import executar, recuperar_travadas, reservar_proxima
+
+
+class Command(BaseCommand):
+    help = 'Worker da fila de tarefas (miniaturas, EXIF, checksum...) guardada no banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e encerra')
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Segundos de espera quando a fila está vazia (padrão: 2)')
+
+    def handle(self, *args, **options):
+        self.encerrar = False
+        signal.signal(signal.SIGTERM, self.pedir_encerramento)
+        signal.signal(signal.SIGINT, self.pedir_encerramento)
+
+        devolvidas, com_erro = recuperar_travadas()
+        if devolvidas:
+            self.stdout.write(f'{devolvidas} tarefa(s) interrompida(s) devolvida(s) à fila.')
+        if com_erro:
+            self.stdout.write(f'{com_erro} tarefa(s) interrompida(s) sem tentativas restantes marcada(s) com erro.')
+
+        executadas = 0
+        while not self.encerrar:
+            close_old_connections()
+            proxima = reservar_proxima()
+
+            if proxima is None:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                recuperar_travadas()
+                continue
+
+            ok = executar(proxima)
+            executadas += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{"OK  " if ok else "ERRO"} {proxima}')
+
+        self.stdout.write(self.style.SUCCESS(f'{executadas} tarefa(s) executada(s).'))
+
+    def pedir_encerramento(self, *args):
+        # Termina a tarefa atual antes de sair
+        self.encerrar = True
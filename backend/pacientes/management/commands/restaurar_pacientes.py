@@ -0,0 +1,29 @@
+# pacientes/management/commands/restaurar_pacientes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from pacientes.arquivamento import ConflitoRestauracao, restaurar_paciente
+from pacientes.models import PacienteArquivado
+
+
+class Command(BaseCommand):
+    help = 'Devolve pacientes arquivados (com documentos e fotos) às tabelas principais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='+', type=int, help='Ids dos pacientes arquivados')
+        parser.add_argument('--reativar', action='store_true', help='Restaura os pacientes já como ativos')
+
+    def handle(self, *args, **options):
+        falhas = 0
+        for pk in options['ids']:
+            try:
+                paciente = restaurar_paciente(pk, reativar=options['reativar'])
+            except PacienteArquivado.DoesNotExist:
+                self.stderr.write(f'#{pk}: não há paciente arquivado com esse id.')
+                falhas += 1
+            except ConflitoRestauracao as erro:
+                self.stderr.write(f'#{pk}: {erro}')
+                falhas += 1
+            else:
+                self.stdout.write(self.style.SUCCESS(f'#{pk}: {paciente.nome_completo} restaurado.'))
+        if falhas:
+            raise CommandError(f'{falhas} paciente(s) não restaurado(s).')
@@ -0,0 +1,262 @@
+# pacientes/metricas.py
+"""
+Métricas de desempenho por view, no formato de texto do Prometheus (GET /metrics).
+
+Para cada requisição, MetricasMiddleware mede o tempo total e, por meio de um
+contextvar com o registro da requisição em andamento, soma:
+- as consultas SQL e o tempo gasto nelas (execute_wrapper instalado em cada conexão);
+- o tempo de renderização de templates (backend TemplatesInstrumentados).
+As mesmas contagens conferem o orçamento de consultas da view e os N+1 (ver
+pacientes/orcamento.py).
+
+Fora de uma requisição (worker, comandos) o contextvar é None e a medição não
+custa nada além de uma leitura. Os histogramas ficam na memória do processo: com
+vários workers do gunicorn, cada um expõe os seus (use um rótulo de instância no
+scrape). Requisições acima de METRICAS_LIMITE_LENTA_MS vão para o log com as
+consultas mais lentas. No ASGI o middleware roda async e o contextvar segue a
+requisição até as threads em que o ORM async executa as consultas.
+"""
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates, Template
+
+from .cache import estatisticas_cache
+from .orcamento import ExcessoConsultas, descrever_excesso, repetidas
+
+
+logger = logging.getLogger(__name__)
+
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BALDES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Consultas mais lentas guardadas por requisição (para o log de requisições lentas)
+CONSULTAS_NO_LOG = 5
+
+_requisicao = ContextVar('metricas_requisicao', default=None)
+
+
+class RegistroRequisicao:
+    """Totais da requisição em andamento"""
+
+    __slots__ = ('consultas', 'tempo_sql', 'tempo_templates', 'lentas', 'contagem', 'orcamento')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.tempo_templates = 0.0
+        self.lentas = []  # heap de (duração, sql) com as CONSULTAS_NO_LOG mais lentas
+        self.contagem = {}  # sql -> vezes (o SQL ainda tem %s no lugar dos parâmetros)
+        self.orcamento = None
+
+    def registrar_consulta(self, sql, duracao):
+        self.consultas += 1
+        self.tempo_sql += duracao
+        self.contagem[sql] = self.contagem.get(sql, 0) + 1
+        if len(self.lentas) < CONSULTAS_NO_LOG:
+            heapq.heappush(self.lentas, (duracao, sql))
+        elif duracao > self.lentas[0][0]:
+            heapq.heapreplace(self.lentas, (duracao, sql))
+
+
+class Histograma:
+    """Histograma do Prometheus com um rótulo `view` (contagens por balde, soma e total)"""
+
+    def __init__(self, nome, descricao, baldes):
+        self.nome = nome
+        self.descricao = descricao
+        self.baldes = baldes
+        self.series = {}
+        self.trava = threading.Lock()
+
+    def observar(self, view, valor):
+        indice = bisect_left(self.baldes, valor)
+        with self.trava:
+            serie = self.series.get(view)
+            if serie is None:
+                # [contagem de cada balde (+ o +Inf), soma, total]
+                serie = self.series[view] = [[0] * (len(self.baldes) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        with self.trava:
+            series = {view: (list(contagens), soma, total) for view, (contagens, soma, total) in self.series.items()}
+
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        for view, (contagens, soma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.baldes, contagens):
+                acumulado += contagem
+                linhas.append(f'{self.nome}_bucket{{view="{view}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{self.nome}_bucket{{view="{view}",le="+Inf"}} {total}')
+            linhas.append(f'{self.nome}_sum{{view="{view}"}} {soma}')
+            linhas.append(f'{self.nome}_count{{view="{view}"}} {total}')
+        return linhas
+
+
+DURACAO = Histograma('pacientes_requisicao_segundos', 'Tempo total da requisição por view', BALDES_SEGUNDOS)
+CONSULTAS = Histograma('pacientes_sql_consultas', 'Consultas SQL por requisição', BALDES_CONSULTAS)
+TEMPO_SQL = Histograma('pacientes_sql_segundos', 'Tempo gasto em SQL por requisição', BALDES_SEGUNDOS)
+TEMPO_TEMPLATES = Histograma(
+    'pacientes_template_segundos', 'Tempo de renderização de templates por requisição', BALDES_SEGUNDOS
+)
+HISTOGRAMAS = (DURACAO, CONSULTAS, TEMPO_SQL, TEMPO_TEMPLATES)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """execute_wrapper: soma a consulta ao registro da requisição em andamento, se houver"""
+    registro = _requisicao.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    inicio = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        registro.registrar_consulta(sql, perf_counter() - inicio)
+
+
+def instalar_medicao_sql(sender, connection, **kwargs):
+    """Receiver de connection_created: instala medir_consulta em cada conexão nova"""
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+class TemplateInstrumentado(Template):
+
+    def render(self, context=None, request=None):
+        registro = _requisicao.get()
+        if registro is None:
+            return super().render(context, request)
+        inicio = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            registro.tempo_templates += perf_counter() - inicio
+
+
+class TemplatesInstrumentados(DjangoTemplates):
+    """Backend DjangoTemplates que mede o tempo de render() (usado em TEMPLATES)"""
+
+    def from_string(self, template_code):
+        return TemplateInstrumentado(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateInstrumentado(super().get_template(template_name).template, self)
+
+
+def nome_view(request):
+    """Nome da URL (dashboard, paciente_detalhes...): poucos valores, bom para rótulo"""
+    correspondencia = getattr(request, 'resolver_match', None)
+    if correspondencia is None:
+        return 'nao_resolvida'
+    return correspondencia.view_name or 'sem_nome'
+
+
+class MetricasMiddleware:
+    """Mede cada requisição; fica logo depois do WhiteNoise para não medir arquivos estáticos"""
+
+    # Síncrono no WSGI, async no ASGI: sem trocar de thread a cada requisição
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_ATIVAS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limite_lenta = settings.METRICAS_LIMITE_LENTA_MS / 1000
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        registro = RegistroRequisicao()
+        token = _requisicao.set(registro)
+        inicio = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            # Respostas em streaming (exportação, mídia) contam só até o início do envio
+            duracao = perf_counter() - inicio
+            _requisicao.reset(token)
+        return self.registrar(request, response, registro, duracao)
+
+    async def __acall__(self, request):
+        # O contextvar acompanha a requisição nas threads do sync_to_async (ORM async)
+        registro = RegistroRequisicao()
+        token = _requisicao.set(registro)
+        inicio = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duracao = perf_counter() - inicio
+            _requisicao.reset(token)
+        return self.registrar(request, response, registro, duracao)
+
+    def registrar(self, request, response, registro, duracao):
+        view = nome_view(request)
+        DURACAO.observar(view, duracao)
+        CONSULTAS.observar(view, registro.consultas)
+        TEMPO_SQL.observar(view, registro.tempo_sql)
+        TEMPO_TEMPLATES.observar(view, registro.tempo_templates)
+
+        if duracao >= self.limite_lenta:
+            registrar_lenta(request, view, response.status_code, duracao, registro)
+        verificar_orcamento(request, view, registro)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        registro = _requisicao.get()
+        if registro is not None:
+            registro.orcamento = getattr(view_func, 'orcamento_consultas', None)
+
+
+def registrar_lenta(request, view, status, duracao, registro):
+    # Só o SQL (sem parâmetros): os valores podem conter dados de pacientes
+    consultas = ''.join(
+        f'\n  {tempo * 1000:.1f}ms {sql[:300]}' for tempo, sql in sorted(registro.lentas, reverse=True)
+    )
+    logger.warning(
+        'Requisição lenta: %s %s (%s) status=%s total=%.0fms sql=%d consultas/%.0fms templates=%.0fms%s',
+        request.method, request.path, view, status, duracao * 1000,
+        registro.consultas, registro.tempo_sql * 1000, registro.tempo_templates * 1000, consultas,
+    )
+
+
+def verificar_orcamento(request, view, registro):
+    """Avisa (ou falha, com ORCAMENTO_CONSULTAS_ESTRITO) quando a view estoura o orçamento ou faz N+1"""
+    repeticoes = repetidas(registro.contagem)
+    excedeu = registro.orcamento is not None and registro.consultas > registro.orcamento
+    if not (excedeu or repeticoes):
+        return
+
+    mensagem = descrever_excesso(
+        f'{request.method} {request.path} ({view})', registro.consultas, registro.orcamento, repeticoes
+    )
+    if settings.ORCAMENTO_CONSULTAS_ESTRITO:
+        raise ExcessoConsultas(mensagem)
+    logger.warning(mensagem)
+
+
+def exportar_metricas():
+    """Texto de exposição do Prometheus com os histogramas e os contadores do cache de fragmentos"""
+    linhas = []
+    for histograma in HISTOGRAMAS:
+        linhas.extend(histograma.exportar())
+
+    cache = estatisticas_cache()
+    linhas.append('# HELP pacientes_cache_fragmentos_total Consultas ao cache de fragmentos da página do paciente')
+    linhas.append('# TYPE pacientes_cache_fragmentos_total counter')
+    linhas.append(f'pacientes_cache_fragmentos_total{{resultado="acerto"}} {cache["acertos"]}')
+    linhas.append(f'pacientes_cache_fragmentos_total{{resultado="falha"}} {cache["falhas"]}')
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,158 @@
+# pacientes/midia.py
+"""
+Entrega protegida dos arquivos enviados (documentos, fotos, relatórios).
+
+Os arquivos não ficam públicos em MEDIA_URL: as views conferem o médico dono e
+chamam `servir_arquivo`, que responde com ETag/If-None-Match e HTTP Range.
+Com MEDIA_ACCEL configurado, o envio dos bytes é delegado ao servidor web:
+
+- 'nginx': cabeçalho X-Accel-Redirect para MEDIA_ACCEL_PREFIXO + nome do arquivo
+  (location interna no nginx apontando para MEDIA_ROOT);
+- 'sendfile': cabeçalho X-Sendfile com o caminho absoluto (Apache/lighttpd).
+
+Sem offload, o arquivo inteiro vai por FileResponse no WSGI (o gunicorn usa
+sendfile() via wsgi.file_wrapper); no ASGI e nos intervalos ele é lido em
+pedaços, por um iterador assíncrono no ASGI (ver pacientes/transmissao.py), sem
+carregar o arquivo na memória.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+
+from .transmissao import conteudo_streaming
+
+
+TAMANHO_PEDACO = 64 * 1024
+
+INTERVALO_BYTES = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def calcular_etag(caminho, checksum=''):
+    """ETag forte: o SHA-256 do arquivo quando já calculado, senão data de modificação + tamanho"""
+    if checksum:
+        return quote_etag(checksum)
+    estado = os.stat(caminho)
+    return quote_etag(f'{estado.st_mtime_ns:x}-{estado.st_size:x}')
+
+
+def interpretar_intervalo(cabecalho, tamanho):
+    """
+    Converte o cabeçalho Range em (inicio, fim) inclusivo.
+
+    Retorna None quando o cabeçalho deve ser ignorado (ausente, malformado ou
+    com vários intervalos: nesses casos o arquivo inteiro é enviado) e
+    levanta ValueError quando o intervalo não cabe no arquivo (416).
+    """
+    correspondencia = INTERVALO_BYTES.match(cabecalho.replace(' ', '')) if cabecalho else None
+    if not correspondencia:
+        return None
+
+    inicio, fim = correspondencia.groups()
+    if not inicio and not fim:
+        return None
+
+    if not inicio:
+        # bytes=-N: os últimos N bytes
+        sufixo = int(fim)
+        if sufixo == 0:
+            raise ValueError
+        return max(tamanho - sufixo, 0), tamanho - 1
+
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        raise ValueError
+    return inicio, fim
+
+
+def _ler_intervalo(caminho, inicio, quantidade):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        while quantidade > 0:
+            pedaco = arquivo.read(min(TAMANHO_PEDACO, quantidade))
+            if not pedaco:
+                break
+            quantidade -= len(pedaco)
+            yield pedaco
+
+
+def servir_arquivo(request, nome, checksum='', download=False, nome_original=''):
+    """
+    Resposta para o arquivo `nome` do storage (a view já deve ter conferido a permissão).
+    `nome_original` é o nome do Content-Disposition (no storage o nome é o hash do conteúdo).
+    """
+    try:
+        caminho = default_storage.path(nome)
+    except NotImplementedError:
+        # Storage remoto (S3 etc.): a URL assinada do próprio storage já é temporária
+        return redirect(default_storage.url(nome))
+
+    if not os.path.exists(caminho):
+        return HttpResponse(status=404)
+
+    etag = calcular_etag(caminho, checksum)
+    cabecalhos = {
+        'ETag': etag,
+        'Last-Modified': http_date(os.path.getmtime(caminho)),
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': content_disposition_header(download, nome_original or os.path.basename(nome)),
+    }
+    content_type = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return _sem_cache_compartilhado(response)
+
+    acelerador = getattr(settings, 'MEDIA_ACCEL', '')
+    if acelerador:
+        # O servidor web envia os bytes (e trata Range sozinho); o Python só autoriza
+        response = HttpResponse(content_type=content_type)
+        if acelerador == 'nginx':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIXO + nome
+        else:
+            response['X-Sendfile'] = caminho
+        for cabecalho, valor in cabecalhos.items():
+            response[cabecalho] = valor
+        return _sem_cache_compartilhado(response)
+
+    tamanho = os.path.getsize(caminho)
+    intervalo = None
+    # If-Range: só atende o intervalo se o arquivo ainda for a mesma versão
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            intervalo = interpretar_intervalo(request.headers.get('Range'), tamanho)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{tamanho}'
+            return response
+
+    if intervalo is None and not isinstance(request, ASGIRequest):
+        response = FileResponse(open(caminho, 'rb'), content_type=content_type)
+    else:
+        inicio, fim = intervalo or (0, tamanho - 1)
+        response = StreamingHttpResponse(
+            conteudo_streaming(request, _ler_intervalo(caminho, inicio, fim - inicio + 1)),
+            status=200 if intervalo is None else 206, content_type=content_type,
+        )
+        if intervalo is not None:
+            response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+        response['Content-Length'] = fim - inicio + 1
+
+    for cabecalho, valor in cabecalhos.items():
+        response[cabecalho] = valor
+    return _sem_cache_compartilhado(response)
+
+
+def _sem_cache_compartilhado(response):
+    # Dados de pacientes: o navegador pode guardar, mas revalida sempre (If-None-Match)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:58
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_colunas_digitos(apps, schema_editor):
+    """Preenche cpf_digitos/telefone_digitos dos pacientes já cadastrados"""
+    Paciente = apps.get_model("pacientes", "Paciente")
+    lote = []
+    for paciente in Paciente.objects.only("cpf", "telefone").iterator(chunk_size=2000):
+        paciente.cpf_digitos = re.sub(r"[^0-9]", "", paciente.cpf)
+        paciente.telefone_digitos = re.sub(r"[^0-9]", "", paciente.telefone)
+        lote.append(paciente)
+        if len(lote) >= 2000:
+            Paciente.objects.bulk_update(lote, ["cpf_digitos", "telefone_digitos"])
+            lote = []
+    if lote:
+        Paciente.objects.bulk_update(lote, ["cpf_digitos", "telefone_digitos"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paciente",
+            name="cpf_digitos",
+            field=models.CharField(blank=True, editable=False, max_length=11),
+        ),
+        migrations.AddField(
+            model_name="paciente",
+            name="telefone_digitos",
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(preencher_colunas_digitos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                fields=["medico", "cpf_digitos"], name="paciente_medico_cpfdig_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                fields=["medico", "telefone_digitos"], name="paciente_medico_teldig_idx"
+            ),
+        ),
+    ]
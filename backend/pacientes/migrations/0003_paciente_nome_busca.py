@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+from pacientes.busca import instalar_indice_busca, remover_indice_busca
+from pacientes.normalizacao import normalizar_texto
+
+
+def preencher_nome_busca(apps, schema_editor):
+    """Preenche nome_busca (sem acentos, minúsculo) dos pacientes já cadastrados"""
+    Paciente = apps.get_model("pacientes", "Paciente")
+    lote = []
+    for paciente in Paciente.objects.only("nome_completo").iterator(chunk_size=2000):
+        paciente.nome_busca = normalizar_texto(paciente.nome_completo)
+        lote.append(paciente)
+        if len(lote) >= 2000:
+            Paciente.objects.bulk_update(lote, ["nome_busca"])
+            lote = []
+    if lote:
+        Paciente.objects.bulk_update(lote, ["nome_busca"])
+
+
+def criar_indice_busca(apps, schema_editor):
+    instalar_indice_busca(schema_editor.connection)
+
+
+def apagar_indice_busca(apps, schema_editor):
+    remover_indice_busca(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0002_paciente_colunas_digitos"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paciente",
+            name="nome_busca",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(preencher_nome_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_busca, apagar_indice_busca),
+    ]
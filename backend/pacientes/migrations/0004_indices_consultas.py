@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0003_paciente_nome_busca"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="documento",
+            index=models.Index(
+                fields=["paciente", "-data_upload"],
+                name="documento_paciente_upload_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foto",
+            index=models.Index(
+                fields=["paciente", "-data_upload"], name="foto_paciente_upload_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                condition=models.Q(("ativo", True)),
+                fields=["medico", "-data_cadastro", "-id"],
+                name="paciente_ativos_cadastro_idx",
+            ),
+        ),
+    ]
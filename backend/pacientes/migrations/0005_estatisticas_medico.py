@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0004_indices_consultas"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EstatisticasMedico",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_pacientes", models.IntegerField(default=0)),
+                ("total_documentos", models.IntegerField(default=0)),
+                ("total_fotos", models.IntegerField(default=0)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+                (
+                    "medico",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="estatisticas",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Estatísticas do Médico",
+                "verbose_name_plural": "Estatísticas dos Médicos",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0005_estatisticas_medico"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foto",
+            name="miniaturas_geradas",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
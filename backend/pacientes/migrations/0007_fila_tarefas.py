@@ -0,0 +1,122 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def enfileirar_existentes(apps, schema_editor):
+    """Agenda o processamento dos documentos e fotos enviados antes da fila existir"""
+    Tarefa = apps.get_model("pacientes", "Tarefa")
+    for modelo, tipo, parametro in [
+        ("Documento", "processar_documento", "documento_id"),
+        ("Foto", "processar_foto", "foto_id"),
+    ]:
+        ids = apps.get_model("pacientes", modelo).objects.values_list("pk", flat=True)
+        Tarefa.objects.bulk_create(
+            (Tarefa(tipo=tipo, parametros={parametro: pk}) for pk in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0006_foto_miniaturas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documento",
+            name="checksum",
+            field=models.CharField(
+                blank=True, help_text="SHA-256 do arquivo", max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="documento",
+            name="status_processamento",
+            field=models.CharField(
+                choices=[
+                    ("pendente", "Pendente"),
+                    ("processando", "Processando"),
+                    ("concluido", "Concluído"),
+                    ("erro", "Erro"),
+                ],
+                default="pendente",
+                max_length=12,
+            ),
+        ),
+        migrations.AddField(
+            model_name="foto",
+            name="checksum",
+            field=models.CharField(
+                blank=True, help_text="SHA-256 do arquivo", max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="foto",
+            name="status_processamento",
+            field=models.CharField(
+                choices=[
+                    ("pendente", "Pendente"),
+                    ("processando", "Processando"),
+                    ("concluido", "Concluído"),
+                    ("erro", "Erro"),
+                ],
+                default="pendente",
+                max_length=12,
+            ),
+        ),
+        migrations.CreateModel(
+            name="Tarefa",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tipo", models.CharField(max_length=50)),
+                ("parametros", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Pendente"),
+                            ("processando", "Processando"),
+                            ("concluida", "Concluída"),
+                            ("erro", "Erro"),
+                        ],
+                        default="pendente",
+                        max_length=12,
+                    ),
+                ),
+                ("tentativas", models.PositiveSmallIntegerField(default=0)),
+                ("max_tentativas", models.PositiveSmallIntegerField(default=3)),
+                ("erro", models.TextField(blank=True)),
+                ("criada_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "executar_apos",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("iniciada_em", models.DateTimeField(blank=True, null=True)),
+                ("concluida_em", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Tarefa",
+                "verbose_name_plural": "Tarefas",
+                "ordering": ["executar_apos", "id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pendente")),
+                        fields=["executar_apos", "id"],
+                        name="tarefa_pendente_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(enfileirar_existentes, migrations.RunPython.noop),
+    ]
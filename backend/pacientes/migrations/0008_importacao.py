@@ -0,0 +1,79 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:06
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0007_fila_tarefas"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Importacao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "arquivo",
+                    models.FileField(
+                        upload_to="importacoes/%Y/%m/",
+                        validators=[
+                            django.core.validators.FileExtensionValidator(
+                                allowed_extensions=["csv", "xlsx"]
+                            )
+                        ],
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendente", "Na fila"),
+                            ("processando", "Processando"),
+                            ("concluida", "Concluída"),
+                            ("erro", "Erro"),
+                        ],
+                        default="pendente",
+                        max_length=12,
+                    ),
+                ),
+                ("total_linhas", models.PositiveIntegerField(default=0)),
+                ("importados", models.PositiveIntegerField(default=0)),
+                ("com_erro", models.PositiveIntegerField(default=0)),
+                (
+                    "relatorio",
+                    models.FileField(
+                        blank=True, upload_to="importacoes/relatorios/%Y/%m/"
+                    ),
+                ),
+                ("criada_em", models.DateTimeField(auto_now_add=True)),
+                ("concluida_em", models.DateTimeField(blank=True, null=True)),
+                (
+                    "medico",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="importacoes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Importação",
+                "verbose_name_plural": "Importações",
+                "ordering": ["-criada_em"],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:13
+
+import django.core.validators
+import pacientes.armazenamento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0008_importacao"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArquivoBlob",
+            fields=[
+                (
+                    "hash",
+                    models.CharField(
+                        help_text="SHA-256 do conteúdo",
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("nome", models.CharField(max_length=255)),
+                ("tamanho", models.BigIntegerField()),
+                ("referencias", models.PositiveIntegerField(default=0)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Arquivo (blob)",
+                "verbose_name_plural": "Arquivos (blobs)",
+            },
+        ),
+        migrations.AlterField(
+            model_name="documento",
+            name="arquivo",
+            field=models.FileField(
+                storage=pacientes.armazenamento.obter_armazenamento,
+                upload_to="documentos/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["pdf"]
+                    )
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="foto",
+            name="imagem",
+            field=models.ImageField(
+                storage=pacientes.armazenamento.obter_armazenamento,
+                upload_to="fotos/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["jpg", "jpeg", "png", "gif"]
+                    )
+                ],
+            ),
+        ),
+    ]
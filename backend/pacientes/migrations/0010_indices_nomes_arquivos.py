@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:15
+
+import django.core.validators
+import pacientes.armazenamento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0009_armazenamento_deduplicado"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="documento",
+            name="arquivo",
+            field=models.FileField(
+                db_index=True,
+                storage=pacientes.armazenamento.obter_armazenamento,
+                upload_to="documentos/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["pdf"]
+                    )
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="foto",
+            name="imagem",
+            field=models.ImageField(
+                db_index=True,
+                storage=pacientes.armazenamento.obter_armazenamento,
+                upload_to="fotos/%Y/%m/%d/",
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["jpg", "jpeg", "png", "gif"]
+                    )
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0010_indices_nomes_arquivos"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadParcial",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("documento", "Documento"), ("foto", "Foto")],
+                        max_length=10,
+                    ),
+                ),
+                ("nome_arquivo", models.CharField(max_length=255)),
+                ("tamanho", models.BigIntegerField()),
+                ("recebido", models.BigIntegerField(default=0)),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+                (
+                    "medico",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads_parciais",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "paciente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="uploads_parciais",
+                        to="pacientes.paciente",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Upload em partes",
+                "verbose_name_plural": "Uploads em partes",
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+from pacientes.busca import instalar_indice_busca, remover_indice_busca
+from pacientes.normalizacao import normalizar_texto
+
+
+def preencher_texto_busca(apps, schema_editor):
+    """Título e descrição dos documentos já enviados (o texto do PDF vem de extrair_textos_documentos)"""
+    Documento = apps.get_model("pacientes", "Documento")
+    lote = []
+    for documento in Documento.objects.only("titulo", "descricao").iterator(
+        chunk_size=2000
+    ):
+        documento.texto_busca = normalizar_texto(
+            f"{documento.titulo} {documento.descricao}"
+        )
+        lote.append(documento)
+        if len(lote) >= 2000:
+            Documento.objects.bulk_update(lote, ["texto_busca"])
+            lote = []
+    if lote:
+        Documento.objects.bulk_update(lote, ["texto_busca"])
+
+
+def criar_indice_busca(apps, schema_editor):
+    instalar_indice_busca(schema_editor.connection)
+
+
+def apagar_indice_busca(apps, schema_editor):
+    remover_indice_busca(schema_editor.connection, ["pacientes_documento"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0011_upload_parcial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documento",
+            name="texto_busca",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="documento",
+            name="texto_checksum",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="documento",
+            name="texto_extraido",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="documento",
+            index=models.Index(fields=["checksum"], name="documento_checksum_idx"),
+        ),
+        migrations.RunPython(preencher_texto_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_busca, apagar_indice_busca),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_ultima_atualizacao(apps, schema_editor):
+    # A coluna nova vem com a hora da migração; a data do upload é um ponto de partida melhor
+    for nome in ("Documento", "Foto"):
+        apps.get_model("pacientes", nome).objects.update(
+            ultima_atualizacao=F("data_upload")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0012_documento_texto_busca"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Remocao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("paciente", "Paciente"),
+                            ("documento", "Documento"),
+                            ("foto", "Foto"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("objeto_id", models.BigIntegerField()),
+                ("removido_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Remoção",
+                "verbose_name_plural": "Remoções",
+            },
+        ),
+        migrations.AddField(
+            model_name="documento",
+            name="ultima_atualizacao",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="foto",
+            name="ultima_atualizacao",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(preencher_ultima_atualizacao, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="documento",
+            index=models.Index(
+                fields=["ultima_atualizacao", "id"], name="documento_atualizacao_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foto",
+            index=models.Index(
+                fields=["ultima_atualizacao", "id"], name="foto_atualizacao_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                fields=["medico", "ultima_atualizacao", "id"],
+                name="paciente_medico_atualiz_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="remocao",
+            name="medico",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="remocao",
+            index=models.Index(
+                fields=["medico", "removido_em", "id"], name="remocao_medico_data_idx"
+            ),
+        ),
+    ]
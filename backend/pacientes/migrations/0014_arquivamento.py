@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:01
+
+import django.db.models.deletion
+import pacientes.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0013_sincronizacao"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PacienteArquivado",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("nome_completo", models.CharField(max_length=200)),
+                ("cpf", models.CharField(db_index=True, max_length=14)),
+                ("total_documentos", models.PositiveIntegerField(default=0)),
+                ("total_fotos", models.PositiveIntegerField(default=0)),
+                (
+                    "dados",
+                    models.JSONField(encoder=pacientes.models.CodificadorArquivo),
+                ),
+                ("arquivado_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "medico",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pacientes_arquivados",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Paciente arquivado",
+                "verbose_name_plural": "Pacientes arquivados",
+                "ordering": ["-arquivado_em"],
+                "indexes": [
+                    models.Index(
+                        fields=["medico", "nome_completo"],
+                        name="arquivado_medico_nome_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0014_arquivamento"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="paciente",
+            index=models.Index(
+                condition=models.Q(("ativo", True)),
+                fields=["medico", "nome_busca"],
+                name="paciente_ativos_nome_idx",
+                opclasses=["int8_ops", "varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0015_indice_sugestoes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tarefa",
+            name="renovada_em",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
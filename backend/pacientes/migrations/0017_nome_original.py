@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pacientes", "0016_tarefa_renovacao"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documento",
+            name="nome_original",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="foto",
+            name="nome_original",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Estatísticas do planner para pacientes_paciente. Sem elas o SQLite só vê
+    "medico = X" nos índices e empata paciente_ativos_cadastro_idx com
+    paciente_medico_atualiz_idx (da sincronização), escolhendo o segundo para a
+    contagem dos ativos. Com ANALYZE ele sabe que o índice parcial só tem os
+    ativos. Depois de cargas grandes (importação, gerar_dados_sinteticos) rode
+    ANALYZE de novo; no PostgreSQL o autovacuum já faz isso.
+    """
+
+    dependencies = [
+        ("pacientes", "0017_nome_original"),
+    ]
+
+    operations = [
+        migrations.RunSQL("ANALYZE pacientes_paciente", migrations.RunSQL.noop, elidable=True),
+    ]
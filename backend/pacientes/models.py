@@ -1,7 +1,28 @@
 # pacientes/models.py
-from django.db import models
+import datetime
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import FileExtensionValidator
+from django.urls import reverse
+from .armazenamento import obter_armazenamento
+from .imagens import LARGURAS_MINIATURA
+from .normalizacao import somente_digitos, normalizar_texto
+
+
+STATUS_PROCESSAMENTO_CHOICES = [
+    ('pendente', 'Pendente'),
+    ('processando', 'Processando'),
+    ('concluido', 'Concluído'),
+    ('erro', 'Erro'),
+]
 
 
 class Paciente(models.Model):
@@ -20,6 +41,8 @@ class Paciente(models.Model):
         ('O+', 'O+'), ('O-', 'O-'),
     ]
     
+    CAMPOS_BUSCA = ('nome_busca', 'cpf_digitos', 'telefone_digitos')
+    
     # Relação com o médico
     medico = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pacientes')
     
@@ -46,6 +69,11 @@ class Paciente(models.Model):
     historico_familiar = models.TextField(blank=True)
     observacoes = models.TextField(blank=True)
     
+    # Colunas de busca, preenchidas automaticamente no save()
+    nome_busca = models.CharField(max_length=200, blank=True, editable=False)
+    cpf_digitos = models.CharField(max_length=11, blank=True, editable=False)
+    telefone_digitos = models.CharField(max_length=20, blank=True, editable=False)
+    
     # Controle
     data_cadastro = models.DateTimeField(auto_now_add=True)
     ultima_atualizacao = models.DateTimeField(auto_now=True)
@@ -55,10 +83,70 @@ class Paciente(models.Model):
         ordering = ['nome_completo']
         verbose_name = 'Paciente'
         verbose_name_plural = 'Pacientes'
+        indexes = [
+            # Lista do dashboard: pacientes ativos do médico, mais recentes primeiro
+            models.Index(
+                fields=['medico', '-data_cadastro', '-id'],
+                condition=models.Q(ativo=True),
+                name='paciente_ativos_cadastro_idx',
+            ),
+            # Autocompletar da busca: prefixo do nome entre os ativos do médico. varchar_pattern_ops
+            # deixa o PostgreSQL usar o índice no LIKE 'prefixo%' (os demais bancos ignoram opclasses)
+            models.Index(
+                fields=['medico', 'nome_busca'],
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+                condition=models.Q(ativo=True),
+                name='paciente_ativos_nome_idx',
+            ),
+            # Buscas exatas e por prefixo de CPF/telefone dentro dos pacientes do médico
+            models.Index(
+                fields=['medico', 'cpf_digitos'],
+                name='paciente_medico_cpfdig_idx',
+            ),
+            models.Index(
+                fields=['medico', 'telefone_digitos'],
+                name='paciente_medico_teldig_idx',
+            ),
+            # Sincronização incremental: alterações do médico depois de um ponto
+            models.Index(
+                fields=['medico', 'ultima_atualizacao', 'id'],
+                name='paciente_medico_atualiz_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.nome_completo} - {self.cpf}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o estado gravado para os signals saberem se "ativo" mudou
+        instance._ativo_salvo = instance.__dict__.get('ativo')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        self.normalizar_campos_busca()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.CAMPOS_BUSCA}
+        super().save(*args, **kwargs)
+    
+    def desativar(self):
+        """Exclusão lógica: sai do dashboard e depois é arquivado (ver pacientes/arquivamento.py)"""
+        self.ativo = False
+        self.save(update_fields=['ativo', 'ultima_atualizacao'])
+    
+    def reativar(self):
+        """Desfaz a exclusão lógica enquanto o paciente não foi arquivado (ver pacientes_inativos_view)"""
+        self.ativo = True
+        self.save(update_fields=['ativo', 'ultima_atualizacao'])
+    
+    def normalizar_campos_busca(self):
+        """Atualiza as colunas de busca (usar antes de bulk_create, que não chama save)"""
+        self.nome_busca = normalizar_texto(self.nome_completo)
+        self.cpf_digitos = somente_digitos(self.cpf)
+        self.telefone_digitos = somente_digitos(self.telefone)
+    
     def get_idade(self):
         """Calcula a idade do paciente"""
         from datetime import date
@@ -68,6 +156,23 @@ class Paciente(models.Model):
         )
 
 
+def _salvar_com_arquivo(objeto, campo, salvar, *args, **kwargs):
+    """
+    save() de Documento/Foto. O arquivo novo vai para o storage dentro do save()
+    e soma uma referência ao blob (ArquivoBlob.adquirir): tudo roda numa
+    transação, então se o INSERT/UPDATE falhar a referência é desfeita junto
+    (o arquivo sem registro fica para o limpar_midia_orfa).
+    """
+    arquivo = getattr(objeto, campo)
+    if arquivo and not arquivo._committed:
+        objeto.nome_original = os.path.basename(arquivo.name)[:255]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'nome_original'}
+    with transaction.atomic():
+        salvar(*args, **kwargs)
+
+
 class Documento(models.Model):
     """Modelo para armazenar PDFs relacionados ao paciente"""
     
@@ -76,17 +181,55 @@ class Documento(models.Model):
     descricao = models.TextField(blank=True)
     arquivo = models.FileField(
         upload_to='documentos/%Y/%m/%d/',
+        storage=obter_armazenamento,  # um arquivo por conteúdo (ver pacientes/armazenamento.py)
+        db_index=True,  # consultas por nome da coleta de órfãos (limpar_midia_orfa)
         validators=[FileExtensionValidator(allowed_extensions=['pdf'])]
     )
+    # No storage o nome é o SHA-256 do conteúdo: o nome enviado volta no download
+    nome_original = models.CharField(max_length=255, blank=True, editable=False)
     data_upload = models.DateTimeField(auto_now_add=True)
+    # Sincronização incremental (ver pacientes/sincronizacao.py); os update() também a atualizam
+    ultima_atualizacao = models.DateTimeField(auto_now=True)
+    
+    # Pós-processamento feito pelo worker (ver pacientes/tarefas.py)
+    status_processamento = models.CharField(max_length=12, choices=STATUS_PROCESSAMENTO_CHOICES, default='pendente')
+    checksum = models.CharField(max_length=64, blank=True, help_text="SHA-256 do arquivo")
+    
+    # Texto do PDF (ver pacientes/extracao.py); texto_checksum indica de qual versão do arquivo ele veio
+    texto_extraido = models.TextField(blank=True, editable=False)
+    texto_checksum = models.CharField(max_length=64, blank=True, editable=False)
+    
+    # Título, descrição e texto sem acentos, indexados para busca (ver pacientes/busca.py)
+    texto_busca = models.TextField(blank=True, editable=False)
     
     class Meta:
         ordering = ['-data_upload']
         verbose_name = 'Documento'
         verbose_name_plural = 'Documentos'
+        indexes = [
+            models.Index(fields=['paciente', '-data_upload'], name='documento_paciente_upload_idx'),
+            # Reaproveita o texto já extraído de outro upload com o mesmo conteúdo
+            models.Index(fields=['checksum'], name='documento_checksum_idx'),
+            models.Index(fields=['ultima_atualizacao', 'id'], name='documento_atualizacao_idx'),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.paciente.nome_completo}"
+    
+    def save(self, *args, **kwargs):
+        self.normalizar_texto_busca()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'texto_busca', 'ultima_atualizacao'}
+        _salvar_com_arquivo(self, 'arquivo', super().save, *args, **kwargs)
+    
+    def normalizar_texto_busca(self):
+        self.texto_busca = normalizar_texto(' '.join([self.titulo, self.descricao, self.texto_extraido]))
+    
+    @property
+    def url_arquivo(self):
+        """URL protegida do PDF (ver pacientes/midia.py)"""
+        return reverse('documento_arquivo', args=[self.pk])
 
 
 class Foto(models.Model):
@@ -97,14 +240,354 @@ class Foto(models.Model):
     descricao = models.TextField(blank=True)
     imagem = models.ImageField(
         upload_to='fotos/%Y/%m/%d/',
+        storage=obter_armazenamento,  # um arquivo por conteúdo (ver pacientes/armazenamento.py)
+        db_index=True,  # consultas por nome da coleta de órfãos (limpar_midia_orfa)
         validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'gif'])]
     )
+    nome_original = models.CharField(max_length=255, blank=True, editable=False)
     data_upload = models.DateTimeField(auto_now_add=True)
+    ultima_atualizacao = models.DateTimeField(auto_now=True)
+    miniaturas_geradas = models.BooleanField(default=False, editable=False)
+    
+    # Pós-processamento feito pelo worker (ver pacientes/tarefas.py)
+    status_processamento = models.CharField(max_length=12, choices=STATUS_PROCESSAMENTO_CHOICES, default='pendente')
+    checksum = models.CharField(max_length=64, blank=True, help_text="SHA-256 do arquivo")
     
     class Meta:
         ordering = ['-data_upload']
         verbose_name = 'Foto'
         verbose_name_plural = 'Fotos'
+        indexes = [
+            models.Index(fields=['paciente', '-data_upload'], name='foto_paciente_upload_idx'),
+            models.Index(fields=['ultima_atualizacao', 'id'], name='foto_atualizacao_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.titulo} - {self.paciente.nome_completo}"
+    
+    def save(self, *args, **kwargs):
+        _salvar_com_arquivo(self, 'imagem', super().save, *args, **kwargs)
+    
+    @property
+    def url_imagem(self):
+        """URL protegida da imagem original (ver pacientes/midia.py)"""
+        return reverse('foto_imagem', args=[self.pk])
+    
+    def url_variante(self, largura, extensao='jpg'):
+        """URL protegida de uma das miniaturas geradas (ver pacientes/imagens.py)"""
+        return reverse('foto_miniatura', args=[self.pk, largura, extensao])
+    
+    def _srcset(self, extensao):
+        return ', '.join(f'{self.url_variante(largura, extensao)} {largura}w' for largura in LARGURAS_MINIATURA)
+    
+    @property
+    def srcset_webp(self):
+        return self._srcset('webp')
+    
+    @property
+    def srcset_jpg(self):
+        return self._srcset('jpg')
+    
+    @property
+    def url_miniatura(self):
+        """Menor variante JPEG, usada como src padrão"""
+        return self.url_variante(LARGURAS_MINIATURA[0])
+
+
+class EstatisticasMedico(models.Model):
+    """Contadores por médico mantidos pelos signals, para o dashboard não contar linhas"""
+    
+    medico = models.OneToOneField(User, on_delete=models.CASCADE, related_name='estatisticas')
+    total_pacientes = models.IntegerField(default=0)  # apenas pacientes ativos
+    total_documentos = models.IntegerField(default=0)
+    total_fotos = models.IntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Estatísticas do Médico'
+        verbose_name_plural = 'Estatísticas dos Médicos'
+    
+    def __str__(self):
+        return f"Estatísticas - {self.medico}"
+    
+    @classmethod
+    def obter(cls, medico):
+        """Retorna os contadores do médico, calculando-os na primeira vez"""
+        try:
+            return cls.objects.get(medico=medico)
+        except cls.DoesNotExist:
+            return cls.recalcular(medico.pk)
+    
+    @classmethod
+    async def aobter(cls, medico):
+        """Versão async de obter (o recálculo, raro, roda numa thread)"""
+        try:
+            return await cls.objects.aget(medico=medico)
+        except cls.DoesNotExist:
+            return await sync_to_async(cls.recalcular)(medico.pk)
+    
+    @classmethod
+    def recalcular(cls, medico_id):
+        """Recalcula os três totais em uma única consulta (subconsultas escalares)"""
+        def contagem(queryset, campo_medico):
+            return Coalesce(Subquery(
+                queryset.filter(**{campo_medico: OuterRef('pk')})
+                .order_by().values(campo_medico)
+                .annotate(total=Count('pk')).values('total')
+            ), 0)
+        
+        totais = User.objects.filter(pk=medico_id).annotate(
+            total_pacientes=contagem(Paciente.objects.filter(ativo=True), 'medico'),
+            total_documentos=contagem(Documento.objects.all(), 'paciente__medico'),
+            total_fotos=contagem(Foto.objects.all(), 'paciente__medico'),
+        ).values('total_pacientes', 'total_documentos', 'total_fotos').get()
+        
+        estatisticas, _ = cls.objects.update_or_create(medico_id=medico_id, defaults=totais)
+        return estatisticas
+    
+    @classmethod
+    def somar(cls, medico_id=None, paciente_id=None, **deltas):
+        """
+        Aplica incrementos (ex: total_fotos=1) com F(), sem ler a linha.
+
+        Aceita o médico ou, para documentos e fotos, o paciente (evita carregar o paciente).
+        """
+        if medico_id is not None:
+            filtro = {'medico_id': medico_id}
+        else:
+            filtro = {'medico__pacientes': paciente_id}
+        
+        alteracoes = {campo: F(campo) + delta for campo, delta in deltas.items()}
+        if cls.objects.filter(**filtro).update(**alteracoes):
+            return
+        
+        # Ainda não existe contador para o médico: o cálculo inicial já inclui a alteração
+        if medico_id is None:
+            medico_id = Paciente.objects.filter(pk=paciente_id).values_list('medico_id', flat=True).first()
+        if medico_id is not None:
+            cls.recalcular(medico_id)
+
+
+class ArquivoBlob(models.Model):
+    """Arquivo guardado uma vez por conteúdo, com a contagem de Documentos/Fotos que o usam"""
+    
+    hash = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 do conteúdo")
+    nome = models.CharField(max_length=255)
+    tamanho = models.BigIntegerField()
+    referencias = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Arquivo (blob)'
+        verbose_name_plural = 'Arquivos (blobs)'
+    
+    def __str__(self):
+        return f"{self.nome} ({self.referencias} ref.)"
+    
+    @classmethod
+    def adquirir(cls, hash, nome, tamanho):
+        """Soma uma referência (criando o registro no primeiro uso) e retorna o nome do blob"""
+        if not cls.objects.filter(pk=hash).update(referencias=F('referencias') + 1):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(hash=hash, nome=nome, tamanho=tamanho, referencias=1)
+                return nome
+            except IntegrityError:
+                # Outro upload igual criou o registro ao mesmo tempo
+                cls.objects.filter(pk=hash).update(referencias=F('referencias') + 1)
+        return cls.objects.filter(pk=hash).values_list('nome', flat=True).get()
+    
+    @classmethod
+    def liberar(cls, hash):
+        """Tira uma referência; retorna True se era a última (registro removido, arquivo pode sair)"""
+        blob = cls.objects.select_for_update().filter(pk=hash).first()
+        if blob is None:
+            return False
+        if blob.referencias > 1:
+            cls.objects.filter(pk=hash).update(referencias=F('referencias') - 1)
+            return False
+        blob.delete()
+        return True
+    
+    @classmethod
+    def recontar(cls):
+        """
+        Recalcula as referências a partir de Documento/Foto em um único UPDATE e
+        descarta os blobs sem uso (os arquivos ficam para o limpar_midia_orfa).
+        """
+        def contagem(modelo, campo):
+            return Coalesce(Subquery(
+                modelo.objects.filter(**{campo: OuterRef('nome')})
+                .order_by().values(campo)
+                .annotate(total=Count('pk')).values('total')
+            ), 0)
+        
+        cls.objects.update(referencias=contagem(Documento, 'arquivo') + contagem(Foto, 'imagem'))
+        return cls.objects.filter(referencias=0).delete()[0]
+
+
+class Tarefa(models.Model):
+    """Fila de tarefas em segundo plano, guardada no próprio banco (ver pacientes/fila.py)"""
+    
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=3)
+    erro = models.TextField(blank=True)
+    
+    criada_em = models.DateTimeField(auto_now_add=True)
+    executar_apos = models.DateTimeField(default=timezone.now)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    # Renovada pelo worker enquanto a tarefa roda (ver fila._renovando)
+    renovada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['executar_apos', 'id']
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        indexes = [
+            # O worker só procura tarefas pendentes já liberadas para execução
+            models.Index(
+                fields=['executar_apos', 'id'],
+                condition=models.Q(status='pendente'),
+                name='tarefa_pendente_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_status_display()})"
+
+
+class Importacao(models.Model):
+    """Importação de pacientes a partir de planilha, processada pelo worker"""
+    
+    STATUS_CHOICES = [
+        ('pendente', 'Na fila'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    
+    medico = models.ForeignKey(User, on_delete=models.CASCADE, related_name='importacoes')
+    arquivo = models.FileField(
+        upload_to='importacoes/%Y/%m/',
+        validators=[FileExtensionValidator(allowed_extensions=['csv', 'xlsx'])]
+    )
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pendente')
+    total_linhas = models.PositiveIntegerField(default=0)
+    importados = models.PositiveIntegerField(default=0)
+    com_erro = models.PositiveIntegerField(default=0)
+    relatorio = models.FileField(upload_to='importacoes/relatorios/%Y/%m/', blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-criada_em']
+        verbose_name = 'Importação'
+        verbose_name_plural = 'Importações'
+    
+    def __str__(self):
+        return f"Importação #{self.pk} - {self.medico}"
+
+
+class UploadParcial(models.Model):
+    """Upload em partes (retomável) de documento ou foto, ver pacientes/uploads.py"""
+    
+    TIPO_CHOICES = [
+        ('documento', 'Documento'),
+        ('foto', 'Foto'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    medico = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads_parciais')
+    paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='uploads_parciais')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    nome_arquivo = models.CharField(max_length=255)
+    tamanho = models.BigIntegerField()
+    recebido = models.BigIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Upload em partes'
+        verbose_name_plural = 'Uploads em partes'
+    
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.recebido}/{self.tamanho} bytes)"
+    
+    @property
+    def completo(self):
+        return self.recebido >= self.tamanho
+
+
+class Remocao(models.Model):
+    """Registro (tombstone) de paciente, documento ou foto apagado, para a sincronização incremental"""
+    
+    TIPO_CHOICES = [
+        ('paciente', 'Paciente'),
+        ('documento', 'Documento'),
+        ('foto', 'Foto'),
+    ]
+    
+    # Sem constraint: ao apagar o médico, os signals da cascata ainda gravam remoções dele
+    medico = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False, related_name='+')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    removido_em = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Remoção'
+        verbose_name_plural = 'Remoções'
+        indexes = [
+            models.Index(fields=['medico', 'removido_em', 'id'], name='remocao_medico_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.objeto_id} removido em {self.removido_em:%d/%m/%Y %H:%M}"
+
+
+class CodificadorArquivo(DjangoJSONEncoder):
+    """DjangoJSONEncoder sem cortar os microssegundos: as datas voltam exatas na restauração"""
+    
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class PacienteArquivado(models.Model):
+    """
+    Paciente inativo tirado das tabelas principais junto com documentos e fotos
+    (ver pacientes/arquivamento.py). Os arquivos ficam em MIDIA_FRIA_ROOT.
+    """
+    
+    # O mesmo id do Paciente: a restauração o reaproveita
+    id = models.BigIntegerField(primary_key=True)
+    medico = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pacientes_arquivados')
+    nome_completo = models.CharField(max_length=200)
+    cpf = models.CharField(max_length=14, db_index=True)
+    total_documentos = models.PositiveIntegerField(default=0)
+    total_fotos = models.PositiveIntegerField(default=0)
+    # Campos do paciente, dos documentos e das fotos, como gravados no banco
+    dados = models.JSONField(encoder=CodificadorArquivo)
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-arquivado_em']
+        verbose_name = 'Paciente arquivado'
+        verbose_name_plural = 'Pacientes arquivados'
+        indexes = [
+            models.Index(fields=['medico', 'nome_completo'], name='arquivado_medico_nome_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.titulo} - {self.paciente.nome_completo}"
\ No newline at end of file
+        return f"{self.nome_completo} - {self.cpf} (arquivado)"
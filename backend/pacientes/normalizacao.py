@@ -0,0 +1,35 @@
+# pacientes/normalizacao.py
+import re
+import unicodedata
+
+from django.db.models import Q
+
+
+def somente_digitos(valor):
+    """Remove tudo que não for dígito (ex: '123.456.789-09' -> '12345678909')"""
+    return re.sub(r'[^0-9]', '', valor or '')
+
+
+def normalizar_texto(valor):
+    """Remove acentos, converte para minúsculas e normaliza espaços ('João  Silva' -> 'joao silva')"""
+    decomposto = unicodedata.normalize('NFKD', valor or '')
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.lower().split())
+
+
+def filtro_prefixo_digitos(campo, prefixo, tamanho):
+    """
+    Filtro por prefixo em uma coluna que só contém dígitos.
+
+    Usa um intervalo (prefixo <= valor <= prefixo + '999...') em vez de LIKE,
+    assim tanto o PostgreSQL quanto o SQLite fazem busca no índice B-tree.
+    """
+    return Q(**{
+        f'{campo}__gte': prefixo,
+        f'{campo}__lte': prefixo + '9' * (tamanho - len(prefixo)),
+    })
+
+
+def proximo_prefixo(prefixo):
+    """Menor texto maior que todos os que começam com o prefixo ('mar' -> 'mas')"""
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
@@ -0,0 +1,90 @@
+# pacientes/orcamento.py
+"""
+Orçamento de consultas SQL por view e detecção de N+1.
+
+- @orcamento_consultas(n) declara quantas consultas a view pode fazer;
+  MetricasMiddleware (ver pacientes/metricas.py) compara com o que a requisição
+  realmente fez e registra um aviso quando passa, ou levanta ExcessoConsultas
+  com ORCAMENTO_CONSULTAS_ESTRITO = True (o padrão nos testes, ver o mixin).
+- A mesma consulta (mesmo SQL, parâmetros diferentes) repetida pelo menos
+  LIMITE_N_MAIS_1 vezes numa requisição é o sinal típico de N+1, por exemplo
+  um template acessando documento.paciente dentro de um {% for %}.
+- limite_consultas() e OrcamentoConsultasMixin fazem a mesma verificação nos testes.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+LIMITE_N_MAIS_1 = 5
+
+# Troca literais por "?" para agrupar consultas capturadas já com os parâmetros
+LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class ExcessoConsultas(AssertionError):
+    """A view fez mais consultas que o orçamento declarado (ou repetiu uma consulta N vezes)"""
+
+
+def orcamento_consultas(maximo):
+    """Declara o máximo de consultas da view (inclui sessão e usuário do login)"""
+    def decorador(view):
+        # login_required e afins copiam __dict__, então a ordem dos decoradores não importa
+        view.orcamento_consultas = maximo
+        return view
+    return decorador
+
+
+def repetidas(contagem, minimo=LIMITE_N_MAIS_1):
+    """[(vezes, sql)] das consultas (sql -> vezes) feitas pelo menos `minimo` vezes, da mais repetida"""
+    return sorted(
+        ((vezes, sql) for sql, vezes in contagem.items() if vezes >= minimo), key=lambda item: -item[0]
+    )
+
+
+def descrever_excesso(rotulo, total, maximo, repeticoes):
+    mensagem = f'{rotulo}: {total} consultas'
+    if maximo is not None:
+        mensagem += f' (orçamento: {maximo})'
+    if repeticoes:
+        mensagem += '; repetidas (possível N+1):'
+    for vezes, sql in repeticoes:
+        mensagem += f'\n  {vezes}x {sql[:300]}'
+    return mensagem
+
+
+@contextmanager
+def limite_consultas(maximo, conexao=None):
+    """
+    Falha se o bloco fizer mais de `maximo` consultas ou repetir uma consulta
+    LIMITE_N_MAIS_1 vezes; a mensagem lista as consultas repetidas.
+    """
+    # Import tardio: django.test só é necessário nos testes
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(conexao or connection) as capturadas:
+        yield capturadas
+
+    contagem = Counter(LITERAIS.sub('?', consulta['sql']) for consulta in capturadas.captured_queries)
+    total = len(capturadas.captured_queries)
+    repeticoes = repetidas(contagem)
+    if total > maximo or repeticoes:
+        raise ExcessoConsultas(descrever_excesso('Consultas demais no bloco', total, maximo, repeticoes))
+
+
+class OrcamentoConsultasMixin:
+    """
+    Para TestCase: toda requisição do test client passa a falhar ao estourar o
+    orçamento da view ou ao fazer N+1, e assertConsultasAte() limita um trecho.
+    """
+
+    def setUp(self):
+        from django.test.utils import override_settings
+
+        super().setUp()
+        self.enterContext(override_settings(ORCAMENTO_CONSULTAS_ESTRITO=True))
+
+    def assertConsultasAte(self, maximo):
+        return limite_consultas(maximo)
@@ -0,0 +1,65 @@
+# pacientes/paginacao.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def codificar_cursor(objeto, campo='data_cadastro'):
+    """Gera o cursor opaco a partir da chave (data, id) do objeto (paciente por padrão)"""
+    chave = f'{getattr(objeto, campo).isoformat()}|{objeto.pk}'
+    return base64.urlsafe_b64encode(chave.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Recupera a chave (data, id) do cursor; retorna None se inválido"""
+    if not cursor:
+        return None
+
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        chave = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+        data_iso, pk = chave.rsplit('|', 1)
+        return datetime.fromisoformat(data_iso), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _filtrar_cursor(queryset, cursor, campo):
+    queryset = queryset.order_by(f'-{campo}', '-id')
+
+    chave = decodificar_cursor(cursor)
+    if chave:
+        data, pk = chave
+        # O limite redundante data <= X deixa o banco começar a
+        # leitura do índice direto na posição do cursor
+        queryset = queryset.filter(
+            Q(**{f'{campo}__lt': data}) | Q(**{campo: data, 'id__lt': pk}),
+            **{f'{campo}__lte': data},
+        )
+    return queryset
+
+
+def _separar_pagina(itens, tamanho, campo):
+    proximo_cursor = codificar_cursor(itens[tamanho - 1], campo) if len(itens) > tamanho else None
+    return itens[:tamanho], proximo_cursor
+
+
+def paginar_por_cursor(queryset, cursor=None, tamanho=24, campo='data_cadastro'):
+    """
+    Paginação por chave (keyset) ordenada por (-campo, -id); campo é data_cadastro
+    para pacientes e data_upload para documentos e fotos.
+
+    Em vez de OFFSET, filtra os registros "depois" do último item da página
+    anterior, então a página N custa o mesmo que a primeira.
+    Retorna a lista da página e o cursor da próxima (ou None).
+    """
+    # Busca um item a mais só para saber se existe próxima página
+    itens = list(_filtrar_cursor(queryset, cursor, campo)[:tamanho + 1])
+    return _separar_pagina(itens, tamanho, campo)
+
+
+async def apaginar_por_cursor(queryset, cursor=None, tamanho=24, campo='data_cadastro'):
+    """Versão async de paginar_por_cursor (ORM async, para views async)"""
+    itens = [item async for item in _filtrar_cursor(queryset, cursor, campo)[:tamanho + 1]]
+    return _separar_pagina(itens, tamanho, campo)
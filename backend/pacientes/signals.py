@@ -0,0 +1,142 @@
+# pacientes/signals.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidar_paciente
+from .diretorio import EntradaDiretorio, registrar_alteracao
+from .imagens import remover_variantes
+from .models import Paciente, Documento, Foto, EstatisticasMedico, Importacao, Remocao
+
+
+# ==================== CONTADORES DO DASHBOARD ====================
+
+@receiver(post_save, sender=Paciente)
+def contar_paciente_salvo(sender, instance, created, **kwargs):
+    """Mantém total_pacientes (ativos) ao criar, ativar ou desativar"""
+    anterior = None if created else getattr(instance, '_ativo_salvo', None)
+    
+    if created:
+        if instance.ativo:
+            EstatisticasMedico.somar(instance.medico_id, total_pacientes=1)
+    elif anterior is None:
+        # Instância montada fora do banco: não dá para saber o estado anterior
+        EstatisticasMedico.recalcular(instance.medico_id)
+    elif anterior != instance.ativo:
+        EstatisticasMedico.somar(instance.medico_id, total_pacientes=1 if instance.ativo else -1)
+    
+    instance._ativo_salvo = instance.ativo
+
+
+@receiver(post_delete, sender=Paciente)
+def contar_paciente_removido(sender, instance, **kwargs):
+    if instance.ativo:
+        EstatisticasMedico.somar(instance.medico_id, total_pacientes=-1)
+
+
+@receiver(post_save, sender=Documento)
+def contar_documento_salvo(sender, instance, created, **kwargs):
+    if created:
+        EstatisticasMedico.somar(paciente_id=instance.paciente_id, total_documentos=1)
+
+
+@receiver(post_delete, sender=Documento)
+def contar_documento_removido(sender, instance, **kwargs):
+    EstatisticasMedico.somar(paciente_id=instance.paciente_id, total_documentos=-1)
+
+
+@receiver(post_save, sender=Foto)
+def contar_foto_salva(sender, instance, created, **kwargs):
+    if created:
+        EstatisticasMedico.somar(paciente_id=instance.paciente_id, total_fotos=1)
+
+
+@receiver(post_delete, sender=Foto)
+def contar_foto_removida(sender, instance, **kwargs):
+    EstatisticasMedico.somar(paciente_id=instance.paciente_id, total_fotos=-1)
+
+
+# ==================== CACHE DA PÁGINA DE DETALHES ====================
+
+@receiver(post_save, sender=Documento)
+@receiver(post_delete, sender=Documento)
+@receiver(post_save, sender=Foto)
+@receiver(post_delete, sender=Foto)
+def invalidar_detalhes_paciente(sender, instance, **kwargs):
+    """Documentos e fotos fazem parte da página do paciente: muda a versão do cache"""
+    invalidar_paciente(instance.paciente_id)
+
+
+# ==================== DIRETÓRIO EM MEMÓRIA ====================
+
+@receiver(post_save, sender=Paciente)
+def atualizar_diretorio(sender, instance, **kwargs):
+    """Leva a alteração ao diretório do médico depois do commit (inativos saem dele)"""
+    if settings.DIRETORIO_PACIENTES:
+        # A entrada é montada agora: a instância ainda pode mudar até o commit
+        entrada = EntradaDiretorio.de_paciente(instance) if instance.ativo else None
+        medico_id, pk = instance.medico_id, instance.pk
+        transaction.on_commit(lambda: registrar_alteracao(medico_id, pk, entrada))
+
+
+@receiver(post_delete, sender=Paciente)
+def remover_do_diretorio(sender, instance, **kwargs):
+    if settings.DIRETORIO_PACIENTES:
+        medico_id, pk = instance.medico_id, instance.pk
+        transaction.on_commit(lambda: registrar_alteracao(medico_id, pk, None))
+
+
+# ==================== SINCRONIZAÇÃO ====================
+
+@receiver(post_delete, sender=Paciente)
+def registrar_remocao_paciente(sender, instance, **kwargs):
+    """Remoções não deixam linha para ultima_atualizacao: o feed lê os tombstones"""
+    Remocao.objects.create(medico_id=instance.medico_id, tipo='paciente', objeto_id=instance.pk)
+
+
+@receiver(post_delete, sender=Documento)
+@receiver(post_delete, sender=Foto)
+def registrar_remocao_anexo(sender, instance, **kwargs):
+    # O médico vem do paciente no próprio INSERT (na cascata, anexos são apagados antes dele)
+    Remocao.objects.create(
+        medico_id=Subquery(Paciente.objects.filter(pk=instance.paciente_id).values('medico_id')[:1]),
+        tipo=sender._meta.model_name,
+        objeto_id=instance.pk,
+    )
+
+
+# ==================== ARQUIVOS ====================
+
+@receiver(post_delete, sender=Documento)
+def liberar_documento(sender, instance, **kwargs):
+    """Libera a referência ao arquivo só depois do commit (um rollback não perde o arquivo)"""
+    _apagar_apos_commit(instance.arquivo)
+
+
+@receiver(post_delete, sender=Foto)
+def liberar_foto(sender, instance, **kwargs):
+    """Libera a imagem e, se ninguém mais a usa, apaga as miniaturas"""
+    storage, nome = instance.imagem.storage, instance.imagem.name
+    if not nome:
+        return
+    
+    def liberar():
+        storage.delete(nome)
+        if not storage.exists(nome):
+            remover_variantes(nome)
+    
+    transaction.on_commit(liberar)
+
+
+@receiver(post_delete, sender=Importacao)
+def apagar_planilhas(sender, instance, **kwargs):
+    _apagar_apos_commit(instance.arquivo)
+    _apagar_apos_commit(instance.relatorio)
+
+
+def _apagar_apos_commit(arquivo):
+    if arquivo.name:
+        storage, nome = arquivo.storage, arquivo.name
+        transaction.on_commit(lambda: storage.delete(nome))
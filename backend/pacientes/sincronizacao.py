@@ -0,0 +1,134 @@
+# pacientes/sincronizacao.py
+"""
+Sincronização incremental (change feed) para clientes offline, ver GET /api/sincronizacao/.
+
+O token opaco guarda, para cada fonte (pacientes, documentos, fotos e remoções),
+a posição (data, id) da última linha entregue. A chamada seguinte lê só o que
+vem depois dessa posição, em ordem (data, id), por índices que começam nela:
+o custo acompanha o número de alterações, não o tamanho do cadastro. Sem token
+a primeira chamada percorre tudo pelo mesmo caminho, em páginas.
+
+- Criações e edições: ultima_atualizacao (auto_now; os update() do worker
+  também a atualizam). A linha vem inteira e o cliente faz upsert pelo id.
+- Remoções: tabela Remocao, preenchida pelos signals de post_delete.
+- Só entram linhas até agora - SINCRONIZACAO_MARGEM_SEGUNDOS: uma transação
+  ainda sem commit pode ter gravado uma data anterior às já entregues e seria
+  pulada para sempre. O preço é ver as alterações com esse atraso.
+- Se alguma fonte tiver mais que `limite` linhas, "mais" vem true e o cliente
+  chama de novo com o token novo.
+- Remoções mais antigas que SINCRONIZACAO_RETENCAO_DIAS são apagadas
+  (limpar_remocoes): um token anterior a isso já não garante ver todas e a
+  chamada falha com TokenExpirado (o cliente sincroniza do zero).
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Documento, Foto, Paciente, Remocao
+
+
+FONTES = ('pacientes', 'documentos', 'fotos', 'removidos')
+
+# Campo de data de cada fonte (as demais usam ultima_atualizacao)
+CAMPOS_DATA = {'removidos': 'removido_em'}
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+class TokenExpirado(Exception):
+    """O token é anterior às remoções ainda guardadas: é preciso sincronizar do zero"""
+
+
+def fontes_do_medico(medico):
+    return {
+        'pacientes': Paciente.objects.filter(medico=medico),
+        'documentos': Documento.objects.filter(paciente__medico=medico),
+        'fotos': Foto.objects.filter(paciente__medico=medico),
+        'removidos': Remocao.objects.filter(medico=medico),
+    }
+
+
+def codificar_token(posicoes, emitido_em):
+    dados = {
+        'emitido_em': emitido_em.isoformat(),
+        'posicoes': {
+            fonte: [data.isoformat(), pk] for fonte, (data, pk) in posicoes.items()
+        },
+    }
+    return base64.urlsafe_b64encode(json.dumps(dados, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_token(token):
+    """(posições por fonte, momento de emissão); sem token, ({}, None)"""
+    if not token:
+        return {}, None
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        posicoes = {
+            fonte: (datetime.fromisoformat(data), int(pk))
+            for fonte, (data, pk) in dados['posicoes'].items() if fonte in FONTES
+        }
+        return posicoes, datetime.fromisoformat(dados['emitido_em'])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise TokenInvalido('Token de sincronização inválido.')
+
+
+def alteracoes_depois(queryset, campo, posicao, ate):
+    """
+    Linhas do queryset com (campo, id) depois de `posicao` e campo até `ate`, na ordem
+    do feed. Também usada por verificar_indices para conferir o índice dessa consulta.
+    """
+    queryset = queryset.filter(**{f'{campo}__lte': ate})
+    if posicao:
+        data, pk = posicao
+        # Mesmo truque da paginação por cursor: o limite redundante >= posiciona o índice
+        queryset = queryset.filter(
+            Q(**{f'{campo}__gt': data}) | Q(**{campo: data, 'id__gt': pk}),
+            **{f'{campo}__gte': data},
+        )
+    return queryset.order_by(campo, 'id')
+
+
+def sincronizar(fontes, token=None, limite=500):
+    """
+    Linhas de cada fonte (querysets já restritos ao médico, ver fontes_do_medico)
+    alteradas depois do token. Retorna ({fonte: [objetos]}, token seguinte, mais).
+    """
+    posicoes, emitido_em = decodificar_token(token)
+    agora = timezone.now()
+    if emitido_em and emitido_em < agora - timedelta(days=settings.SINCRONIZACAO_RETENCAO_DIAS):
+        raise TokenExpirado('Token anterior às remoções guardadas: sincronize do zero (sem token).')
+
+    ate = agora - timedelta(seconds=settings.SINCRONIZACAO_MARGEM_SEGUNDOS)
+    alteradas = {}
+    mais = False
+    for fonte in FONTES:
+        campo = CAMPOS_DATA.get(fonte, 'ultima_atualizacao')
+        if fonte == 'removidos' and not token:
+            # Cliente sem cópia local: as remoções anteriores não interessam
+            alteradas[fonte] = []
+            posicoes[fonte] = (ate, 0)
+            continue
+        # Uma linha a mais só para saber se a fonte tem outra página
+        linhas = list(alteracoes_depois(fontes[fonte], campo, posicoes.get(fonte), ate)[:limite + 1])
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            mais = True
+        if linhas:
+            posicoes[fonte] = (getattr(linhas[-1], campo), linhas[-1].pk)
+        alteradas[fonte] = linhas
+
+    return alteradas, codificar_token(posicoes, ate), mais
+
+
+def limpar_remocoes(dias=None):
+    """Apaga as remoções mais antigas que a retenção; retorna quantas"""
+    dias = settings.SINCRONIZACAO_RETENCAO_DIAS if dias is None else dias
+    removidas, _ = Remocao.objects.filter(removido_em__lt=timezone.now() - timedelta(days=dias)).delete()
+    return removidas
@@ -0,0 +1,250 @@
+# pacientes/sinteticos.py
+"""
+Dados sintéticos para testes de carga (ver o comando gerar_dados_sinteticos).
+
+Pacientes com nomes, endereços e CPFs válidos são gravados com bulk_create em
+lotes. Documentos e fotos reaproveitam poucos arquivos: cada modelo de exame
+(PDF com texto) e cada imagem é gravado uma vez no storage deduplicado e os
+registros apontam para o mesmo blob, como aconteceria com uploads repetidos.
+Assim milhões de registros não ocupam milhões de arquivos em disco.
+"""
+import random
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+
+from .armazenamento import armazenamento_deduplicado, hash_blob
+from .cpf import completar_cpf, cpfs_existentes, formatar_cpf
+from .extracao import extrair_texto_pdf
+from .imagens import gerar_variantes
+from .models import ArquivoBlob, Documento, Foto, Paciente
+from .normalizacao import normalizar_texto
+
+
+NOMES_FEMININOS = [
+    'Ana', 'Maria', 'Juliana', 'Fernanda', 'Patrícia', 'Camila', 'Beatriz', 'Larissa', 'Letícia',
+    'Mariana', 'Gabriela', 'Aline', 'Bruna', 'Vanessa', 'Cláudia', 'Luciana', 'Renata', 'Sônia',
+    'Helena', 'Isabela',
+]
+NOMES_MASCULINOS = [
+    'João', 'José', 'Carlos', 'Paulo', 'Lucas', 'Pedro', 'Marcos', 'Rafael', 'Gabriel', 'Felipe',
+    'Bruno', 'Rodrigo', 'André', 'Fernando', 'Gustavo', 'Ricardo', 'Antônio', 'Luís', 'Mateus', 'Vítor',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+    'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes',
+    'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques',
+    'Machado', 'Mendes', 'Freitas', 'Cardoso', 'Ramos', 'Gonçalves', 'Santana', 'Teixeira', 'Araújo',
+]
+RUAS = ['Rua das Flores', 'Avenida Brasil', 'Rua São João', 'Rua XV de Novembro', 'Avenida Paulista',
+        'Rua Sete de Setembro', 'Rua Tiradentes', 'Avenida Getúlio Vargas', 'Rua Dom Pedro II']
+CIDADES = [('São Paulo', 'SP'), ('Campinas', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'),
+           ('Curitiba', 'PR'), ('Porto Alegre', 'RS'), ('Salvador', 'BA'), ('Recife', 'PE'),
+           ('Fortaleza', 'CE'), ('Goiânia', 'GO'), ('Florianópolis', 'SC'), ('Belém', 'PA')]
+TIPOS_SANGUINEOS = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-', '']
+PESOS_TIPOS_SANGUINEOS = [36, 34, 8, 2.5, 9, 8, 2, 0.5, 20]
+ALERGIAS = ['Dipirona', 'Penicilina', 'Lactose', 'Frutos do mar', 'Amendoim', 'Poeira', 'Látex']
+MEDICAMENTOS = ['Losartana 50mg', 'Metformina 850mg', 'Sinvastatina 20mg', 'Levotiroxina 50mcg',
+                'Omeprazol 20mg', 'AAS 100mg']
+
+# Modelos de exame: título e linhas do PDF (o texto é extraído como no upload real)
+MODELOS_DOCUMENTO = [
+    ('Hemograma completo', ['Hemograma completo', 'Hemoglobina 14,2 g/dL', 'Leucocitos 6.800 /mm3',
+                            'Plaquetas 250.000 /mm3', 'Resultado dentro dos valores de referencia']),
+    ('Glicemia de jejum', ['Glicemia de jejum', 'Glicose 92 mg/dL', 'Metodo enzimatico',
+                           'Valor de referencia 70 a 99 mg/dL']),
+    ('Perfil lipídico', ['Colesterol total e fracoes', 'Colesterol total 185 mg/dL', 'HDL 52 mg/dL',
+                         'LDL 110 mg/dL', 'Triglicerides 120 mg/dL']),
+    ('Função tireoidiana', ['TSH e T4 livre', 'TSH 2,1 mUI/L', 'T4 livre 1,2 ng/dL']),
+    ('Urina tipo 1', ['Urina tipo 1', 'Densidade 1.020', 'pH 6,0', 'Proteinas ausentes',
+                      'Leucocitos raros']),
+    ('Raio-X de tórax', ['Radiografia de torax PA e perfil', 'Campos pulmonares livres',
+                         'Area cardiaca normal', 'Seios costofrenicos livres']),
+    ('Eletrocardiograma', ['Eletrocardiograma de repouso', 'Ritmo sinusal', 'Frequencia cardiaca 72 bpm',
+                           'Sem alteracoes da repolarizacao']),
+    ('Ultrassonografia abdominal', ['Ultrassonografia de abdome total', 'Figado de dimensoes normais',
+                                    'Vesicula biliar sem calculos', 'Rins topicos']),
+]
+TITULOS_FOTO = ['Lesão de pele', 'Pós-operatório', 'Evolução do tratamento', 'Exame físico']
+CORES_FOTO = [(196, 140, 120), (180, 120, 110), (210, 170, 150), (150, 100, 90)]
+
+
+def pdf_simples(linhas):
+    """PDF mínimo (uma página, Helvetica) com as linhas de texto ASCII"""
+    texto = ' '.join(
+        '({}) Tj T*'.format(linha.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)'))
+        for linha in linhas
+    )
+    conteudo = f'BT /F1 12 Tf 50 780 Td 16 TL {texto} ET'
+    objetos = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R '
+        '/Resources << /Font << /F1 5 0 R >> >> >>',
+        f'<< /Length {len(conteudo)} >>\nstream\n{conteudo}\nendstream',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+
+    saida = bytearray(b'%PDF-1.4\n')
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += f'{numero} 0 obj\n{objeto}\nendobj\n'.encode('ascii')
+    inicio_xref = len(saida)
+    saida += f'xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    saida += ''.join(f'{posicao:010d} 00000 n \n' for posicao in posicoes).encode('ascii')
+    saida += f'trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n'.encode('ascii')
+    return bytes(saida)
+
+
+def jpeg_simples(cor, largura=1200, altura=900):
+    """Imagem JPEG com um degradê da cor (sem EXIF, como depois de remover_metadados)"""
+    from PIL import Image
+
+    imagem = Image.new('RGB', (largura, altura), cor)
+    faixa = Image.linear_gradient('L').resize((largura, altura))
+    imagem = Image.composite(imagem, Image.new('RGB', (largura, altura), (240, 220, 210)), faixa)
+    buffer = BytesIO()
+    imagem.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class ArquivoModelo:
+    """Arquivo gravado uma vez no storage e usado por muitos registros"""
+
+    __slots__ = ('titulo', 'nome', 'checksum', 'texto', 'texto_busca', 'usos')
+
+    def __init__(self, titulo, nome, texto=''):
+        self.titulo = titulo
+        self.nome = nome
+        self.checksum = hash_blob(nome)
+        self.texto = texto
+        # Igual a Documento.normalizar_texto_busca (sem descrição), calculado uma vez por modelo
+        self.texto_busca = normalizar_texto(f'{titulo} {texto}')
+        self.usos = 0
+
+
+def preparar_documentos():
+    modelos = []
+    for titulo, linhas in MODELOS_DOCUMENTO:
+        conteudo = pdf_simples(linhas)
+        nome = armazenamento_deduplicado.save('sintetico.pdf', ContentFile(conteudo))
+        modelos.append(ArquivoModelo(titulo, nome, extrair_texto_pdf(BytesIO(conteudo), nome)))
+    return modelos
+
+
+def preparar_fotos():
+    modelos = []
+    for titulo, cor in zip(TITULOS_FOTO, CORES_FOTO):
+        conteudo = jpeg_simples(cor)
+        nome = armazenamento_deduplicado.save('sintetico.jpg', ContentFile(conteudo))
+        # As miniaturas são por blob: geradas uma vez, servem para todas as fotos
+        gerar_variantes(nome, BytesIO(conteudo))
+        modelos.append(ArquivoModelo(titulo, nome))
+    return modelos
+
+
+class GeradorPacientes:
+    """Gera pacientes com CPFs válidos e únicos a partir de uma sequência embaralhada"""
+
+    def __init__(self, semente=None):
+        self.aleatorio = random.Random(semente)
+        # Começa em um ponto aleatório da faixa de CPFs e avança com um passo primo
+        self.proxima_base = self.aleatorio.randrange(10 ** 8, 10 ** 9)
+        self.passo = 7919
+
+    def _cpfs(self, quantidade):
+        cpfs = []
+        while len(cpfs) < quantidade:
+            base = f'{self.proxima_base:09d}'
+            self.proxima_base = (self.proxima_base + self.passo) % 10 ** 9
+            if len(set(base)) > 1:
+                cpfs.append(formatar_cpf(completar_cpf(base)))
+        # Gerações anteriores podem ter usado a mesma faixa
+        existentes = cpfs_existentes(cpfs)
+        return [cpf for cpf in cpfs if cpf not in existentes]
+
+    def paciente(self, medico, cpf):
+        aleatorio = self.aleatorio
+        sexo = aleatorio.choice('MF')
+        primeiro = aleatorio.choice(NOMES_MASCULINOS if sexo == 'M' else NOMES_FEMININOS)
+        sobrenomes = aleatorio.sample(SOBRENOMES, 2)
+        cidade, estado = aleatorio.choice(CIDADES)
+        nascimento = date(1930, 1, 1) + timedelta(days=aleatorio.randrange(34000))
+        telefone = f'({aleatorio.randint(11, 99)}) 9{aleatorio.randint(1000, 9999)}-{aleatorio.randint(1000, 9999)}'
+
+        paciente = Paciente(
+            medico=medico,
+            nome_completo=f'{primeiro} {" ".join(sobrenomes)}',
+            data_nascimento=nascimento,
+            cpf=cpf,
+            sexo=sexo,
+            telefone=telefone,
+            email=f'{normalizar_texto(primeiro)}.{cpf[:3]}{cpf[-2:]}@exemplo.com.br' if aleatorio.random() < 0.7 else None,
+            endereco=f'{aleatorio.choice(RUAS)}, {aleatorio.randint(1, 3000)}',
+            cidade=cidade,
+            estado=estado,
+            cep=f'{aleatorio.randint(10000, 99999)}-{aleatorio.randint(0, 999):03d}',
+            tipo_sanguineo=aleatorio.choices(TIPOS_SANGUINEOS, PESOS_TIPOS_SANGUINEOS)[0],
+            alergias=aleatorio.choice(ALERGIAS) if aleatorio.random() < 0.2 else '',
+            medicamentos_uso=aleatorio.choice(MEDICAMENTOS) if aleatorio.random() < 0.3 else '',
+        )
+        paciente.normalizar_campos_busca()
+        return paciente
+
+    def quantidade(self, media):
+        """Quantidade de anexos de um paciente: varia em torno da média"""
+        return round(self.aleatorio.uniform(0, 2 * media)) if media else 0
+
+    def gravar_lote(self, medicos, quantidade, documentos, fotos, media_documentos, media_fotos):
+        """Grava até `quantidade` pacientes (distribuídos entre os médicos) com seus anexos"""
+        pacientes = [
+            self.paciente(medicos[indice % len(medicos)], cpf)
+            for indice, cpf in enumerate(self._cpfs(quantidade))
+        ]
+
+        with transaction.atomic():
+            Paciente.objects.bulk_create(pacientes)
+
+            anexos_documentos = []
+            anexos_fotos = []
+            for paciente in pacientes:
+                for _ in range(self.quantidade(media_documentos)):
+                    modelo = self.aleatorio.choice(documentos)
+                    modelo.usos += 1
+                    anexos_documentos.append(Documento(
+                        paciente=paciente, titulo=modelo.titulo, arquivo=modelo.nome,
+                        status_processamento='concluido', checksum=modelo.checksum,
+                        texto_extraido=modelo.texto, texto_checksum=modelo.checksum,
+                        texto_busca=modelo.texto_busca,
+                    ))
+                for _ in range(self.quantidade(media_fotos)):
+                    modelo = self.aleatorio.choice(fotos)
+                    modelo.usos += 1
+                    anexos_fotos.append(Foto(
+                        paciente=paciente, titulo=modelo.titulo, imagem=modelo.nome,
+                        status_processamento='concluido', checksum=modelo.checksum, miniaturas_geradas=True,
+                    ))
+
+            Documento.objects.bulk_create(anexos_documentos)
+            Foto.objects.bulk_create(anexos_fotos)
+            atualizar_referencias(documentos + fotos)
+
+        return len(pacientes), len(anexos_documentos), len(anexos_fotos)
+
+
+def atualizar_referencias(modelos):
+    """Soma aos blobs os registros criados com bulk_create (que não passa pelo storage)"""
+    for modelo in modelos:
+        if modelo.usos:
+            ArquivoBlob.objects.filter(hash=modelo.checksum).update(referencias=F('referencias') + modelo.usos)
+            modelo.usos = 0
+
+
+def liberar_modelos(modelos):
+    """Libera a referência que o save() de preparar_* adquiriu para cada arquivo modelo"""
+    for modelo in modelos:
+        armazenamento_deduplicado.delete(modelo.nome)
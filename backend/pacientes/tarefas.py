@@ -0,0 +1,103 @@
+# pacientes/tarefas.py
+"""Tarefas executadas pelo worker depois do upload (ver pacientes/fila.py)"""
+import csv
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.utils import timezone
+
+from .armazenamento import hash_blob
+from .cache import invalidar_paciente
+from .extracao import extrair_texto
+from .fila import tarefa
+from .imagens import gerar_miniaturas, remover_metadados
+from .importacao import CABECALHO_RELATORIO, importar_pacientes, ler_planilha
+from .models import Documento, Foto, Importacao
+
+
+def calcular_checksum(arquivo):
+    """SHA-256 do arquivo, lido em blocos para não carregar tudo na memória"""
+    # Arquivos deduplicados já têm o SHA-256 no nome
+    conhecido = hash_blob(arquivo.name)
+    if conhecido:
+        return conhecido
+    
+    sha256 = hashlib.sha256()
+    with arquivo.open('rb') as aberto:
+        for bloco in aberto.chunks():
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def _processar(modelo, pk, etapas):
+    """Executa as etapas atualizando status_processamento (registro apagado é ignorado)"""
+    objeto = modelo.objects.filter(pk=pk).first()
+    if objeto is None:
+        return
+
+    modelo.objects.filter(pk=pk).update(status_processamento='processando', ultima_atualizacao=timezone.now())
+    try:
+        for etapa in etapas:
+            etapa(objeto)
+    except Exception:
+        modelo.objects.filter(pk=pk).update(status_processamento='erro', ultima_atualizacao=timezone.now())
+        invalidar_paciente(objeto.paciente_id)
+        raise
+    modelo.objects.filter(pk=pk).update(
+        status_processamento='concluido', checksum=objeto.checksum, ultima_atualizacao=timezone.now(),
+    )
+    # update() não dispara signals: a página do paciente mostra o status, então invalida aqui
+    invalidar_paciente(objeto.paciente_id)
+
+
+def _atualizar_checksum_documento(documento):
+    documento.checksum = calcular_checksum(documento.arquivo)
+
+
+def _atualizar_checksum_foto(foto):
+    foto.checksum = calcular_checksum(foto.imagem)
+
+
+@tarefa('processar_documento')
+def processar_documento(documento_id):
+    # O texto só é extraído de novo quando o checksum muda
+    _processar(Documento, documento_id, [_atualizar_checksum_documento, extrair_texto])
+
+
+@tarefa('processar_foto')
+def processar_foto(foto_id):
+    # O checksum é calculado depois de remover o EXIF, sobre o arquivo final
+    _processar(Foto, foto_id, [remover_metadados, _atualizar_checksum_foto, gerar_miniaturas])
+
+
+# Reprocessar uma importação parcial só geraria erros de CPF duplicado: sem nova tentativa
+@tarefa('importar_planilha', max_tentativas=1)
+def importar_planilha(importacao_id):
+    importacao = Importacao.objects.select_related('medico').get(pk=importacao_id)
+    Importacao.objects.filter(pk=importacao_id).update(status='processando')
+
+    try:
+        # O relatório de erros vai para um arquivo temporário, linha a linha
+        with tempfile.TemporaryFile('w+', newline='', encoding='utf-8') as saida:
+            relatorio = csv.writer(saida)
+            relatorio.writerow(CABECALHO_RELATORIO)
+
+            with importacao.arquivo.open('rb') as arquivo:
+                resultado = importar_pacientes(
+                    importacao.medico, ler_planilha(arquivo, importacao.arquivo.name), relatorio
+                )
+
+            if resultado.com_erro:
+                saida.seek(0)
+                importacao.relatorio.save(f'importacao_{importacao.pk}_erros.csv', File(saida), save=False)
+    except Exception:
+        Importacao.objects.filter(pk=importacao_id).update(status='erro', concluida_em=timezone.now())
+        raise
+
+    importacao.status = 'concluida'
+    importacao.total_linhas = resultado.total
+    importacao.importados = resultado.importados
+    importacao.com_erro = resultado.com_erro
+    importacao.concluida_em = timezone.now()
+    importacao.save()
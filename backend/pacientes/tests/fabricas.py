@@ -0,0 +1,75 @@
+"""Dados de teste: médicos, pacientes, anexos e pastas de mídia temporárias"""
+import itertools
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from pacientes.cpf import completar_cpf, formatar_cpf
+from pacientes.models import Documento, Foto, Paciente
+from pacientes.sinteticos import jpeg_simples, pdf_simples
+
+
+_numeros = itertools.count(1)
+
+
+def isolar_midia(caso):
+    """MEDIA_ROOT, MIDIA_FRIA_ROOT e UPLOADS_PARCIAIS_DIR temporários até o fim do teste"""
+    raiz = Path(tempfile.mkdtemp(prefix='crm-medico-testes-'))
+    caso.addCleanup(shutil.rmtree, raiz, ignore_errors=True)
+    substituicao = override_settings(
+        MEDIA_ROOT=raiz / 'media', MIDIA_FRIA_ROOT=raiz / 'fria', UPLOADS_PARCIAIS_DIR=raiz / 'parciais',
+    )
+    substituicao.enable()
+    caso.addCleanup(substituicao.disable)
+    return raiz
+
+
+def criar_medico(username=None):
+    return User.objects.create_user(username or f'medico{next(_numeros)}', password='senha-de-teste')
+
+
+def nome_valido(prefixo, numero):
+    """Nome só com letras, como o PacienteForm exige ('Paciente', 12 -> 'Paciente Bc')"""
+    return f'{prefixo} ' + ''.join('abcdefghij'[int(digito)] for digito in str(numero)).capitalize()
+
+
+def cpf_valido(numero):
+    return formatar_cpf(completar_cpf(f'{numero:09d}'))
+
+
+def criar_paciente(medico, **campos):
+    numero = next(_numeros)
+    dados = {
+        'nome_completo': nome_valido('Paciente', numero),
+        'data_nascimento': date(1980, 1, 1),
+        'cpf': cpf_valido(100000000 + numero),
+        'sexo': 'F',
+        'telefone': f'(11) 9{numero:04d}-{numero % 10000:04d}',
+        'endereco': 'Rua das Flores, 10',
+        'cidade': 'São Paulo',
+        'estado': 'SP',
+        'cep': '01000-000',
+    }
+    dados.update(campos)
+    return Paciente.objects.create(medico=medico, **dados)
+
+
+def pdf(nome='exame.pdf', texto='Hemograma completo'):
+    return SimpleUploadedFile(nome, pdf_simples([texto]), content_type='application/pdf')
+
+
+def jpeg(nome='foto.jpg', cor=(196, 140, 120)):
+    return SimpleUploadedFile(nome, jpeg_simples(cor, 64, 48), content_type='image/jpeg')
+
+
+def criar_documento(paciente, arquivo=None, **campos):
+    return Documento.objects.create(paciente=paciente, titulo=campos.pop('titulo', 'Exame'), arquivo=arquivo or pdf(), **campos)
+
+
+def criar_foto(paciente, imagem=None, **campos):
+    return Foto.objects.create(paciente=paciente, titulo=campos.pop('titulo', 'Lesão'), imagem=imagem or jpeg(), **campos)
@@ -0,0 +1,44 @@
+import json
+
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes.forms import PacienteForm
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia
+
+
+class PacienteApiTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.paciente = criar_paciente(self.medico)
+        self.url = reverse('api_paciente', args=[self.paciente.pk])
+
+    def enviar(self, metodo, dados):
+        return self.client.generic(metodo, self.url, json.dumps(dados, default=str), content_type='application/json')
+
+    def test_put_sem_ativo_mantem_o_paciente_ativo(self):
+        dados = model_to_dict(self.paciente, fields=PacienteForm._meta.fields)
+        del dados['ativo']
+        dados['telefone'] = '(11) 98888-7777'
+
+        resposta = self.enviar('PUT', dados)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.paciente.refresh_from_db()
+        self.assertTrue(self.paciente.ativo)
+        self.assertEqual(self.paciente.telefone, '(11) 98888-7777')
+        self.assertEqual(self.client.get(reverse('api_pacientes')).json()['resultados'][0]['id'], self.paciente.pk)
+
+    def test_paciente_excluido_da_404(self):
+        documento = criar_documento(self.paciente)
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.enviar('PATCH', {'telefone': '(11) 97777-6666'}).status_code, 404)
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_documentos', args=[self.paciente.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_documento', args=[documento.pk])).status_code, 404)
@@ -0,0 +1,64 @@
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from pacientes.models import ArquivoBlob, Documento
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia, pdf
+
+
+class ArmazenamentoDeduplicadoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.paciente = criar_paciente(self.medico)
+
+    def test_mesmo_conteudo_compartilha_o_blob(self):
+        primeiro = criar_documento(self.paciente, pdf('a.pdf'))
+        segundo = criar_documento(self.paciente, pdf('b.pdf'))
+
+        self.assertTrue(primeiro.arquivo.name.startswith('blobs/'))
+        self.assertEqual(primeiro.arquivo.name, segundo.arquivo.name)
+        blob = ArquivoBlob.objects.get()
+        self.assertEqual(blob.referencias, 2)
+
+        storage = primeiro.arquivo.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            primeiro.delete()
+        self.assertEqual(ArquivoBlob.objects.get().referencias, 1)
+        self.assertTrue(storage.exists(segundo.arquivo.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segundo.delete()
+        self.assertFalse(ArquivoBlob.objects.exists())
+        self.assertFalse(storage.exists(segundo.arquivo.name))
+
+    def test_download_usa_o_nome_enviado(self):
+        documento = criar_documento(self.paciente, pdf('Hemograma março.pdf'))
+        self.assertEqual(documento.nome_original, 'Hemograma março.pdf')
+        self.client.force_login(self.medico)
+
+        resposta = self.client.get(reverse('documento_arquivo', args=[documento.pk]), {'download': 1})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            resposta['Content-Disposition'], "attachment; filename*=utf-8''Hemograma%20mar%C3%A7o.pdf"
+        )
+        self.assertNotIn(documento.arquivo.name.rsplit('/', 1)[-1], resposta['Content-Disposition'])
+
+
+class ReferenciaBlobTransacaoTests(TransactionTestCase):
+    """Sem transação externa (autocommit), como numa view"""
+
+    def setUp(self):
+        isolar_midia(self)
+        self.paciente = criar_paciente(criar_medico())
+
+    def test_save_que_falha_nao_deixa_referencia(self):
+        criar_documento(self.paciente, pdf('a.pdf'))
+
+        with self.assertRaises(IntegrityError):
+            Documento.objects.create(paciente_id=self.paciente.pk + 1000, titulo='Exame', arquivo=pdf('b.pdf'))
+
+        self.assertEqual(ArquivoBlob.objects.get().referencias, 1)
+        self.assertEqual(Documento.objects.count(), 1)
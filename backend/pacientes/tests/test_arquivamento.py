@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pacientes.armazenamento import hash_blob
+from pacientes.arquivamento import (
+    ConflitoRestauracao, arquivar_inativos, pasta_fria, restaurar_paciente,
+)
+from pacientes.models import (
+    ArquivoBlob, Documento, EstatisticasMedico, Foto, Paciente, PacienteArquivado, Remocao, Tarefa,
+)
+
+from .fabricas import criar_documento, criar_foto, criar_medico, criar_paciente, isolar_midia, pdf
+
+
+class ArquivamentoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.paciente = criar_paciente(self.medico)
+        self.documento = criar_documento(self.paciente, pdf('laudo.pdf', 'Laudo'))
+        self.foto = criar_foto(self.paciente)
+        self.paciente.desativar()
+        # Inativo há mais tempo que o prazo de arquivamento
+        Paciente.objects.filter(pk=self.paciente.pk).update(ultima_atualizacao=timezone.now() - timedelta(days=400))
+
+    def arquivar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return arquivar_inativos(dias=365)
+
+    def test_so_arquiva_inativos_antigos(self):
+        recente = criar_paciente(self.medico)
+        recente.desativar()
+        ativo = criar_paciente(self.medico)
+        Paciente.objects.filter(pk=ativo.pk).update(ultima_atualizacao=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(self.arquivar(), 1)
+        self.assertEqual(set(Paciente.objects.values_list('pk', flat=True)), {recente.pk, ativo.pk})
+
+    def test_arquivar_e_restaurar_mantem_ids_datas_e_arquivos(self):
+        conteudo = self.documento.arquivo.read()
+        self.documento.arquivo.close()
+        nome_blob = self.documento.arquivo.name
+
+        self.assertEqual(self.arquivar(), 1)
+
+        arquivado = PacienteArquivado.objects.get()
+        self.assertEqual((arquivado.pk, arquivado.total_documentos, arquivado.total_fotos), (self.paciente.pk, 1, 1))
+        self.assertFalse(Documento.objects.exists())
+        self.assertFalse(ArquivoBlob.objects.exists())
+        self.assertFalse(self.documento.arquivo.storage.exists(nome_blob))
+        self.assertTrue((pasta_fria(self.paciente.pk) / nome_blob).exists())
+        self.assertEqual(Remocao.objects.filter(objeto_id=self.paciente.pk, tipo='paciente').count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restaurado = restaurar_paciente(self.paciente.pk, reativar=True)
+
+        self.assertTrue(restaurado.ativo)
+        self.assertFalse(PacienteArquivado.objects.exists())
+        self.assertFalse(pasta_fria(self.paciente.pk).exists())
+        self.assertFalse(Remocao.objects.exists())
+
+        documento = Documento.objects.get()
+        self.assertEqual(documento.pk, self.documento.pk)
+        self.assertEqual(documento.data_upload, self.documento.data_upload)
+        self.assertEqual(documento.nome_original, 'laudo.pdf')
+        with documento.arquivo.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), conteudo)
+        self.assertEqual(ArquivoBlob.objects.get(pk=hash_blob(documento.arquivo.name)).referencias, 1)
+
+        self.assertEqual(Paciente.objects.get().data_cadastro, self.paciente.data_cadastro)
+        self.assertEqual(Foto.objects.get().pk, self.foto.pk)
+        self.assertTrue(Tarefa.objects.filter(tipo='processar_foto', parametros__foto_id=self.foto.pk).exists())
+        estatisticas = EstatisticasMedico.objects.get(medico=self.medico)
+        self.assertEqual((estatisticas.total_pacientes, estatisticas.total_documentos), (1, 1))
+
+    def test_restaurar_com_cpf_recadastrado_falha(self):
+        self.arquivar()
+        criar_paciente(criar_medico(), cpf=self.paciente.cpf)
+
+        with self.assertRaises(ConflitoRestauracao):
+            restaurar_paciente(self.paciente.pk)
+        self.assertTrue(PacienteArquivado.objects.exists())
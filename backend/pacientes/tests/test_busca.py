@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes.busca import obter_backend_busca, sugestoes
+from pacientes.models import Paciente
+
+from .fabricas import criar_medico, criar_paciente
+
+
+class BuscaTests(TestCase):
+    def setUp(self):
+        self.medico = criar_medico()
+        self.joao = criar_paciente(self.medico, nome_completo='João Conceição', cpf='529.982.247-25',
+                                   telefone='(11) 98765-4321')
+        self.maria = criar_paciente(self.medico, nome_completo='Maria Joana Souza', telefone='(21) 91234-5678')
+        self.inativo = criar_paciente(self.medico, nome_completo='Joaquim Silva', ativo=False)
+        self.client.force_login(self.medico)
+
+    def dashboard(self, busca):
+        resposta = self.client.get(reverse('dashboard'), {'busca': busca})
+        self.assertEqual(resposta.status_code, 200)
+        return [paciente.pk for paciente in resposta.context['pacientes']]
+
+    def test_nome_sem_acentos_e_por_prefixo(self):
+        self.assertEqual(self.dashboard('conceicao'), [self.joao.pk])
+        self.assertEqual(set(self.dashboard('jo')), {self.joao.pk, self.maria.pk})
+        # Só o início das palavras: trecho do meio não casa (ver a ajuda do dashboard)
+        self.assertEqual(self.dashboard('ana'), [])
+        self.assertContains(self.client.get(reverse('dashboard')), 'pelo início das palavras')
+
+    def test_cpf_e_telefone_por_prefixo_de_digitos(self):
+        self.assertEqual(self.dashboard('529.982'), [self.joao.pk])
+        self.assertEqual(self.dashboard('(21) 9123'), [self.maria.pk])
+
+    def test_trecho_de_digitos_quando_nenhum_prefixo_casa(self):
+        self.assertEqual(self.dashboard('98765-4321'), [self.joao.pk])
+        self.assertEqual(self.dashboard('982.247'), [self.joao.pk])
+        self.assertEqual(self.dashboard('5678'), [self.maria.pk])
+        # Com algum prefixo casando, o trecho no meio de outro número não entra
+        criar_paciente(self.medico, telefone='(98) 76543-2100')
+        self.assertNotIn(self.joao.pk, self.dashboard('98765'))
+
+    def test_busca_so_com_pontuacao_nao_lista_todos(self):
+        for busca in ('---', '().'):
+            with self.subTest(busca=busca):
+                self.assertEqual(self.dashboard(busca), [])
+
+    def test_sugestoes(self):
+        ativos = Paciente.objects.filter(medico=self.medico, ativo=True)
+
+        self.assertEqual([p.pk for p in sugestoes(ativos, 'jo', 10)], [self.joao.pk])
+        self.assertEqual([p.pk for p in sugestoes(ativos, '5299', 10)], [self.joao.pk])
+        self.assertEqual([p.pk for p in sugestoes(ativos, '2191', 10)], [self.maria.pk])
+        self.assertEqual(sugestoes(ativos, '--', 10), [])
+
+        resposta = self.client.get(reverse('api_sugestoes'), {'q': 'mar'})
+        self.assertEqual([item['id'] for item in resposta.json()['resultados']], [self.maria.pk])
+
+    def test_backend_ranqueia_so_os_pacientes_do_queryset(self):
+        criar_paciente(criar_medico(), nome_completo='João Conceição Filho')
+        pacientes = Paciente.objects.filter(medico=self.medico, ativo=True)
+
+        self.assertEqual([p.pk for p in obter_backend_busca().ranquear(pacientes, 'joao', 10)], [self.joao.pk])
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes.cache import chave_detalhes, estatisticas_cache, invalidar_paciente, obter_ou_gerar
+from pacientes.models import Paciente
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia
+
+
+class CacheFragmentosTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.paciente = criar_paciente(self.medico)
+        self.url = reverse('paciente_detalhes', args=[self.paciente.pk])
+
+    def test_acerto_e_falha(self):
+        gerados = []
+        chave = chave_detalhes(self.medico.pk, self.paciente)
+
+        for _ in range(3):
+            self.assertEqual(obter_ou_gerar(chave, lambda: gerados.append(1) or 'fragmento'), 'fragmento')
+
+        self.assertEqual(len(gerados), 1)
+        self.assertEqual(estatisticas_cache(), {'acertos': 2, 'falhas': 1})
+
+    def test_pagina_usa_o_cache_ate_um_documento_mudar(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(estatisticas_cache(), {'acertos': 1, 'falhas': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            documento = criar_documento(self.paciente, titulo='Hemograma')
+        self.assertContains(self.client.get(self.url), 'Hemograma')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.delete()
+        self.assertNotContains(self.client.get(self.url), 'Hemograma')
+        self.assertEqual(estatisticas_cache(), {'acertos': 1, 'falhas': 3})
+
+    def test_invalidar_nao_altera_o_paciente(self):
+        antes = Paciente.objects.get(pk=self.paciente.pk).ultima_atualizacao
+        chave = chave_detalhes(self.medico.pk, self.paciente)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_documento(self.paciente)
+        invalidar_paciente(self.paciente.pk)
+
+        self.assertNotEqual(chave_detalhes(self.medico.pk, self.paciente), chave)
+        self.assertEqual(Paciente.objects.get(pk=self.paciente.pk).ultima_atualizacao, antes)
+
+    def test_etag_da_lista_de_documentos_muda_com_inclusao_e_remocao(self):
+        url = reverse('api_documentos', args=[self.paciente.pk])
+        vazia = self.client.get(url)['ETag']
+
+        documento = criar_documento(self.paciente)
+        com_documento = self.client.get(url)['ETag']
+        self.assertNotEqual(com_documento, vazia)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=com_documento).status_code, 304)
+
+        documento.delete()
+        self.assertNotEqual(self.client.get(url)['ETag'], com_documento)
+        self.assertEqual(self.client.get(reverse('api_documentos', args=[0])).status_code, 404)
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pacientes import cpf
+from pacientes.cpf import ERRO_CADASTRADO, ERRO_DIGITOS, ERRO_REPETIDO, ERRO_TAMANHO, validar_cpfs
+
+from .fabricas import cpf_valido, criar_medico, criar_paciente
+
+
+class ValidarCpfsTests(TestCase):
+    def test_erros_na_ordem_da_entrada(self):
+        paciente = criar_paciente(criar_medico())
+        novo = cpf_valido(987654321)
+
+        resultados = validar_cpfs([
+            novo, '123', '123.456.789-00', '111.111.111-11', novo.replace('.', '').replace('-', ''), paciente.cpf,
+        ])
+
+        self.assertEqual([resultado.erro for resultado in resultados], [
+            '', ERRO_TAMANHO, ERRO_DIGITOS, ERRO_DIGITOS, ERRO_REPETIDO, ERRO_CADASTRADO,
+        ])
+        self.assertEqual(resultados[0].formatado, novo)
+
+    def test_excluir_pk_ignora_o_proprio_paciente(self):
+        paciente = criar_paciente(criar_medico())
+
+        self.assertTrue(validar_cpfs([paciente.cpf], excluir_pk=paciente.pk)[0].valido)
+
+    def test_consulta_de_duplicados_em_blocos(self):
+        medico = criar_medico()
+        cadastrados = [criar_paciente(medico).cpf for _ in range(3)]
+        cpfs = cadastrados + [cpf_valido(500000000 + numero) for numero in range(7)]
+
+        with mock.patch.object(cpf, 'TAMANHO_CONSULTA', 4):
+            with CaptureQueriesContext(connection) as capturadas:
+                resultados = validar_cpfs(cpfs)
+
+        # 10 CPFs distintos em blocos de 4: 3 consultas IN, não uma por CPF
+        self.assertEqual(len(capturadas), 3)
+        self.assertEqual(sum(resultado.erro == ERRO_CADASTRADO for resultado in resultados), 3)
@@ -0,0 +1,104 @@
+from django.test import SimpleTestCase, TestCase
+
+from pacientes.armazenamento import hash_blob
+from pacientes.cpf import digitos_conferem
+from pacientes.desempenho import Benchmark, comparar_resultados, percentil
+from pacientes.models import ArquivoBlob, Documento, EstatisticasMedico, Foto, Paciente
+from pacientes.normalizacao import somente_digitos
+from pacientes.sinteticos import GeradorPacientes, liberar_modelos, preparar_documentos, preparar_fotos
+
+from .fabricas import criar_medico, isolar_midia
+
+
+class EstatisticasTests(SimpleTestCase):
+    def test_percentil_nearest_rank(self):
+        valores = list(range(1, 101))
+
+        self.assertEqual(percentil([], 50), 0.0)
+        self.assertEqual(percentil(valores, 50), 50)
+        self.assertEqual(percentil(valores, 99), 99)
+        self.assertEqual(percentil([7], 99), 7)
+
+    def test_comparar_resultados(self):
+        anterior = {'dashboard': {'p50_ms': 10.0, 'p99_ms': 20.0, 'requisicoes_por_segundo': 100.0}}
+        atual = {
+            'dashboard': {'p50_ms': 5.0, 'p99_ms': 20.0, 'requisicoes_por_segundo': 200.0},
+            'nova_view': {'p50_ms': 1.0, 'p99_ms': 1.0, 'requisicoes_por_segundo': 1.0},
+        }
+
+        self.assertEqual(comparar_resultados(anterior, atual), [
+            ('dashboard', 'p50_ms', 10.0, 5.0, -50.0),
+            ('dashboard', 'p99_ms', 20.0, 20.0, 0.0),
+            ('dashboard', 'requisicoes_por_segundo', 100.0, 200.0, 100.0),
+        ])
+
+
+class DadosSinteticosTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medicos = [criar_medico(), criar_medico()]
+
+    def gerar(self, quantidade, semente=7):
+        documentos, fotos = preparar_documentos(), preparar_fotos()
+        self.addCleanup(liberar_modelos, documentos + fotos)
+        return GeradorPacientes(semente).gravar_lote(self.medicos, quantidade, documentos, fotos, 2, 1)
+
+    def test_pacientes_validos_com_anexos_e_referencias(self):
+        pacientes, documentos, fotos = self.gerar(40)
+
+        self.assertEqual(pacientes, 40)
+        self.assertEqual((Documento.objects.count(), Foto.objects.count()), (documentos, fotos))
+        cpfs = list(Paciente.objects.values_list('cpf', flat=True))
+        self.assertEqual(len(set(cpfs)), 40)
+        self.assertTrue(all(digitos_conferem(somente_digitos(cpf)) for cpf in cpfs))
+        self.assertEqual(Paciente.objects.filter(medico=self.medicos[1]).count(), 20)
+        self.assertFalse(Paciente.objects.filter(nome_busca='').exists())
+
+        # Cada blob conta os registros criados por bulk_create mais a referência do modelo
+        for blob in ArquivoBlob.objects.all():
+            usos = (
+                Documento.objects.filter(arquivo=blob.nome).count() + Foto.objects.filter(imagem=blob.nome).count()
+            )
+            self.assertEqual(blob.referencias, usos + 1, blob.nome)
+            self.assertEqual(hash_blob(blob.nome), blob.hash)
+
+    def test_mesma_semente_mesmos_dados(self):
+        self.gerar(5, semente=3)
+        primeira = list(Paciente.objects.order_by('pk').values_list('cpf', 'nome_completo', 'telefone'))
+        Paciente.objects.all().delete()
+
+        self.gerar(5, semente=3)
+        segunda = list(Paciente.objects.order_by('pk').values_list('cpf', 'nome_completo', 'telefone'))
+
+        self.assertEqual(primeira, segunda)
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        documentos, fotos = preparar_documentos(), preparar_fotos()
+        self.addCleanup(liberar_modelos, documentos + fotos)
+        GeradorPacientes(1).gravar_lote([self.medico], 30, documentos, fotos, 1, 1)
+        EstatisticasMedico.recalcular(self.medico.pk)
+
+    def test_cenarios_sem_falhas(self):
+        cenarios = ['dashboard', 'dashboard_busca_nome', 'dashboard_busca_cpf', 'sugestoes', 'paciente_detalhes',
+                    'documento_adicionar']
+        documentos_antes = Documento.objects.count()
+
+        resultados = Benchmark(self.medico, semente=1).executar(cenarios, 3, aquecimento=1)
+
+        self.assertEqual(set(resultados), set(cenarios))
+        for view, resultado in resultados.items():
+            with self.subTest(view=view):
+                self.assertEqual(resultado['falhas'], 0)
+                self.assertEqual(resultado['requisicoes'], 3)
+                self.assertGreater(resultado['consultas_por_requisicao'], 0)
+                self.assertLessEqual(resultado['p50_ms'], resultado['p99_ms'])
+        # Os documentos enviados pelos cenários são apagados no fim
+        self.assertEqual(Documento.objects.count(), documentos_antes)
+
+    def test_medico_sem_pacientes(self):
+        with self.assertRaises(ValueError):
+            Benchmark(criar_medico())
@@ -0,0 +1,134 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pacientes import diretorio
+from pacientes.diretorio import ORDENACOES, Diretorio, obter_diretorio
+
+from .fabricas import criar_medico, criar_paciente
+
+
+@override_settings(DIRETORIO_PACIENTES=True)
+class DiretorioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        diretorio._diretorios.clear()
+        self.addCleanup(diretorio._diretorios.clear)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pacientes = [
+                criar_paciente(self.medico, telefone=f'(11) 9{numero:04d}-000{numero}') for numero in range(1, 6)
+            ]
+            criar_paciente(self.medico, ativo=False)
+
+    def assertListasOrdenadas(self, atual):
+        montado = Diretorio(list(atual.por_id.values()), atual.versao)
+        for lista, _ in ORDENACOES:
+            self.assertEqual(
+                [entrada.id for entrada in getattr(atual, lista)], [entrada.id for entrada in getattr(montado, lista)]
+            )
+
+    def resultados(self, busca='', cursor=None):
+        """Dashboard e sugestões, para comparar o diretório com a consulta ao banco"""
+        parametros = {'busca': busca, **({'cursor': cursor} if cursor else {})}
+        dashboard = self.client.get(reverse('dashboard'), parametros).context
+        sugestoes = self.client.get(reverse('api_sugestoes'), {'q': busca}).json()['resultados']
+        return (
+            [paciente.pk for paciente in dashboard['pacientes']], dashboard['proxima_pagina_url'],
+            [item['id'] for item in sugestoes],
+        )
+
+    def test_mesmos_resultados_que_o_banco(self):
+        cpf = self.pacientes[2].cpf_digitos
+        buscas = [('', None), ('', 'cursor-invalido'), (cpf[:6], None), ('(11) 90003', None), ('0003-0003', None), ('---', None)]
+        with mock.patch('pacientes.views.PACIENTES_POR_PAGINA', 2):
+            primeira = self.resultados()
+            cursor = primeira[1].split('cursor=')[1]
+            for busca, cursor_busca in buscas + [('', cursor)]:
+                with self.subTest(busca=busca, cursor=cursor_busca):
+                    com_diretorio = self.resultados(busca, cursor_busca)
+                    with self.settings(DIRETORIO_PACIENTES=False):
+                        self.assertEqual(com_diretorio, self.resultados(busca, cursor_busca))
+        self.assertEqual(self.resultados('---')[0], [])
+
+    def test_alteracoes_pelos_signals_sem_remontar(self):
+        antes = obter_diretorio(self.medico.pk)
+        with mock.patch.object(diretorio, '_carregar', side_effect=AssertionError('remontou')):
+            with self.captureOnCommitCallbacks(execute=True):
+                novo = criar_paciente(self.medico, nome_completo='Aaron Abreu')
+            with self.captureOnCommitCallbacks(execute=True):
+                self.pacientes[0].desativar()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.pacientes[1].nome_completo = 'Zuleica Zanetti'
+                self.pacientes[1].save()
+
+            depois = obter_diretorio(self.medico.pk)
+
+        self.assertEqual(depois.versao, antes.versao + 3)
+        self.assertEqual(len(antes), 5)  # o diretório anterior não muda (leitores sem trava)
+        self.assertEqual(set(depois.por_id), {novo.pk} | {paciente.pk for paciente in self.pacientes[1:]})
+        self.assertEqual(depois.por_nome[0].id, novo.pk)
+        self.assertEqual(depois.por_nome[-1].nome_completo, 'Zuleica Zanetti')
+        self.assertListasOrdenadas(depois)
+
+    def test_lru_por_medico(self):
+        outros = [criar_medico() for _ in range(2)]
+        with self.settings(DIRETORIO_PACIENTES_MAXIMO_MEDICOS=2):
+            for medico in [self.medico] + outros:
+                obter_diretorio(medico.pk)
+            self.assertEqual(list(diretorio._diretorios), [outros[0].pk, outros[1].pk])
+
+            obter_diretorio(outros[0].pk)  # usado de novo: vira o mais recente
+            obter_diretorio(self.medico.pk)
+            self.assertEqual(list(diretorio._diretorios), [outros[0].pk, self.medico.pk])
+
+
+@override_settings(DIRETORIO_PACIENTES=True)
+class DiretorioCompartilhadoTests(TestCase):
+    """Cache compartilhado entre processos (arquivo): um processo atrasado aplica as alterações publicadas"""
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='crm-medico-cache-')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        substituicao = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pasta,
+        }})
+        substituicao.enable()
+        self.addCleanup(substituicao.disable)
+        diretorio._diretorios.clear()
+        self.addCleanup(diretorio._diretorios.clear)
+        self.medico = criar_medico()
+        self.pacientes = [criar_paciente(self.medico) for _ in range(3)]
+
+    def test_outro_processo_aplica_as_alteracoes_publicadas(self):
+        atrasado = obter_diretorio(self.medico.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = criar_paciente(self.medico)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pacientes[0].desativar()
+        # Outro processo: ainda com o diretório de antes das alterações
+        diretorio._diretorios[self.medico.pk] = atrasado
+
+        with mock.patch.object(diretorio, '_carregar', side_effect=AssertionError('remontou')):
+            atual = obter_diretorio(self.medico.pk)
+
+        self.assertEqual(atual.versao, atrasado.versao + 2)
+        self.assertEqual(set(atual.por_id), {novo.pk, self.pacientes[1].pk, self.pacientes[2].pk})
+
+    def test_remonta_quando_falta_alteracao(self):
+        atrasado = obter_diretorio(self.medico.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_paciente(self.medico)
+        diretorio.invalidar_diretorio(self.medico.pk)  # sem alteração publicada
+        diretorio._diretorios[self.medico.pk] = atrasado
+
+        with mock.patch.object(diretorio, '_carregar', wraps=diretorio._carregar) as carregar:
+            atual = obter_diretorio(self.medico.pk)
+
+        carregar.assert_called_once()
+        self.assertEqual(len(atual), 4)
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes.models import EstatisticasMedico, Paciente
+
+from .fabricas import criar_documento, criar_foto, criar_medico, criar_paciente, isolar_midia
+
+
+class EstatisticasMedicoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.paciente = criar_paciente(self.medico)
+
+    def totais(self):
+        estatisticas = EstatisticasMedico.objects.get(medico=self.medico)
+        return estatisticas.total_pacientes, estatisticas.total_documentos, estatisticas.total_fotos
+
+    def assertTotais(self, esperados):
+        self.assertEqual(self.totais(), esperados)
+        # Os contadores incrementais batem com a contagem completa
+        self.assertEqual(self.totais(), tuple(
+            getattr(EstatisticasMedico.recalcular(self.medico.pk), campo)
+            for campo in ('total_pacientes', 'total_documentos', 'total_fotos')
+        ))
+
+    def test_criacao_conta_so_ativos(self):
+        criar_paciente(self.medico, ativo=False)
+        criar_paciente(criar_medico())  # de outro médico
+        criar_documento(self.paciente)
+        criar_foto(self.paciente)
+        criar_foto(self.paciente)
+
+        self.assertTotais((1, 1, 2))
+
+    def test_desativar_e_reativar(self):
+        criar_paciente(self.medico)
+
+        self.paciente.desativar()
+        self.assertTotais((1, 0, 0))
+        self.paciente.desativar()  # de novo: sem mudança de estado, sem novo desconto
+        self.assertTotais((1, 0, 0))
+
+        self.paciente.reativar()
+        self.assertTotais((2, 0, 0))
+
+    def test_remocao(self):
+        documento = criar_documento(self.paciente)
+        foto = criar_foto(self.paciente)
+        inativo = criar_paciente(self.medico, ativo=False)
+
+        documento.delete()
+        foto.delete()
+        inativo.delete()
+        self.assertTotais((1, 0, 0))
+
+        Paciente.objects.get(pk=self.paciente.pk).delete()
+        self.assertTotais((0, 0, 0))
+
+    def test_contador_criado_na_primeira_leitura(self):
+        EstatisticasMedico.objects.filter(medico=self.medico).delete()
+        criar_documento(self.paciente)  # sem contador: calcula tudo de uma vez
+
+        self.assertTotais((1, 1, 0))
+
+        self.client.force_login(self.medico)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['estatisticas'].total_documentos, 1)
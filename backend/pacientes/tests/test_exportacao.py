@@ -0,0 +1,70 @@
+import csv
+import io
+import zipfile
+
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes.exportacao import gerar_zip
+
+from .fabricas import criar_documento, criar_foto, criar_medico, criar_paciente, isolar_midia, jpeg, pdf
+
+
+class ExportacaoZipTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.paciente = criar_paciente(self.medico)
+
+    def abrir_zip(self, **parametros):
+        return zipfile.ZipFile(io.BytesIO(b''.join(gerar_zip(self.medico, 'csv', **parametros))))
+
+    def test_arquivos_com_o_nome_enviado_sem_repetir(self):
+        primeiro = criar_documento(self.paciente, pdf('Exame.pdf', 'Primeiro'))
+        segundo = criar_documento(self.paciente, pdf('exame.pdf', 'Segundo'))
+        outro = criar_paciente(self.medico)
+        criar_documento(outro, pdf('exame.pdf', 'De outro paciente'))
+        criar_foto(self.paciente, jpeg('lesao.jpg'))
+        criar_documento(criar_paciente(criar_medico()), pdf('alheio.pdf'))
+
+        pacote = self.abrir_zip()
+
+        pasta = f'documentos/{self.paciente.pk}'
+        self.assertEqual(sorted(pacote.namelist()), sorted([
+            'pacientes.csv', 'arquivos.csv', f'{pasta}/Exame.pdf', f'{pasta}/exame_2.pdf',
+            f'documentos/{outro.pk}/exame.pdf', f'fotos/{self.paciente.pk}/lesao.jpg',
+        ]))
+        with primeiro.arquivo.open('rb') as arquivo:
+            self.assertEqual(pacote.read(f'{pasta}/Exame.pdf'), arquivo.read())
+        with segundo.arquivo.open('rb') as arquivo:
+            self.assertEqual(pacote.read(f'{pasta}/exame_2.pdf'), arquivo.read())
+
+        indice = list(csv.reader(io.StringIO(pacote.read('arquivos.csv').decode('utf-8'))))
+        self.assertEqual(indice[0], ['tipo', 'paciente_id', 'titulo', 'caminho'])
+        self.assertEqual(
+            {linha[3] for linha in indice[1:]}, set(pacote.namelist()) - {'pacientes.csv', 'arquivos.csv'}
+        )
+
+    def test_arquivo_ausente_no_storage_e_ignorado(self):
+        documento = criar_documento(self.paciente)
+        criar_foto(self.paciente)
+        documento.arquivo.storage.delete(documento.arquivo.name)
+
+        with self.assertLogs('pacientes.exportacao', 'WARNING'):
+            pacote = self.abrir_zip()
+
+        self.assertEqual(pacote.namelist(), ['pacientes.csv', 'arquivos.csv', f'fotos/{self.paciente.pk}/foto.jpg'])
+
+    def test_view_com_e_sem_arquivos(self):
+        criar_documento(self.paciente)
+        self.client.force_login(self.medico)
+
+        resposta = self.client.get(reverse('exportacao'), {'formato': 'jsonl', 'arquivos': '1'})
+        pacote = zipfile.ZipFile(io.BytesIO(b''.join(resposta.streaming_content)))
+        self.assertEqual(resposta['Content-Type'], 'application/zip')
+        self.assertIn(f'documentos/{self.paciente.pk}/exame.pdf', pacote.namelist())
+        self.assertIn(self.paciente.cpf, pacote.read('pacientes.jsonl').decode('utf-8'))
+
+        resposta = self.client.get(reverse('exportacao'))
+        self.assertTrue(resposta['Content-Disposition'].endswith('.csv"'))
+        self.assertIn(self.paciente.cpf, b''.join(resposta.streaming_content).decode('utf-8-sig'))
@@ -0,0 +1,63 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes import extracao
+from pacientes.models import Documento
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia, pdf
+
+
+class ExtracaoTextoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.paciente = criar_paciente(self.medico)
+        self.outro = criar_paciente(self.medico)
+        self.documentos = [
+            criar_documento(paciente, pdf('laudo.pdf', 'Glicemia protocolo 48213'), titulo='Laudo')
+            for paciente in (self.paciente, self.outro)
+        ]
+
+    def extrair(self):
+        saida = io.StringIO()
+        call_command('extrair_textos_documentos', stdout=saida)
+        return saida.getvalue()
+
+    def dashboard(self, busca, **parametros):
+        resposta = self.client.get(reverse('dashboard'), {'busca': busca, **parametros})
+        return {paciente.pk for paciente in resposta.context['pacientes']}
+
+    def test_mesmo_conteudo_e_extraido_uma_vez(self):
+        with mock.patch.object(extracao, 'extrair_texto_pdf', wraps=extracao.extrair_texto_pdf) as extrair_pdf:
+            self.assertIn('2 documento(s) processado(s)', self.extrair())
+
+        extrair_pdf.assert_called_once()
+        textos = Documento.objects.values_list('texto_extraido', 'texto_checksum', 'checksum')
+        self.assertEqual(len(set(textos)), 1)
+        texto, texto_checksum, checksum = textos[0]
+        self.assertIn('48213', texto)
+        self.assertEqual(texto_checksum, checksum)
+
+        # Já atualizados: a segunda execução não relê nada
+        self.assertIn('0 documento(s) processado(s)', self.extrair())
+
+    def test_busca_no_conteudo_dos_documentos(self):
+        self.extrair()
+        ambos = {self.paciente.pk, self.outro.pk}
+
+        self.assertEqual(self.dashboard('glicemia', documentos='1'), ambos)
+        self.assertEqual(self.dashboard('glicemia'), set())
+        # Só números também procuram nos documentos, além de CPF/telefone
+        self.assertEqual(self.dashboard('48213', documentos='1'), ambos)
+        self.assertEqual(self.dashboard('48213'), set())
+        self.assertEqual(self.dashboard(self.paciente.cpf, documentos='1'), {self.paciente.pk})
+        self.assertEqual(self.dashboard('---', documentos='1'), set())
+
+        # Documento de paciente de outro médico não entra
+        criar_documento(criar_paciente(criar_medico()), pdf('outro.pdf', 'Glicemia'), titulo='Glicemia')
+        self.assertEqual(self.dashboard('glicemia', documentos='1'), ambos)
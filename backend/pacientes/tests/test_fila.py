@@ -0,0 +1,94 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from pacientes import fila
+from pacientes.models import Tarefa
+
+
+class RecuperarTravadasTests(TestCase):
+    def criar(self, renovada_ha, **campos):
+        momento = timezone.now() - renovada_ha
+        return Tarefa.objects.create(
+            tipo='teste', status='processando', iniciada_em=momento, renovada_em=momento, **campos
+        )
+
+    def test_tarefa_renovada_continua_processando(self):
+        # Começou há muito tempo, mas o worker continua renovando
+        tarefa = self.criar(timedelta(seconds=10), tentativas=1)
+        Tarefa.objects.filter(pk=tarefa.pk).update(iniciada_em=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(fila.recuperar_travadas(), (0, 0))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'processando')
+
+    def test_abandonada_volta_para_a_fila(self):
+        tarefa = self.criar(fila.PRAZO_RENOVACAO * 2, tentativas=1, max_tentativas=3)
+
+        self.assertEqual(fila.recuperar_travadas(), (1, 0))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'pendente')
+
+    def test_abandonada_sem_tentativas_fica_com_erro(self):
+        tarefa = self.criar(fila.PRAZO_RENOVACAO * 2, tentativas=1, max_tentativas=1)
+
+        self.assertEqual(fila.recuperar_travadas(), (0, 1))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'erro')
+        self.assertIsNone(fila.reservar_proxima())
+
+
+class ReservaTests(TestCase):
+    def test_nao_reserva_tarefa_sem_tentativas(self):
+        esgotada = Tarefa.objects.create(tipo='teste', tentativas=1, max_tentativas=1)
+        liberada = Tarefa.objects.create(tipo='teste')
+
+        self.assertEqual(fila.reservar_proxima().pk, liberada.pk)
+        self.assertIsNone(fila.reservar_proxima())
+        esgotada.refresh_from_db()
+        self.assertEqual(esgotada.status, 'pendente')
+
+    def test_executar_conclui_e_reagenda_erros(self):
+        chamadas = []
+
+        @fila.tarefa('teste_falha', max_tentativas=2)
+        def falhar(**parametros):
+            chamadas.append(parametros)
+            raise RuntimeError('falhou')
+
+        self.addCleanup(fila.REGISTRO_TAREFAS.pop, 'teste_falha')
+        tarefa = fila.enfileirar('teste_falha', valor=1)
+
+        with self.assertLogs('pacientes.fila', 'ERROR'):
+            self.assertFalse(fila.executar(fila.reservar_proxima()))
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('pendente', 1))
+        self.assertIsNotNone(tarefa.renovada_em)
+
+        Tarefa.objects.filter(pk=tarefa.pk).update(executar_apos=timezone.now())
+        with self.assertLogs('pacientes.fila', 'ERROR'):
+            self.assertFalse(fila.executar(fila.reservar_proxima()))
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.tentativas), ('erro', 2))
+        self.assertEqual(chamadas, [{'valor': 1}, {'valor': 1}])
+
+
+class RenovacaoTests(TransactionTestCase):
+    def test_renova_enquanto_a_tarefa_roda(self):
+        renovacoes = []
+
+        @fila.tarefa('teste_lenta')
+        def lenta():
+            inicio = Tarefa.objects.get(tipo='teste_lenta').renovada_em
+            time.sleep(0.3)
+            renovacoes.append(Tarefa.objects.get(tipo='teste_lenta').renovada_em > inicio)
+
+        self.addCleanup(fila.REGISTRO_TAREFAS.pop, 'teste_lenta')
+        fila.enfileirar('teste_lenta')
+
+        with mock.patch.object(fila, 'INTERVALO_RENOVACAO', timedelta(seconds=0.05)):
+            self.assertTrue(fila.executar(fila.reservar_proxima()))
+        self.assertEqual(renovacoes, [True])
@@ -0,0 +1,88 @@
+import csv
+import io
+from unittest import mock
+
+from django.test import TestCase
+
+from pacientes import cpf, importacao
+from pacientes.importacao import importar_pacientes, ler_csv
+from pacientes.models import EstatisticasMedico, Paciente
+
+from .fabricas import cpf_valido, criar_medico, criar_paciente, nome_valido
+
+
+CABECALHO = 'Nome Completo;Data de Nascimento;CPF;Sexo;Telefone;Endereço;Cidade;Estado;CEP;Ativo\n'
+
+
+def linha(numero, **campos):
+    valores = {
+        'nome': nome_valido('Importado', numero), 'nascimento': '1975-05-20', 'cpf': cpf_valido(300000000 + numero),
+        'sexo': 'M', 'telefone': f'(21) 98888-{numero:04d}', 'ativo': '',
+    }
+    valores.update(campos)
+    return (
+        f'{valores["nome"]};{valores["nascimento"]};{valores["cpf"]};{valores["sexo"]};{valores["telefone"]};'
+        f'Rua A, 1;Rio de Janeiro;RJ;20000-000;{valores["ativo"]}\n'
+    )
+
+
+def planilha(*linhas):
+    return ler_csv(io.BytesIO((CABECALHO + ''.join(linhas)).encode('utf-8')))
+
+
+class ImportacaoTests(TestCase):
+    def setUp(self):
+        self.medico = criar_medico()
+
+    def test_importa_em_lotes_e_relata_erros(self):
+        existente = criar_paciente(criar_medico())
+        saida = io.StringIO()
+        linhas = planilha(
+            *[linha(numero) for numero in range(1, 6)],
+            linha(6, cpf='123.456.789-00'),
+            linha(7, cpf=existente.cpf),
+            linha(8, cpf=cpf_valido(300000001)),  # repete a linha 2
+            linha(9, ativo='não'),
+        )
+
+        resultado = importar_pacientes(self.medico, linhas, csv.writer(saida), tamanho_lote=2)
+
+        self.assertEqual((resultado.total, resultado.importados, resultado.com_erro), (9, 6, 3))
+        erros = list(csv.reader(io.StringIO(saida.getvalue())))
+        self.assertEqual([numero for numero, campo, _ in erros], ['7', '8', '9'])
+        self.assertEqual({campo for _, campo, _ in erros}, {'cpf'})
+
+        importados = Paciente.objects.filter(medico=self.medico)
+        self.assertEqual(importados.count(), 6)
+        self.assertEqual(importados.filter(ativo=False).count(), 1)
+        self.assertEqual(importados.get(nome_completo='Importado D').nome_busca, 'importado d')
+        self.assertEqual(EstatisticasMedico.objects.get(medico=self.medico).total_pacientes, 5)
+
+    def test_cpf_cadastrado_durante_o_lote_grava_um_a_um(self):
+        # Simula outro cadastro entre a checagem dos CPFs e o bulk_create
+        concorrente = cpf_valido(300000002)
+        criar_paciente(criar_medico(), cpf=concorrente)
+        saida = io.StringIO()
+
+        with mock.patch.object(cpf, 'cpfs_existentes', return_value=set()):
+            resultado = importar_pacientes(
+                self.medico, planilha(*[linha(numero) for numero in range(1, 5)]), csv.writer(saida),
+            )
+
+        self.assertEqual((resultado.importados, resultado.com_erro), (3, 1))
+        self.assertEqual(Paciente.objects.filter(medico=self.medico).count(), 3)
+        self.assertEqual(next(csv.reader(io.StringIO(saida.getvalue())))[:2], ['3', 'cpf'])
+
+    def test_valida_os_cpfs_uma_vez_por_lote(self):
+        saida = io.StringIO()
+        linhas = planilha(*[linha(numero) for numero in range(1, 6)], linha(6, cpf=cpf_valido(300000004)))
+
+        with mock.patch.object(importacao, 'validar_cpfs', wraps=importacao.validar_cpfs) as validar:
+            resultado = importar_pacientes(self.medico, linhas, csv.writer(saida), tamanho_lote=3)
+
+        self.assertEqual(validar.call_count, 2)
+        self.assertEqual((resultado.importados, resultado.com_erro), (5, 1))
+        # Repetido dentro do mesmo lote (linhas 5 e 7)
+        self.assertEqual(list(csv.reader(io.StringIO(saida.getvalue()))), [
+            ['7', 'cpf', f'CPF {cpf_valido(300000004)}: {cpf.ERRO_REPETIDO}'],
+        ])
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pacientes.arquivamento import arquivar_inativos
+from pacientes.forms import PacienteForm
+from pacientes.models import EstatisticasMedico, Paciente, PacienteArquivado
+from pacientes.orcamento import OrcamentoConsultasMixin
+
+from .fabricas import cpf_valido, criar_documento, criar_medico, criar_paciente, isolar_midia, nome_valido
+
+
+class PacientesInativosTests(OrcamentoConsultasMixin, TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.paciente = criar_paciente(self.medico)
+        self.paciente.desativar()
+
+    def arquivar(self):
+        Paciente.objects.filter(pk=self.paciente.pk).update(ultima_atualizacao=timezone.now() - timedelta(days=400))
+        with self.captureOnCommitCallbacks(execute=True):
+            arquivar_inativos(dias=365)
+        return PacienteArquivado.objects.get(pk=self.paciente.pk)
+
+    def dados_cadastro(self, cpf):
+        dados = model_to_dict(self.paciente, fields=PacienteForm._meta.fields)
+        dados.update(cpf=cpf, nome_completo=nome_valido('Outro', 1), ativo='on')
+        return {campo: valor for campo, valor in dados.items() if valor is not None}
+
+    def test_lista_e_reativa_paciente_excluido(self):
+        criar_paciente(criar_medico()).desativar()  # de outro médico: não aparece
+
+        resposta = self.client.get(reverse('pacientes_inativos'))
+        self.assertEqual([paciente.pk for paciente in resposta.context['inativos']], [self.paciente.pk])
+
+        resposta = self.client.post(reverse('paciente_reativar', args=[self.paciente.pk]))
+
+        self.assertRedirects(resposta, reverse('paciente_detalhes', args=[self.paciente.pk]))
+        self.paciente.refresh_from_db()
+        self.assertTrue(self.paciente.ativo)
+        self.assertEqual(EstatisticasMedico.obter(self.medico).total_pacientes, 1)
+
+    def test_reativar_exige_post_e_o_proprio_medico(self):
+        url = reverse('paciente_reativar', args=[self.paciente.pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+        self.client.force_login(criar_medico())
+        self.assertEqual(self.client.post(url).status_code, 404)
+        self.assertFalse(Paciente.objects.get(pk=self.paciente.pk).ativo)
+
+    def test_cadastro_com_cpf_de_paciente_excluido_oferece_reativar(self):
+        resposta = self.client.post(reverse('paciente_criar'), self.dados_cadastro(self.paciente.cpf))
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['form'].paciente_inativo.pk, self.paciente.pk)
+        self.assertContains(resposta, reverse('paciente_reativar', args=[self.paciente.pk]))
+        self.assertEqual(Paciente.objects.filter(cpf=self.paciente.cpf).count(), 1)
+
+    def test_restaura_paciente_arquivado(self):
+        criar_documento(Paciente.objects.get(pk=self.paciente.pk))
+        arquivado = self.arquivar()
+
+        resposta = self.client.get(reverse('pacientes_inativos'), {'busca': self.paciente.cpf[:7]})
+        self.assertEqual([item.pk for item in resposta.context['arquivados']], [arquivado.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self.client.post(reverse('paciente_restaurar', args=[arquivado.pk]))
+
+        self.assertRedirects(resposta, reverse('paciente_detalhes', args=[self.paciente.pk]))
+        restaurado = Paciente.objects.get(pk=self.paciente.pk)
+        self.assertTrue(restaurado.ativo)
+        self.assertEqual(restaurado.documentos.count(), 1)
+        self.assertFalse(PacienteArquivado.objects.exists())
+
+    def test_cadastro_com_cpf_de_paciente_arquivado_oferece_restaurar(self):
+        arquivado = self.arquivar()
+
+        resposta = self.client.post(reverse('paciente_criar'), self.dados_cadastro(arquivado.cpf))
+
+        self.assertEqual(resposta.context['form'].paciente_arquivado.pk, arquivado.pk)
+        self.assertContains(resposta, reverse('paciente_restaurar', args=[arquivado.pk]))
+        self.assertFalse(Paciente.objects.filter(cpf=arquivado.cpf).exists())
+
+    def test_cadastro_com_cpf_novo_continua_funcionando(self):
+        resposta = self.client.post(reverse('paciente_criar'), self.dados_cadastro(cpf_valido(987654321)))
+
+        self.assertEqual(resposta.status_code, 302)
+        self.assertTrue(Paciente.objects.filter(cpf=cpf_valido(987654321), medico=self.medico).exists())
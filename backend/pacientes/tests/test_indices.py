@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from pacientes.management.commands.verificar_indices import Command
+from pacientes.models import Documento, Foto, Paciente
+from .fabricas import criar_medico, criar_paciente
+
+
+class VerificarIndicesTests(TestCase):
+    def test_consultas_principais_usam_os_indices(self):
+        # Vários médicos, com alguns inativos, e estatísticas em dia (ver a migração 0018)
+        for _ in range(4):
+            medico = criar_medico()
+            for numero in range(20):
+                criar_paciente(medico, ativo=numero % 5 != 0)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        saida = StringIO()
+
+        call_command('verificar_indices', stdout=saida)
+
+        self.assertNotIn('FALHOU', saida.getvalue())
+
+    def test_indices_esperados_existem_nos_modelos(self):
+        # Um índice renomeado ou removido deixaria a verificação acusando falha sem motivo
+        declarados = {indice.name for modelo in (Paciente, Documento, Foto) for indice in modelo._meta.indexes}
+        esperados = {indice for _, _, indices in Command().consultas() for indice in indices}
+
+        self.assertLessEqual(esperados, declarados)
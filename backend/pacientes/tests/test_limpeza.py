@@ -0,0 +1,86 @@
+import io
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from pacientes.imagens import nome_variante
+from pacientes.limpeza import ARQUIVO_ESTADO, carregar_estado
+
+from .fabricas import criar_documento, criar_foto, criar_medico, criar_paciente, isolar_midia
+
+
+class LimparMidiaOrfaTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.raiz = Path(settings.MEDIA_ROOT)
+        paciente = criar_paciente(criar_medico())
+        self.documento = criar_documento(paciente)
+        self.foto = criar_foto(paciente)
+        self.miniatura = self.criar(nome_variante(self.foto.imagem.name, 240, 'webp'))
+        self.orfaos = [self.criar(f'antigos/orfao_{numero}.pdf') for numero in range(1, 6)]
+        for caminho in self.raiz.rglob('*'):
+            if caminho.is_file():
+                os.utime(caminho, (time.time() - 2 * 3600,) * 2)
+
+    def criar(self, nome):
+        caminho = self.raiz / nome
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_bytes(b'x' * 10)
+        return caminho
+
+    def limpar(self, *argumentos):
+        saida = io.StringIO()
+        call_command('limpar_midia_orfa', *argumentos, stdout=saida)
+        return saida.getvalue()
+
+    def assertUsadosMantidos(self):
+        for caminho in (Path(self.documento.arquivo.path), Path(self.foto.imagem.path), self.miniatura):
+            self.assertTrue(caminho.exists(), caminho)
+
+    def test_remove_so_os_orfaos_antigos(self):
+        recente = self.criar('antigos/enviando.pdf')
+
+        self.assertIn('seriam removido(s)', self.limpar('--simular'))
+        self.assertTrue(all(caminho.exists() for caminho in self.orfaos))
+
+        saida = self.limpar()
+
+        self.assertIn('5 órfão(s) removido(s)', saida)
+        self.assertFalse(any(caminho.exists() for caminho in self.orfaos))
+        self.assertTrue(recente.exists())  # dentro da idade mínima: pode ser um upload em andamento
+        self.assertUsadosMantidos()
+
+        os.utime(recente, (time.time() - 2 * 3600,) * 2)
+        self.assertIn('1 órfão(s) removido(s)', self.limpar())
+        self.assertFalse(recente.exists())
+
+    def test_retoma_de_onde_parou(self):
+        saida = self.limpar('--limite', '2', '--lote', '1')
+
+        self.assertIn('Varredura incompleta', saida)
+        self.assertEqual(carregar_estado(str(self.raiz)), ('antigos', 'orfao_2.pdf'))
+        self.assertEqual([caminho.exists() for caminho in self.orfaos], [False, False, True, True, True])
+
+        saida = self.limpar('--limite', '2', '--lote', '1')
+        self.assertIn('Retomando após antigos/orfao_2.pdf', saida)
+        self.assertIn('2 arquivo(s) conferido(s), 2 órfão(s)', saida)
+        self.assertEqual(carregar_estado(str(self.raiz)), ('antigos', 'orfao_4.pdf'))
+
+        self.limpar()
+        self.assertFalse(any(caminho.exists() for caminho in self.orfaos))
+        self.assertFalse((self.raiz / ARQUIVO_ESTADO).exists())
+        self.assertUsadosMantidos()
+
+    def test_reiniciar_ignora_o_estado(self):
+        self.limpar('--limite', '2', '--lote', '1')
+        self.criar('antigos/orfao_0.pdf')  # antes do ponto salvo
+
+        saida = self.limpar('--reiniciar', '--idade-minima', '0')
+
+        self.assertNotIn('Retomando', saida)
+        self.assertFalse((self.raiz / 'antigos/orfao_0.pdf').exists())
+        self.assertUsadosMantidos()
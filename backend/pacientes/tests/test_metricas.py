@@ -0,0 +1,87 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pacientes.metricas import Histograma
+
+from .fabricas import criar_medico, criar_paciente
+
+
+class HistogramaTests(TestCase):
+    def test_baldes_acumulados(self):
+        histograma = Histograma('teste_segundos', 'Teste', (0.1, 1))
+        for valor in (0.05, 0.1, 0.5, 3):
+            histograma.observar('dashboard', valor)
+
+        self.assertEqual(histograma.exportar(), [
+            '# HELP teste_segundos Teste',
+            '# TYPE teste_segundos histogram',
+            'teste_segundos_bucket{view="dashboard",le="0.1"} 2',
+            'teste_segundos_bucket{view="dashboard",le="1"} 3',
+            'teste_segundos_bucket{view="dashboard",le="+Inf"} 4',
+            'teste_segundos_sum{view="dashboard"} 3.65',
+            'teste_segundos_count{view="dashboard"} 4',
+        ])
+
+
+@override_settings(METRICAS_TOKEN='segredo-do-scraper')
+class MetricasViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('metricas')
+        self.medico = criar_medico()
+
+    def total(self, texto, metrica, view):
+        encontrado = re.search(rf'^{metrica}_count{{view="{view}"}} (\d+)$', texto, re.MULTILINE)
+        return int(encontrado.group(1)) if encontrado else 0
+
+    def test_so_staff_ou_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer errado').status_code, 403)
+
+        self.client.force_login(self.medico)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.medico.is_staff = True
+        self.medico.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.client.logout()
+        resposta = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer segredo-do-scraper')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_sem_token_configurado_bearer_vazio_nao_passa(self):
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    def test_histogramas_por_view_e_cache(self):
+        autorizacao = {'HTTP_AUTHORIZATION': 'Bearer segredo-do-scraper'}
+        antes = self.client.get(self.url, **autorizacao).content.decode()
+        paciente = criar_paciente(self.medico)
+        self.client.force_login(self.medico)
+        for _ in range(2):
+            self.client.get(reverse('paciente_detalhes', args=[paciente.pk]))
+
+        texto = self.client.get(self.url, **autorizacao).content.decode()
+
+        for metrica in ('pacientes_requisicao_segundos', 'pacientes_sql_consultas', 'pacientes_template_segundos'):
+            self.assertEqual(
+                self.total(texto, metrica, 'paciente_detalhes'), self.total(antes, metrica, 'paciente_detalhes') + 2
+            )
+        self.assertIn('pacientes_cache_fragmentos_total{resultado="acerto"} 1', texto)
+        self.assertIn('pacientes_cache_fragmentos_total{resultado="falha"} 1', texto)
+
+    @override_settings(METRICAS_LIMITE_LENTA_MS=0)
+    def test_requisicao_lenta_vai_para_o_log_sem_parametros(self):
+        paciente = criar_paciente(self.medico)
+        self.client.force_login(self.medico)
+
+        with self.assertLogs('pacientes.metricas', 'WARNING') as logs:
+            self.client.get(reverse('paciente_detalhes', args=[paciente.pk]))
+
+        mensagem = next(linha for linha in logs.output if 'Requisição lenta' in linha)
+        self.assertIn('(paciente_detalhes) status=200', mensagem)
+        self.assertNotIn(paciente.cpf, mensagem)
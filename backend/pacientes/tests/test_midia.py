@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from pacientes.midia import interpretar_intervalo
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia
+
+
+class InterpretarIntervaloTests(SimpleTestCase):
+    def test_intervalos(self):
+        casos = {
+            None: None,
+            'bytes=0-9': (0, 9),
+            'bytes=90-': (90, 99),
+            'bytes=-10': (90, 99),
+            'bytes=-500': (0, 99),
+            'bytes=50-500': (50, 99),
+            'bytes=0-1,5-6': None,  # vários intervalos: arquivo inteiro
+            'itens=0-1': None,
+        }
+        for cabecalho, esperado in casos.items():
+            with self.subTest(cabecalho=cabecalho):
+                self.assertEqual(interpretar_intervalo(cabecalho, 100), esperado)
+
+    def test_intervalo_fora_do_arquivo(self):
+        for cabecalho in ('bytes=100-', 'bytes=20-10', 'bytes=-0'):
+            with self.subTest(cabecalho=cabecalho), self.assertRaises(ValueError):
+                interpretar_intervalo(cabecalho, 100)
+
+
+class ServirArquivoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.documento = criar_documento(criar_paciente(self.medico))
+        with self.documento.arquivo.open('rb') as arquivo:
+            self.conteudo = arquivo.read()
+        self.url = reverse('documento_arquivo', args=[self.documento.pk])
+        self.client.force_login(self.medico)
+
+    def test_arquivo_inteiro_e_etag(self):
+        resposta = self.client.get(self.url)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(b''.join(resposta.streaming_content), self.conteudo)
+        self.assertEqual(resposta['Accept-Ranges'], 'bytes')
+        self.assertIn('private', resposta['Cache-Control'])
+
+        revalidacao = self.client.get(self.url, HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(revalidacao.status_code, 304)
+
+    def test_intervalo(self):
+        resposta = self.client.get(self.url, HTTP_RANGE='bytes=5-14')
+
+        self.assertEqual(resposta.status_code, 206)
+        self.assertEqual(resposta['Content-Range'], f'bytes 5-14/{len(self.conteudo)}')
+        self.assertEqual(b''.join(resposta.streaming_content), self.conteudo[5:15])
+
+    def test_intervalo_invalido_e_if_range_desatualizado(self):
+        resposta = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.conteudo)}-')
+        self.assertEqual(resposta.status_code, 416)
+
+        # Outra versão do arquivo: ignora o Range e manda tudo
+        resposta = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outra-versao"')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(b''.join(resposta.streaming_content), self.conteudo)
+
+    def test_so_o_medico_do_paciente(self):
+        self.client.force_login(criar_medico())
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
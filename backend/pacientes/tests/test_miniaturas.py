@@ -0,0 +1,79 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+
+from pacientes import imagens
+from pacientes.imagens import (
+    FORMATOS_MINIATURA, LARGURAS_MINIATURA, gerar_miniaturas, gerar_variantes, nome_variante, remover_variantes,
+)
+from pacientes.sinteticos import jpeg_simples
+
+from .fabricas import criar_foto, criar_medico, criar_paciente, isolar_midia
+
+
+class MiniaturasTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.nome = 'fotos/2025/01/02/exame.jpg'
+
+    def dimensoes(self, largura, extensao):
+        with default_storage.open(nome_variante(self.nome, largura, extensao)) as arquivo:
+            with Image.open(arquivo) as imagem:
+                return imagem.format, imagem.size
+
+    def test_gera_cada_largura_e_formato_sem_ampliar(self):
+        self.assertTrue(gerar_variantes(self.nome, BytesIO(jpeg_simples((10, 120, 200), 1200, 900))))
+
+        self.assertEqual(self.dimensoes(240, 'webp'), ('WEBP', (240, 180)))
+        self.assertEqual(self.dimensoes(480, 'jpg'), ('JPEG', (480, 360)))
+        # 1200px: a maior variante é menor que a original
+        self.assertEqual(self.dimensoes(960, 'jpg'), ('JPEG', (960, 720)))
+
+        pequena = 'fotos/pequena.jpg'
+        gerar_variantes(pequena, BytesIO(jpeg_simples((10, 120, 200), 300, 200)))
+        self.nome = pequena
+        self.assertEqual(self.dimensoes(960, 'webp'), ('WEBP', (300, 200)))
+
+    def test_reaproveita_variantes_existentes(self):
+        gerar_variantes(self.nome, BytesIO(jpeg_simples((10, 120, 200), 600, 400)))
+
+        with mock.patch.object(imagens.Image, 'open', side_effect=AssertionError('abriu de novo')):
+            self.assertTrue(gerar_variantes(self.nome, BytesIO(b'')))
+
+        remover_variantes(self.nome)
+        self.assertFalse(any(
+            default_storage.exists(nome_variante(self.nome, largura, extensao))
+            for largura in LARGURAS_MINIATURA for extensao in FORMATOS_MINIATURA
+        ))
+
+    def test_arquivo_que_nao_e_imagem(self):
+        with self.assertLogs('pacientes.imagens', 'WARNING'):
+            self.assertFalse(gerar_variantes(self.nome, BytesIO(b'%PDF-1.4 nada de imagem')))
+        self.assertFalse(default_storage.exists(nome_variante(self.nome, 240, 'jpg')))
+
+    def test_galeria_usa_o_srcset(self):
+        medico = criar_medico()
+        paciente = criar_paciente(medico)
+        foto = criar_foto(paciente)
+        self.client.force_login(medico)
+        detalhes = reverse('paciente_detalhes', args=[paciente.pk])
+        self.assertNotContains(self.client.get(detalhes), 'srcset=')
+
+        self.assertTrue(gerar_miniaturas(foto))
+
+        foto.refresh_from_db()
+        self.assertTrue(foto.miniaturas_geradas)
+        self.assertEqual(
+            foto.srcset_webp,
+            ', '.join(f'{reverse("foto_miniatura", args=[foto.pk, largura, "webp"])} {largura}w'
+                      for largura in LARGURAS_MINIATURA),
+        )
+        resposta = self.client.get(detalhes)
+        self.assertContains(resposta, f'srcset="{foto.srcset_webp}"')
+        self.assertContains(resposta, f'src="{foto.url_miniatura}"')
+        self.assertEqual(self.client.get(foto.url_variante(480, 'webp')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('foto_miniatura', args=[foto.pk, 123, 'jpg'])).status_code, 404)
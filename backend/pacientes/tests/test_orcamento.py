@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from pacientes.orcamento import ExcessoConsultas, OrcamentoConsultasMixin, limite_consultas
+from pacientes.models import Paciente
+
+from .fabricas import criar_documento, criar_foto, criar_medico, criar_paciente, isolar_midia, jpeg
+
+
+class LimiteConsultasTests(TestCase):
+    def test_detecta_consulta_repetida(self):
+        medico = criar_medico()
+        pacientes = [criar_paciente(medico) for _ in range(6)]
+
+        with self.assertRaisesMessage(ExcessoConsultas, 'possível N+1'):
+            with limite_consultas(100):
+                for paciente in pacientes:
+                    Paciente.objects.get(pk=paciente.pk)
+
+    def test_detecta_estouro_do_orcamento(self):
+        with self.assertRaises(ExcessoConsultas):
+            with limite_consultas(1):
+                list(Paciente.objects.all())
+                list(Paciente.objects.filter(ativo=False))
+
+
+class OrcamentoViewsTests(OrcamentoConsultasMixin, TestCase):
+    """
+    Com o mixin, qualquer requisição acima do @orcamento_consultas da view ou com
+    N+1 falha. Cada teste compara a mesma requisição com poucos e com muitos
+    registros: o número de consultas não pode crescer junto.
+    """
+
+    def setUp(self):
+        super().setUp()
+        isolar_midia(self)
+        cache.clear()
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+
+    def consultas(self, url, parametros=None):
+        # Sem o cache de fragmentos, para medir as consultas de verdade
+        cache.clear()
+        with CaptureQueriesContext(connection) as capturadas:
+            resposta = self.client.get(url, parametros or {})
+        self.assertEqual(resposta.status_code, 200)
+        return len(capturadas), resposta
+
+    def criar_pacientes(self, quantidade, **campos):
+        return [criar_paciente(self.medico, **campos) for _ in range(quantidade)]
+
+    def test_dashboard_primeira_pagina(self):
+        self.criar_pacientes(5)
+        poucos, _ = self.consultas(reverse('dashboard'))
+        self.criar_pacientes(60)
+        muitos, resposta = self.consultas(reverse('dashboard'))
+
+        self.assertEqual(poucos, muitos)
+        self.assertEqual(len(resposta.context['pacientes']), 24)
+
+    def test_dashboard_pagina_do_cursor(self):
+        self.criar_pacientes(30)
+        _, resposta = self.consultas(reverse('dashboard'))
+        poucos, _ = self.consultas(reverse('dashboard') + resposta.context['proxima_pagina_url'])
+
+        self.criar_pacientes(60)
+        _, resposta = self.consultas(reverse('dashboard'))
+        segunda = reverse('dashboard') + resposta.context['proxima_pagina_url']
+        muitos, resposta = self.consultas(segunda)
+
+        self.assertEqual(poucos, muitos)
+        self.assertEqual(len(resposta.context['pacientes']), 24)
+
+    def test_dashboard_busca_por_nome(self):
+        self.criar_pacientes(3, nome_completo='Maria Souza')
+        poucos, _ = self.consultas(reverse('dashboard'), {'busca': 'maria'})
+        self.criar_pacientes(40, nome_completo='Maria Souza')
+        muitos, resposta = self.consultas(reverse('dashboard'), {'busca': 'maria'})
+
+        self.assertEqual(poucos, muitos)
+        self.assertEqual(resposta.context['total_encontrados'], 43)
+
+    def test_dashboard_busca_por_cpf(self):
+        primeiro = self.criar_pacientes(1)[0]
+        prefixo = primeiro.cpf[:3]
+        poucos, _ = self.consultas(reverse('dashboard'), {'busca': prefixo})
+        self.criar_pacientes(40)
+        muitos, resposta = self.consultas(reverse('dashboard'), {'busca': prefixo})
+
+        self.assertEqual(poucos, muitos)
+        self.assertEqual(resposta.context['total_encontrados'], 41)
+
+    def test_detalhes_do_paciente(self):
+        paciente = criar_paciente(self.medico)
+        url = reverse('paciente_detalhes', args=[paciente.pk])
+
+        criar_documento(paciente)
+        criar_foto(paciente)
+        poucos, _ = self.consultas(url)
+
+        for numero in range(12):
+            criar_documento(paciente)
+            criar_foto(paciente, jpeg(f'foto{numero}.jpg'))
+        muitos, resposta = self.consultas(url)
+
+        self.assertEqual(poucos, muitos)
+        self.assertContains(resposta, reverse('documento_arquivo', args=[paciente.documentos.first().pk]))
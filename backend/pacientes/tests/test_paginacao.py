@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pacientes.models import Paciente
+from pacientes.paginacao import codificar_cursor, decodificar_cursor, paginar_por_cursor
+
+from .fabricas import criar_medico, criar_paciente
+
+
+class CursorTests(TestCase):
+    def test_codifica_e_decodifica_a_chave(self):
+        paciente = criar_paciente(criar_medico())
+
+        cursor = codificar_cursor(paciente)
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decodificar_cursor(cursor), (paciente.data_cadastro, paciente.pk))
+
+    def test_cursor_invalido_vira_none(self):
+        for cursor in ('', 'nao-e-base64!', 'YWJj', codificar_cursor.__name__):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decodificar_cursor(cursor))
+
+    def test_percorre_todos_uma_vez_com_datas_repetidas(self):
+        medico = criar_medico()
+        pacientes = [criar_paciente(medico) for _ in range(11)]
+        # Metade com a mesma data: o desempate é pelo id
+        mesma_data = timezone.now() - timedelta(days=1)
+        Paciente.objects.filter(pk__in=[paciente.pk for paciente in pacientes[:6]]).update(data_cadastro=mesma_data)
+
+        vistos = []
+        cursor = None
+        while True:
+            pagina, cursor = paginar_por_cursor(Paciente.objects.filter(medico=medico), cursor, tamanho=4)
+            vistos += [paciente.pk for paciente in pagina]
+            if cursor is None:
+                break
+
+        esperado = list(
+            Paciente.objects.filter(medico=medico).order_by('-data_cadastro', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(len(set(vistos)), 11)
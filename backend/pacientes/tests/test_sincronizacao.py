@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pacientes.models import Remocao
+from pacientes.sincronizacao import codificar_token, limpar_remocoes
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia
+
+
+@override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=0)
+class SincronizacaoTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+
+    def sincronizar(self, token=None, **parametros):
+        if token:
+            parametros['token'] = token
+        resposta = self.client.get(reverse('api_sincronizacao'), parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def test_primeira_chamada_e_alteracoes_seguintes(self):
+        paciente = criar_paciente(self.medico)
+        documento = criar_documento(paciente)
+        criar_paciente(criar_medico())  # de outro médico: nunca aparece
+
+        primeira = self.sincronizar()
+        self.assertEqual([item['id'] for item in primeira['pacientes']], [paciente.pk])
+        self.assertEqual([item['id'] for item in primeira['documentos']], [documento.pk])
+        self.assertFalse(primeira['mais'])
+
+        # Sem alterações: nada de novo
+        vazia = self.sincronizar(primeira['token'])
+        self.assertEqual((vazia['pacientes'], vazia['documentos'], vazia['fotos']), ([], [], []))
+
+        paciente.telefone = '(11) 90000-0000'
+        paciente.save()
+        documento_pk = documento.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.delete()
+        seguinte = self.sincronizar(vazia['token'])
+
+        self.assertEqual([item['telefone'] for item in seguinte['pacientes']], ['(11) 90000-0000'])
+        self.assertEqual(seguinte['documentos'], [])
+        self.assertEqual(seguinte['removidos'], {'pacientes': [], 'documentos': [documento_pk], 'fotos': []})
+
+    def test_paginas_com_mais(self):
+        criados = [criar_paciente(self.medico).pk for _ in range(5)]
+
+        recebidos = []
+        token = None
+        while True:
+            pagina = self.sincronizar(token, limite=2)
+            recebidos += [item['id'] for item in pagina['pacientes']]
+            token = pagina['token']
+            if not pagina['mais']:
+                break
+
+        self.assertEqual(recebidos, criados)
+
+    def test_token_invalido_e_expirado(self):
+        resposta = self.client.get(reverse('api_sincronizacao'), {'token': 'lixo'})
+        self.assertEqual(resposta.status_code, 400)
+
+        antigo = codificar_token({}, timezone.now() - timedelta(days=365))
+        resposta = self.client.get(reverse('api_sincronizacao'), {'token': antigo})
+        self.assertEqual(resposta.status_code, 410)
+
+    def test_desativar_paciente_chega_como_alteracao(self):
+        paciente = criar_paciente(self.medico)
+        token = self.sincronizar()['token']
+
+        paciente.desativar()
+
+        seguinte = self.sincronizar(token)
+        self.assertEqual([(item['id'], item['ativo']) for item in seguinte['pacientes']], [(paciente.pk, False)])
+
+    def test_limpar_remocoes_antigas(self):
+        Remocao.objects.create(medico=self.medico, tipo='paciente', objeto_id=1)
+        antiga = Remocao.objects.create(medico=self.medico, tipo='paciente', objeto_id=2)
+        Remocao.objects.filter(pk=antiga.pk).update(removido_em=timezone.now() - timedelta(days=100))
+
+        self.assertEqual(limpar_remocoes(90), 1)
+        self.assertEqual(list(Remocao.objects.values_list('objeto_id', flat=True)), [1])
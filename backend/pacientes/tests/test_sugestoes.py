@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from pacientes import diretorio
+
+from .fabricas import criar_medico, criar_paciente
+
+
+class SugestoesApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        diretorio._diretorios.clear()
+        self.addCleanup(diretorio._diretorios.clear)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.helena = criar_paciente(
+            self.medico, nome_completo='Helena Araújo', cpf='529.982.247-25', telefone='(31) 98888-1111',
+        )
+        self.heitor = criar_paciente(self.medico, nome_completo='Heitor Brandão', telefone='(52) 99100-0000')
+        criar_paciente(self.medico, nome_completo='Helio Inativo', ativo=False)
+        criar_paciente(criar_medico(), nome_completo='Helga Alheia', telefone='(52) 99822-1111')
+
+    def sugerir(self, termo):
+        resposta = self.client.get(reverse('api_sugestoes'), {'q': termo})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta
+
+    def ids(self, termo):
+        return [item['id'] for item in self.sugerir(termo).json()['resultados']]
+
+    def test_prefixos_de_nome_cpf_e_telefone(self):
+        for diretorio_ativo in (False, True):
+            with self.subTest(diretorio=diretorio_ativo), self.settings(DIRETORIO_PACIENTES=diretorio_ativo):
+                # Início do nome completo, sem acentos nem maiúsculas, em ordem alfabética
+                self.assertEqual(self.ids('he'), [self.heitor.pk, self.helena.pk])
+                self.assertEqual(self.ids('HELENA ARAU'), [self.helena.pk])
+                self.assertEqual(self.ids('heitor brandao'), [self.heitor.pk])
+                self.assertEqual(self.ids('brandao'), [])
+                # CPF com ou sem pontuação
+                self.assertEqual(self.ids('529.98'), [self.helena.pk])
+                # Telefone
+                self.assertEqual(self.ids('(31) 9888'), [self.helena.pk])
+                # CPF antes do telefone: 5299... é CPF da Helena e telefone do Heitor
+                self.assertEqual(self.ids('5299'), [self.helena.pk, self.heitor.pk])
+                self.assertEqual(self.ids('zz'), [])
+                self.assertEqual(self.ids('  '), [])
+                self.assertEqual(self.ids('--'), [])
+
+    def test_campos_limite_e_cache(self):
+        for numero in range(12):
+            criar_paciente(self.medico, nome_completo=f'Heloisa {chr(65 + numero)}')
+
+        resposta = self.sugerir('helo')
+
+        resultados = resposta.json()['resultados']
+        self.assertEqual(len(resultados), 10)
+        self.assertEqual(set(resultados[0]), {'id', 'nome_completo', 'cpf', 'telefone', 'pagina'})
+        self.assertEqual(resultados[0]['nome_completo'], 'Heloisa A')
+        self.assertEqual(resultados[0]['pagina'], reverse('paciente_detalhes', args=[resultados[0]['id']]))
+        self.assertEqual(resposta['Cache-Control'], 'private, max-age=30')
+        self.assertEqual(self.client.post(reverse('api_sugestoes'), {'q': 'he'}).status_code, 405)
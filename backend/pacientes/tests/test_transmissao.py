@@ -0,0 +1,69 @@
+import csv
+import io
+import warnings
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+
+from .fabricas import criar_documento, criar_medico, criar_paciente, isolar_midia
+
+
+async def ler(resposta):
+    return b''.join([pedaco async for pedaco in resposta.streaming_content])
+
+
+class StreamingAsgiTests(TestCase):
+    """
+    No ASGI as respostas em streaming precisam de iteradores assíncronos: com um
+    síncrono o Django avisa e junta o conteúdo inteiro na memória antes de enviar.
+    """
+
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.paciente = criar_paciente(self.medico)
+        for _ in range(3):
+            criar_paciente(self.medico)
+        self.documento = criar_documento(self.paciente)
+        self.async_client.force_login(self.medico)
+
+    async def obter(self, url, **kwargs):
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume synchronous iterators')
+            resposta = await self.async_client.get(url, **kwargs)
+            self.assertTrue(resposta.is_async)
+            return resposta, await ler(resposta)
+
+    async def test_exportacao_csv(self):
+        resposta, conteudo = await self.obter(reverse('exportacao'), data={'formato': 'csv'})
+
+        self.assertEqual(resposta.status_code, 200)
+        linhas = list(csv.reader(io.StringIO(conteudo.decode('utf-8-sig'))))
+        self.assertEqual(len(linhas), 5)
+
+    async def test_exportacao_zip_com_arquivos(self):
+        resposta, conteudo = await self.obter(reverse('exportacao'), data={'formato': 'jsonl', 'arquivos': '1'})
+
+        self.assertEqual(resposta.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo:
+            self.assertIsNone(arquivo.testzip())
+            self.assertEqual(len([nome for nome in arquivo.namelist() if nome.endswith('.pdf')]), 1)
+
+    async def test_arquivo_inteiro_e_intervalo(self):
+        url = reverse('documento_arquivo', args=[self.documento.pk])
+
+        def conteudo_original():
+            with self.documento.arquivo.open('rb') as arquivo:
+                return arquivo.read()
+        original = await sync_to_async(conteudo_original)()
+
+        resposta, conteudo = await self.obter(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(conteudo, original)
+        self.assertEqual(int(resposta['Content-Length']), len(original))
+
+        resposta, conteudo = await self.obter(url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(resposta.status_code, 206)
+        self.assertEqual(conteudo, original[10:20])
@@ -0,0 +1,115 @@
+import os
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pacientes import uploads
+from pacientes.models import Documento, UploadParcial
+from pacientes.sinteticos import pdf_simples
+from pacientes.uploads import caminho_parcial
+
+from .fabricas import criar_medico, criar_paciente, isolar_midia
+
+
+@override_settings(UPLOAD_TAMANHO_PARTE=1024)
+class UploadEmPartesTests(TestCase):
+    def setUp(self):
+        isolar_midia(self)
+        self.medico = criar_medico()
+        self.client.force_login(self.medico)
+        self.paciente = criar_paciente(self.medico)
+        self.conteudo = pdf_simples(['Laudo ' * 300])
+        self.assertGreater(len(self.conteudo), 1024)
+
+    def iniciar(self, nome='laudo.pdf', tamanho=None):
+        return self.client.post(
+            reverse('upload_criar', args=[self.paciente.pk, 'documento']),
+            {'nome': nome, 'tamanho': len(self.conteudo) if tamanho is None else tamanho},
+        )
+
+    def enviar_parte(self, url, offset, dados):
+        return self.client.generic(
+            'PATCH', url, dados, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def enviar_tudo(self, url):
+        for offset in range(0, len(self.conteudo), 1024):
+            self.assertEqual(self.enviar_parte(url, offset, self.conteudo[offset:offset + 1024]).status_code, 204)
+
+    def test_iniciar_valida_extensao_e_tamanho(self):
+        self.assertEqual(self.iniciar('laudo.exe').status_code, 400)
+        self.assertEqual(self.iniciar(tamanho=0).status_code, 400)
+        self.assertEqual(self.iniciar(tamanho='muito').status_code, 400)
+        self.assertFalse(UploadParcial.objects.exists())
+
+        resposta = self.iniciar()
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(resposta['Location'], resposta.json()['url'])
+        self.assertEqual(resposta.json()['tamanho_parte'], 1024)
+
+    def test_offset_das_partes(self):
+        url = self.iniciar().json()['url']
+
+        resposta = self.enviar_parte(url, 0, self.conteudo[:1024])
+        self.assertEqual((resposta.status_code, resposta['Upload-Offset']), (204, '1024'))
+
+        # Parte repetida ou fora de ordem: 409 com o offset que o servidor tem
+        for offset in (0, 2048):
+            resposta = self.enviar_parte(url, offset, self.conteudo[offset:offset + 10])
+            self.assertEqual((resposta.status_code, resposta['Upload-Offset']), (409, '1024'))
+
+        self.assertEqual(self.enviar_parte(url, 'x', b'abc').status_code, 400)
+        self.assertEqual(self.enviar_parte(url, 1024, b'x' * 1025).status_code, 413)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '1024')
+        self.assertEqual(self.client.put(url).status_code, 405)
+
+        self.client.force_login(criar_medico())
+        self.assertEqual(self.enviar_parte(url, 1024, b'abc').status_code, 404)
+
+    def test_parte_alem_do_tamanho_declarado(self):
+        url = self.iniciar(tamanho=100).json()['url']
+
+        resposta = self.enviar_parte(url, 0, b'x' * 101)
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '0')
+
+    def test_formulario_recebe_o_arquivo_montado(self):
+        upload_id = self.iniciar().json()['id']
+        upload = UploadParcial.objects.get(pk=upload_id)
+        self.enviar_tudo(reverse('upload_parcial', args=[upload_id]))
+
+        resposta = self.client.post(
+            reverse('documento_adicionar', args=[self.paciente.pk]), {'titulo': 'Laudo', 'upload': upload_id},
+        )
+
+        self.assertRedirects(resposta, reverse('paciente_detalhes', args=[self.paciente.pk]))
+        documento = Documento.objects.get(paciente=self.paciente)
+        self.assertEqual(documento.nome_original, 'laudo.pdf')
+        with documento.arquivo.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.conteudo)
+        self.assertFalse(UploadParcial.objects.exists())
+        self.assertFalse(os.path.exists(caminho_parcial(upload)))
+
+    def test_formulario_invalido_fecha_o_arquivo_e_mantem_o_upload(self):
+        upload_id = self.iniciar().json()['id']
+        self.enviar_tudo(reverse('upload_parcial', args=[upload_id]))
+        abertos = []
+        montar = uploads.ArquivoMontado
+
+        def montar_e_guardar(upload):
+            abertos.append(montar(upload))
+            return abertos[-1]
+
+        with mock.patch.object(uploads, 'ArquivoMontado', side_effect=montar_e_guardar):
+            resposta = self.client.post(
+                reverse('documento_adicionar', args=[self.paciente.pk]), {'titulo': '', 'upload': upload_id},
+            )
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(abertos), 1)
+        self.assertTrue(abertos[0].closed)
+        # O envio não se perde: dá para corrigir o título e mandar de novo
+        self.assertTrue(UploadParcial.objects.filter(pk=upload_id).exists())
+        self.assertFalse(Documento.objects.exists())
@@ -0,0 +1,52 @@
+# pacientes/transmissao.py
+"""
+Conteúdo das respostas em streaming (exportações, arquivos de mídia) nos dois modos.
+
+No WSGI o StreamingHttpResponse precisa de um iterador síncrono; no ASGI, de um
+assíncrono: com um síncrono o Django avisa ("must consume synchronous iterators")
+e junta tudo numa lista antes de enviar, o que carrega a exportação ou o arquivo
+inteiro na memória. `conteudo_streaming` devolve o tipo certo para a requisição.
+
+No ASGI o gerador síncrono continua rodando numa thread (sync_to_async, a mesma
+da requisição, então o cursor do ORM das exportações fica na mesma conexão) e
+cada ida à thread junta pedaços até TAMANHO_BLOCO, para não pagar a troca de
+thread a cada linha do CSV.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _proximo_bloco(iterador, tamanho):
+    """Pedaços seguidos do iterador até somar `tamanho` bytes; b'' quando ele acaba"""
+    pedacos = []
+    total = 0
+    for pedaco in iterador:
+        pedacos.append(pedaco)
+        total += len(pedaco)
+        if total >= tamanho:
+            break
+    return b''.join(pedacos)
+
+
+async def iterar_async(iterador, tamanho=TAMANHO_BLOCO):
+    """Iterador assíncrono sobre um gerador síncrono de bytes"""
+    iterador = iter(iterador)
+    proximo_bloco = sync_to_async(_proximo_bloco)
+    try:
+        while bloco := await proximo_bloco(iterador, tamanho):
+            yield bloco
+    finally:
+        # Cliente desconectou no meio: fecha o gerador (arquivos, cursor) na thread dele
+        fechar = getattr(iterador, 'close', None)
+        if fechar is not None:
+            await sync_to_async(fechar)()
+
+
+def conteudo_streaming(request, iterador):
+    """O iterador de bytes como o servidor da requisição (WSGI ou ASGI) consome sem bufferizar"""
+    if isinstance(request, ASGIRequest):
+        return iterar_async(iterador)
+    return iterador
@@ -0,0 +1,165 @@
+# pacientes/uploads.py
+"""
+Upload em partes, retomável (protocolo no estilo tus) para documentos e fotos.
+
+1. POST   /paciente/<pk>/upload/<tipo>/  (nome, tamanho) -> 201 + Location do upload
+2. PATCH  /upload/<id>/  cabeçalho Upload-Offset + bytes da parte -> 204 + novo Upload-Offset
+3. HEAD   /upload/<id>/  -> Upload-Offset atual (para retomar depois de uma queda)
+4. POST do formulário normal com o campo `upload=<id>` no lugar do arquivo
+   (a view usa `with arquivos_enviados(...)`, que fecha o arquivo montado no fim)
+
+Cada parte é lida do corpo da requisição em pedaços e gravada direto na posição
+certa de um arquivo em UPLOADS_PARCIAIS_DIR: o arquivo é montado em disco, sem
+passar inteiro pela memória, e a view só o entrega ao formulário no final.
+"""
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from .models import UploadParcial
+
+
+TAMANHO_PEDACO = 64 * 1024
+
+# Tipo -> (extensões aceitas, nome do setting com o tamanho máximo)
+TIPOS_UPLOAD = {
+    'documento': (('.pdf',), 'TAMANHO_MAXIMO_DOCUMENTO'),
+    'foto': (('.jpg', '.jpeg', '.png', '.gif'), 'TAMANHO_MAXIMO_FOTO'),
+}
+
+
+class ConflitoUpload(Exception):
+    """Upload-Offset diferente do que o servidor já recebeu (parte repetida ou fora de ordem)"""
+
+
+def tamanho_maximo(tipo):
+    return getattr(settings, TIPOS_UPLOAD[tipo][1])
+
+
+def caminho_parcial(upload):
+    return os.path.join(settings.UPLOADS_PARCIAIS_DIR, f'{upload.pk}.part')
+
+
+def criar_upload(medico, paciente, tipo, nome_arquivo, tamanho):
+    """Valida extensão e tamanho e reserva o upload; levanta ValidationError"""
+    extensoes, _ = TIPOS_UPLOAD[tipo]
+    nome_arquivo = os.path.basename(nome_arquivo or '')
+    if not nome_arquivo.lower().endswith(extensoes):
+        raise ValidationError(f'Extensão não permitida. Use: {", ".join(extensoes)}.')
+    if tamanho <= 0:
+        raise ValidationError('Arquivo vazio.')
+    if tamanho > tamanho_maximo(tipo):
+        raise ValidationError(f'O arquivo não pode ser maior que {tamanho_maximo(tipo) // (1024 * 1024)}MB.')
+
+    upload = UploadParcial.objects.create(
+        medico=medico, paciente=paciente, tipo=tipo, nome_arquivo=nome_arquivo, tamanho=tamanho,
+    )
+    os.makedirs(settings.UPLOADS_PARCIAIS_DIR, exist_ok=True)
+    # Arquivo já com o tamanho final (esparso): cada parte é gravada na sua posição
+    with open(caminho_parcial(upload), 'wb') as arquivo:
+        arquivo.truncate(tamanho)
+    return upload
+
+
+def gravar_parte(upload, offset, corpo, quantidade):
+    """
+    Grava `quantidade` bytes lidos de `corpo` a partir de `offset` e retorna o novo offset.
+
+    O avanço do offset é um UPDATE condicional: duas requisições com a mesma
+    parte não conseguem avançar o upload duas vezes.
+    """
+    if offset != upload.recebido:
+        raise ConflitoUpload
+    if quantidade > upload.tamanho - offset:
+        raise ValidationError('A parte ultrapassa o tamanho declarado do arquivo.')
+
+    gravados = 0
+    with open(caminho_parcial(upload), 'r+b') as arquivo:
+        arquivo.seek(offset)
+        while gravados < quantidade:
+            pedaco = corpo.read(min(TAMANHO_PEDACO, quantidade - gravados))
+            if not pedaco:
+                break
+            arquivo.write(pedaco)
+            gravados += len(pedaco)
+
+    # Conexão caiu no meio da parte: os bytes que chegaram são aproveitados
+    novo_offset = offset + gravados
+    if not UploadParcial.objects.filter(pk=upload.pk, recebido=offset).update(
+        recebido=novo_offset, atualizado_em=timezone.now()
+    ):
+        raise ConflitoUpload
+    upload.recebido = novo_offset
+    return novo_offset
+
+
+class ArquivoMontado(UploadedFile):
+    """Arquivo completo do upload em partes, entregue ao formulário como um upload comum"""
+
+    def __init__(self, upload):
+        super().__init__(
+            open(caminho_parcial(upload), 'rb'), name=upload.nome_arquivo, size=upload.tamanho,
+        )
+        self.caminho = caminho_parcial(upload)
+
+    def temporary_file_path(self):
+        # ImageField valida a imagem direto do disco em vez de copiar para a memória
+        return self.caminho
+
+
+def obter_arquivo_montado(medico, paciente, tipo, upload_id):
+    """Arquivo do upload completo do médico para o paciente, ou None"""
+    try:
+        upload = UploadParcial.objects.get(pk=upload_id, medico=medico, paciente=paciente, tipo=tipo)
+    except (UploadParcial.DoesNotExist, ValidationError, ValueError):
+        return None, None
+    if not upload.completo or not os.path.exists(caminho_parcial(upload)):
+        return upload, None
+    return upload, ArquivoMontado(upload)
+
+
+@contextmanager
+def arquivos_enviados(request, paciente, tipo, campo):
+    """
+    (upload, arquivos) para o formulário: o upload em partes concluído (campo `upload`)
+    ou request.FILES. O arquivo montado é fechado na saída do bloco, salvo ou não.
+    """
+    upload, arquivo = obter_arquivo_montado(request.user, paciente, tipo, request.POST.get('upload'))
+    if arquivo is None:
+        yield None, request.FILES
+        return
+    try:
+        yield upload, {campo: arquivo}
+    finally:
+        arquivo.close()
+
+
+def concluir_upload(upload, arquivos):
+    """Depois de salvo no storage, o arquivo montado em UPLOADS_PARCIAIS_DIR não é mais necessário"""
+    if upload is not None:
+        # Fechado antes de apagar (no Windows um arquivo aberto não pode ser removido)
+        for arquivo in arquivos.values():
+            arquivo.close()
+        descartar(upload)
+
+
+def descartar(upload):
+    try:
+        os.remove(caminho_parcial(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def remover_expirados():
+    """Apaga os uploads parados há mais de UPLOAD_VALIDADE_HORAS; retorna quantos"""
+    limite = timezone.now() - timedelta(hours=settings.UPLOAD_VALIDADE_HORAS)
+    expirados = list(UploadParcial.objects.filter(atualizado_em__lt=limite))
+    for upload in expirados:
+        descartar(upload)
+    return len(expirados)
@@ -1,6 +1,6 @@
 # pacientes/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Autenticação
@@ -16,12 +16,45 @@ urlpatterns = [
     path('paciente/<int:pk>/', views.paciente_detalhes_view, name='paciente_detalhes'),
     path('paciente/<int:pk>/editar/', views.paciente_editar_view, name='paciente_editar'),
     path('paciente/<int:pk>/deletar/', views.paciente_deletar_view, name='paciente_deletar'),
+    path('paciente/<int:pk>/reativar/', views.paciente_reativar_view, name='paciente_reativar'),
+    
+    # Pacientes excluídos e arquivados
+    path('pacientes/inativos/', views.pacientes_inativos_view, name='pacientes_inativos'),
+    path('pacientes/arquivados/<int:pk>/restaurar/', views.paciente_restaurar_view, name='paciente_restaurar'),
+    
+    # Importação em massa
+    path('pacientes/importar/', views.importacao_criar_view, name='importacao_criar'),
+    path('pacientes/importar/<int:pk>/', views.importacao_detalhes_view, name='importacao_detalhes'),
+    path('pacientes/importar/<int:pk>/relatorio/', views.importacao_relatorio_view, name='importacao_relatorio'),
+    
+    # Exportação
+    path('pacientes/exportar/', views.exportacao_view, name='exportacao'),
+    
+    # Upload em partes (documentos e fotos grandes)
+    path('paciente/<int:paciente_pk>/upload/<str:tipo>/', views.upload_criar_view, name='upload_criar'),
+    path('upload/<uuid:pk>/', views.upload_parcial_view, name='upload_parcial'),
     
     # Documentos
     path('paciente/<int:paciente_pk>/documento/adicionar/', views.documento_adicionar_view, name='documento_adicionar'),
     path('documento/<int:pk>/deletar/', views.documento_deletar_view, name='documento_deletar'),
+    path('documento/<int:pk>/arquivo/', views.documento_arquivo_view, name='documento_arquivo'),
     
     # Fotos
     path('paciente/<int:paciente_pk>/foto/adicionar/', views.foto_adicionar_view, name='foto_adicionar'),
     path('foto/<int:pk>/deletar/', views.foto_deletar_view, name='foto_deletar'),
+    path('foto/<int:pk>/imagem/', views.foto_imagem_view, name='foto_imagem'),
+    path('foto/<int:pk>/miniatura/<int:largura>.<str:extensao>', views.foto_miniatura_view, name='foto_miniatura'),
+    
+    # API JSON (ver pacientes/api.py)
+    path('api/pacientes/', api.pacientes_api, name='api_pacientes'),
+    path('api/pacientes/sugestoes/', api.sugestoes_api, name='api_sugestoes'),
+    path('api/pacientes/<int:pk>/', api.paciente_api, name='api_paciente'),
+    path('api/pacientes/<int:paciente_pk>/documentos/', api.documentos_api, name='api_documentos'),
+    path('api/pacientes/<int:paciente_pk>/fotos/', api.fotos_api, name='api_fotos'),
+    path('api/documentos/<int:pk>/', api.documento_api, name='api_documento'),
+    path('api/fotos/<int:pk>/', api.foto_api, name='api_foto'),
+    path('api/sincronizacao/', api.sincronizacao_api, name='api_sincronizacao'),
+    
+    # Métricas (Prometheus)
+    path('metrics', views.metricas_view, name='metricas'),
 ]
\ No newline at end of file
@@ -1,13 +1,48 @@
 # pacientes/views.py
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.conf import settings
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.http import (
+    Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.utils.crypto import constant_time_compare
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from django.template.loader import render_to_string
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
-from django.db.models import Q, Value, F
-from django.db.models.functions import Replace
-from .models import Paciente, Documento, Foto
-from .forms import PacienteForm, DocumentoForm, FotoForm
+from .models import Paciente, PacienteArquivado, Documento, Foto, EstatisticasMedico, Importacao, UploadParcial
+from .forms import PacienteForm, DocumentoForm, FotoForm, ImportacaoForm
+from .normalizacao import somente_digitos, filtro_prefixo_digitos
+from .paginacao import apaginar_por_cursor
+from .busca import obter_backend_busca
+from .diretorio import obter_diretorio
+from .arquivamento import ConflitoRestauracao, restaurar_paciente
+from .fila import enfileirar
+from .cache import chave_detalhes, obter_ou_gerar
+from .imagens import FORMATOS_MINIATURA, LARGURAS_MINIATURA, nome_variante
+from .midia import servir_arquivo
+from .uploads import (
+    TIPOS_UPLOAD, ConflitoUpload, arquivos_enviados, concluir_upload, criar_upload, descartar, gravar_parte,
+)
+from .exportacao import FORMATOS_EXPORTACAO, gerar_exportacao, gerar_zip, nome_arquivo_exportacao
+from .metricas import exportar_metricas
+from .orcamento import orcamento_consultas
+from .transmissao import conteudo_streaming
+
+
+# Quantidade de cards carregados por vez no dashboard
+PACIENTES_POR_PAGINA = 24
+
+# Busca por nome mostra apenas os resultados mais relevantes
+LIMITE_RESULTADOS_BUSCA = 50
+
+# Pacientes inativos e arquivados listados de cada vez (o resto pela busca)
+LIMITE_INATIVOS = 100
 
 
 # ==================== AUTENTICAÇÃO ====================
@@ -64,57 +99,132 @@ def logout_view(request):
 
 # ==================== DASHBOARD ====================
 
+async def _usuario(request):
+    """
+    Médico da requisição numa view async.
+
+    request.user é carregado sob demanda pelo ORM síncrono, que não pode rodar no
+    event loop (o context processor de auth o acessa ao renderizar): troca pelo
+    usuário que request.auser() já carregou para o login_required.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def _buscar_digitos(pacientes, busca):
+    """
+    Pacientes com CPF/telefone começando pelos dígitos da busca e quantos são.
+
+    Colunas indexadas só com dígitos: busca exata ou por prefixo usa o índice em vez
+    de limpar linha a linha. Sem nenhum prefixo, procura o trecho em qualquer posição.
+    """
+    busca_limpa = somente_digitos(busca)
+    if not busca_limpa:
+        # Só pontuação ('---', '().'): o prefixo vazio casaria com todos os pacientes
+        return pacientes.none(), 0
+
+    por_prefixo = pacientes.filter(
+        filtro_prefixo_digitos('cpf_digitos', busca_limpa, 11)
+        | filtro_prefixo_digitos('telefone_digitos', busca_limpa, 20)
+    )
+    total = await por_prefixo.acount()
+    if total:
+        return por_prefixo, total
+    # Trecho do meio ('98765' de um celular sem o DDD): varre os pacientes do
+    # médico, só quando o prefixo não encontra ninguém
+    por_trecho = pacientes.filter(
+        Q(cpf_digitos__contains=busca_limpa) | Q(telefone_digitos__contains=busca_limpa)
+    )
+    return por_trecho, await por_trecho.acount()
+
+
 @login_required
-def dashboard_view(request):
-    """Dashboard com lista de pacientes do médico"""
+@orcamento_consultas(8)
+async def dashboard_view(request):
+    """Dashboard com lista de pacientes do médico (async: ORM async, sem bloquear o worker ASGI)"""
     busca = request.GET.get('busca', '')
+    buscar_documentos = bool(request.GET.get('documentos'))
+    medico = await _usuario(request)
     
-    pacientes = Paciente.objects.filter(medico=request.user, ativo=True)
+    pacientes = Paciente.objects.filter(medico=medico, ativo=True)
     
-    if busca:
-        # Remove caracteres não numéricos da busca para comparação limpa
-        busca_limpa = ''.join(filter(str.isdigit, busca))
-        
-        filters = Q(nome_completo__icontains=busca)
-        
-        if busca_limpa:
-            # Anota os campos limpos para comparação
-            # CPF: remove . e -
-            # Telefone: remove (, ), - e espaço
-            pacientes = pacientes.annotate(
-                cpf_limpo=Replace(
-                    Replace(F('cpf'), Value('.'), Value('')), 
-                    Value('-'), Value('')
-                ),
-                telefone_limpo=Replace(
-                    Replace(
-                        Replace(
-                            Replace(F('telefone'), Value('('), Value('')), 
-                            Value(')'), Value('')
-                        ), 
-                        Value('-'), Value('')
-                    ), 
-                    Value(' '), Value('')
-                )
-            )
-            
-            filters |= Q(cpf_limpo__icontains=busca_limpa)
-            filters |= Q(telefone_limpo__icontains=busca_limpa)
+    # Contadores mantidos pelos signals: custo O(1), sem COUNT por requisição
+    estatisticas = await EstatisticasMedico.aobter(medico)
+    total_pacientes = estatisticas.total_pacientes
+    total_encontrados = total_pacientes
+    proximo_cursor = None
+    
+    if busca and (buscar_documentos or any(c.isalpha() for c in busca)):
+        backend = obter_backend_busca()
+        if any(c.isalpha() for c in busca):
+            # Busca por nome: backend de texto (pg_trgm / FTS5), ordenada por relevância.
+            # ranquear usa cursor do banco direto, então roda numa thread
+            encontrados = backend.filtrar(pacientes, busca)
+            pagina = await sync_to_async(backend.ranquear)(pacientes, busca, LIMITE_RESULTADOS_BUSCA)
+        else:
+            # Só números com documentos=1 (nº de protocolo, valor de exame): CPF/telefone
+            # como na busca comum, mais o conteúdo dos documentos abaixo
+            encontrados, _ = await _buscar_digitos(pacientes, busca)
+            pagina = [
+                paciente async for paciente in
+                encontrados.order_by('-data_cadastro', '-id')[:LIMITE_RESULTADOS_BUSCA]
+            ]
         
-        # Mantém a busca original também, para garantir
-        filters |= Q(cpf__icontains=busca)
-        filters |= Q(telefone__icontains=busca)
+        if buscar_documentos:
+            # Conteúdo dos documentos (texto extraído dos PDFs) pelo mesmo índice de texto;
+            # esses pacientes entram depois dos encontrados pelo nome. O filtro por médico fica
+            # só em `pacientes`: com o JOIN no queryset de documentos o SQLite sonda a lista do
+            # FTS5 para cada paciente do médico (segundos com dezenas de milhares)
+            documentos = backend.filtrar_documentos(Documento.objects.all(), busca)
+            por_documento = pacientes.filter(pk__in=documentos.values('paciente_id'))
+            encontrados = encontrados | por_documento
+            if len(pagina) < LIMITE_RESULTADOS_BUSCA:
+                pagina += [
+                    paciente async for paciente in
+                    por_documento.exclude(pk__in=[paciente.pk for paciente in pagina])
+                    .order_by('-data_cadastro', '-id')[:LIMITE_RESULTADOS_BUSCA - len(pagina)]
+                ]
+        total_encontrados = await encontrados.acount()
+    elif settings.DIRETORIO_PACIENTES:
+        # Lista e busca por CPF/telefone pelo diretório em memória (ver pacientes/diretorio.py),
+        # na mesma ordem e com o mesmo cursor da consulta ao banco
+        diretorio = await sync_to_async(obter_diretorio)(medico.pk)
+        entradas = diretorio.por_cadastro
+        if busca:
+            entradas = diretorio.buscar_digitos(somente_digitos(busca))
+            total_encontrados = len(entradas)
+        pagina, proximo_cursor = diretorio.pagina(entradas, request.GET.get('cursor'), PACIENTES_POR_PAGINA)
+    else:
+        if busca:
+            # Busca por CPF/telefone
+            pacientes, total_encontrados = await _buscar_digitos(pacientes, busca)
         
-        pacientes = pacientes.filter(filters)
+        # Paginação por cursor (data_cadastro, id): custo constante em qualquer página
+        pagina, proximo_cursor = await apaginar_por_cursor(
+            pacientes, request.GET.get('cursor'), PACIENTES_POR_PAGINA
+        )
     
-    pacientes = pacientes.order_by('-data_cadastro')
+    proxima_pagina_url = None
+    if proximo_cursor:
+        parametros = request.GET.copy()
+        parametros['cursor'] = proximo_cursor
+        parametros.pop('parcial', None)
+        proxima_pagina_url = f'?{parametros.urlencode()}'
     
     context = {
-        'pacientes': pacientes,
-        'total_pacientes': Paciente.objects.filter(medico=request.user, ativo=True).count(),
+        'pacientes': pagina,
+        'total_pacientes': total_pacientes,
+        'estatisticas': estatisticas,
+        'total_encontrados': total_encontrados,
+        'proxima_pagina_url': proxima_pagina_url,
         'busca': busca,
+        'buscar_documentos': buscar_documentos,
     }
     
+    # Rolagem infinita: devolve apenas os cards da próxima página
+    if request.GET.get('parcial'):
+        return render(request, 'pacientes/_paciente_cards.html', context)
+    
     return render(request, 'pacientes/dashboard.html', context)
 
 
@@ -124,7 +234,7 @@ def dashboard_view(request):
 def paciente_criar_view(request):
     """View para criar novo paciente"""
     if request.method == 'POST':
-        form = PacienteForm(request.POST)
+        form = PacienteForm(request.POST, medico=request.user)
         if form.is_valid():
             paciente = form.save(commit=False)
             paciente.medico = request.user
@@ -140,22 +250,36 @@ def paciente_criar_view(request):
 
 
 @login_required
-def paciente_detalhes_view(request, pk):
-    """View para visualizar detalhes do paciente"""
-    paciente = get_object_or_404(Paciente, pk=pk, medico=request.user)
-    documentos = paciente.documentos.all()
-    fotos = paciente.fotos.all()
+@orcamento_consultas(6)
+async def paciente_detalhes_view(request, pk):
+    """View para visualizar detalhes do paciente (async, como o dashboard)"""
+    medico = await _usuario(request)
+    paciente = await aget_object_or_404(Paciente, pk=pk, medico=medico)
+    
+    # Listas de documentos e fotos renderizadas ficam em cache até um documento ou foto mudar.
+    # A consulta ao cache e, em caso de falha, a geração (ORM + templates) rodam numa thread
+    def renderizar_fragmentos():
+        return {
+            'documentos': render_to_string('pacientes/_documentos.html', {
+                'paciente': paciente, 'documentos': paciente.documentos.all(),
+            }, request=request),
+            'galeria': render_to_string('pacientes/_galeria.html', {
+                'paciente': paciente, 'fotos': paciente.fotos.all(),
+            }, request=request),
+        }
     
     context = {
         'paciente': paciente,
-        'documentos': documentos,
-        'fotos': fotos,
+        'fragmentos': await sync_to_async(
+            lambda: obter_ou_gerar(chave_detalhes(medico.pk, paciente), renderizar_fragmentos)
+        )(),
     }
     
     return render(request, 'pacientes/paciente_detalhes.html', context)
 
 
 @login_required
+@orcamento_consultas(12)
 def paciente_editar_view(request, pk):
     """View para editar paciente"""
     paciente = get_object_or_404(Paciente, pk=pk, medico=request.user)
@@ -180,18 +304,200 @@ def paciente_editar_view(request, pk):
 
 @login_required
 def paciente_deletar_view(request, pk):
-    """View para deletar paciente"""
+    """View para deletar paciente (exclusão lógica, ver Paciente.desativar)"""
     paciente = get_object_or_404(Paciente, pk=pk, medico=request.user)
     
     if request.method == 'POST':
         nome = paciente.nome_completo
-        paciente.delete()
+        paciente.desativar()
         messages.success(request, f'Paciente {nome} removido com sucesso!')
         return redirect('dashboard')
     
     return render(request, 'pacientes/paciente_confirmar_delete.html', {'paciente': paciente})
 
 
+@login_required
+@orcamento_consultas(4)
+def pacientes_inativos_view(request):
+    """Pacientes excluídos (ainda nas tabelas principais) e arquivados do médico, para reativar ou restaurar"""
+    busca = request.GET.get('busca', '').strip()
+    inativos = Paciente.objects.filter(medico=request.user, ativo=False).only(
+        'id', 'nome_completo', 'cpf', 'ultima_atualizacao'
+    ).order_by('-ultima_atualizacao', '-id')
+    arquivados = PacienteArquivado.objects.filter(medico=request.user).only(
+        'id', 'nome_completo', 'cpf', 'total_documentos', 'total_fotos', 'arquivado_em'
+    )
+    if busca:
+        filtro = Q(nome_completo__icontains=busca) | Q(cpf__contains=busca)
+        inativos = inativos.filter(filtro)
+        arquivados = arquivados.filter(filtro)
+    
+    return render(request, 'pacientes/pacientes_inativos.html', {
+        'inativos': inativos[:LIMITE_INATIVOS],
+        'arquivados': arquivados[:LIMITE_INATIVOS],
+        'busca': busca,
+        'limite': LIMITE_INATIVOS,
+    })
+
+
+@login_required
+@require_POST
+def paciente_reativar_view(request, pk):
+    """Desfaz a exclusão lógica: o paciente volta ao dashboard"""
+    paciente = get_object_or_404(Paciente, pk=pk, medico=request.user, ativo=False)
+    paciente.reativar()
+    messages.success(request, f'Paciente {paciente.nome_completo} reativado com sucesso!')
+    return redirect('paciente_detalhes', pk=paciente.pk)
+
+
+@login_required
+@require_POST
+def paciente_restaurar_view(request, pk):
+    """Devolve um paciente arquivado (com documentos e fotos) às tabelas principais, já ativo"""
+    arquivado = get_object_or_404(PacienteArquivado.objects.only('id'), pk=pk, medico=request.user)
+    try:
+        paciente = restaurar_paciente(arquivado.pk, reativar=True)
+    except ConflitoRestauracao as erro:
+        messages.error(request, str(erro))
+        return redirect('pacientes_inativos')
+    messages.success(request, f'Paciente {paciente.nome_completo} restaurado com sucesso!')
+    return redirect('paciente_detalhes', pk=paciente.pk)
+
+
+# ==================== IMPORTAÇÃO ====================
+
+@login_required
+def importacao_criar_view(request):
+    """View para enviar planilha de pacientes (processada pelo worker)"""
+    if request.method == 'POST':
+        form = ImportacaoForm(request.POST, request.FILES)
+        if form.is_valid():
+            importacao = form.save(commit=False)
+            importacao.medico = request.user
+            importacao.save()
+            enfileirar('importar_planilha', importacao_id=importacao.pk)
+            messages.success(request, 'Planilha recebida! A importação está em andamento.')
+            return redirect('importacao_detalhes', pk=importacao.pk)
+        else:
+            messages.error(request, 'Erro ao enviar planilha.')
+    else:
+        form = ImportacaoForm()
+    
+    return render(request, 'pacientes/importacao_form.html', {
+        'form': form,
+        'importacoes': Importacao.objects.filter(medico=request.user)[:5],
+    })
+
+
+@login_required
+@orcamento_consultas(4)
+def importacao_detalhes_view(request, pk):
+    """View para acompanhar uma importação"""
+    importacao = get_object_or_404(Importacao, pk=pk, medico=request.user)
+    return render(request, 'pacientes/importacao_detalhes.html', {'importacao': importacao})
+
+
+@login_required
+@orcamento_consultas(4)
+def importacao_relatorio_view(request, pk):
+    """Download do relatório de erros da importação"""
+    importacao = get_object_or_404(Importacao, pk=pk, medico=request.user)
+    if not importacao.relatorio:
+        raise Http404
+    return servir_arquivo(request, importacao.relatorio.name, download=True)
+
+
+# ==================== EXPORTAÇÃO ====================
+
+@login_required
+def exportacao_view(request):
+    """Baixa a base de pacientes do médico (CSV/JSONL/XLSX; com arquivos=1, ZIP com documentos e fotos)"""
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        formato = 'csv'
+    incluir_arquivos = bool(request.GET.get('arquivos'))
+    
+    # Gerada em streaming: a base nunca é carregada inteira na memória do worker
+    if incluir_arquivos:
+        conteudo = gerar_zip(request.user, formato)
+        content_type = 'application/zip'
+    else:
+        conteudo = gerar_exportacao(request.user, formato)
+        content_type = FORMATOS_EXPORTACAO[formato][1]
+    
+    # Iterador síncrono no WSGI, assíncrono no ASGI (ver pacientes/transmissao.py)
+    response = StreamingHttpResponse(conteudo_streaming(request, conteudo), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{nome_arquivo_exportacao(formato, incluir_arquivos)}"'
+    )
+    return response
+
+
+# ==================== UPLOAD EM PARTES ====================
+
+@login_required
+@require_POST
+def upload_criar_view(request, paciente_pk, tipo):
+    """Inicia um upload em partes de documento ou foto (ver pacientes/uploads.py)"""
+    if tipo not in TIPOS_UPLOAD:
+        raise Http404
+    paciente = get_object_or_404(Paciente, pk=paciente_pk, medico=request.user)
+    
+    try:
+        tamanho = int(request.POST.get('tamanho', ''))
+        upload = criar_upload(request.user, paciente, tipo, request.POST.get('nome'), tamanho)
+    except ValueError:
+        return JsonResponse({'erro': 'Tamanho do arquivo inválido.'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'erro': e.messages[0]}, status=400)
+    
+    url = reverse('upload_parcial', args=[upload.pk])
+    response = JsonResponse({
+        'id': str(upload.pk),
+        'url': url,
+        'tamanho_parte': settings.UPLOAD_TAMANHO_PARTE,
+    }, status=201)
+    response['Location'] = url
+    return response
+
+
+@login_required
+def upload_parcial_view(request, pk):
+    """HEAD: quanto já foi recebido; PATCH: grava a próxima parte; DELETE: cancela"""
+    upload = get_object_or_404(UploadParcial, pk=pk, medico=request.user)
+    status = 200
+    
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            quantidade = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return HttpResponse('Upload-Offset inválido.', status=400)
+        if quantidade > settings.UPLOAD_TAMANHO_PARTE:
+            return HttpResponse(status=413)
+        
+        try:
+            # O corpo é lido direto do stream da requisição (request.body nunca é carregado)
+            gravar_parte(upload, offset, request, quantidade)
+            status = 204
+        except ConflitoUpload:
+            upload.refresh_from_db()
+            status = 409
+        except ValidationError as e:
+            return HttpResponse(e.messages[0], status=400)
+    elif request.method == 'DELETE':
+        descartar(upload)
+        return HttpResponse(status=204)
+    elif request.method not in ('HEAD', 'GET'):
+        return HttpResponseNotAllowed(['HEAD', 'PATCH', 'DELETE'])
+    
+    response = HttpResponse(status=status)
+    response['Upload-Offset'] = upload.recebido
+    response['Upload-Length'] = upload.tamanho
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 # ==================== DOCUMENTOS ====================
 
 @login_required
@@ -200,15 +506,18 @@ def documento_adicionar_view(request, paciente_pk):
     paciente = get_object_or_404(Paciente, pk=paciente_pk, medico=request.user)
     
     if request.method == 'POST':
-        form = DocumentoForm(request.POST, request.FILES)
-        if form.is_valid():
-            documento = form.save(commit=False)
-            documento.paciente = paciente
-            documento.save()
-            messages.success(request, 'Documento adicionado com sucesso!')
-            return redirect('paciente_detalhes', pk=paciente.pk)
-        else:
-            messages.error(request, 'Erro ao adicionar documento.')
+        with arquivos_enviados(request, paciente, 'documento', 'arquivo') as (upload, arquivos):
+            form = DocumentoForm(request.POST, arquivos)
+            if form.is_valid():
+                documento = form.save(commit=False)
+                documento.paciente = paciente
+                documento.save()
+                concluir_upload(upload, arquivos)
+                # Checksum e demais processamentos rodam no worker, fora da requisição
+                enfileirar('processar_documento', documento_id=documento.pk)
+                messages.success(request, 'Documento adicionado com sucesso!')
+                return redirect('paciente_detalhes', pk=paciente.pk)
+        messages.error(request, 'Erro ao adicionar documento.')
     else:
         form = DocumentoForm()
     
@@ -219,10 +528,11 @@ def documento_adicionar_view(request, paciente_pk):
 
 
 @login_required
+@orcamento_consultas(12)
 def documento_deletar_view(request, pk):
     """View para deletar documento"""
     documento = get_object_or_404(Documento, pk=pk, paciente__medico=request.user)
-    paciente_pk = documento.paciente.pk
+    paciente_pk = documento.paciente_id
     
     if request.method == 'POST':
         documento.delete()
@@ -232,6 +542,19 @@ def documento_deletar_view(request, pk):
     return render(request, 'pacientes/documento_confirmar_delete.html', {'documento': documento})
 
 
+@login_required
+@orcamento_consultas(3)
+def documento_arquivo_view(request, pk):
+    """Entrega o PDF apenas para o médico do paciente (com Range e ETag)"""
+    documento = get_object_or_404(
+        Documento.objects.only('arquivo', 'checksum', 'nome_original'), pk=pk, paciente__medico=request.user
+    )
+    return servir_arquivo(
+        request, documento.arquivo.name, documento.checksum, bool(request.GET.get('download')),
+        documento.nome_original,
+    )
+
+
 # ==================== FOTOS ====================
 
 @login_required
@@ -240,15 +563,18 @@ def foto_adicionar_view(request, paciente_pk):
     paciente = get_object_or_404(Paciente, pk=paciente_pk, medico=request.user)
     
     if request.method == 'POST':
-        form = FotoForm(request.POST, request.FILES)
-        if form.is_valid():
-            foto = form.save(commit=False)
-            foto.paciente = paciente
-            foto.save()
-            messages.success(request, 'Foto adicionada com sucesso!')
-            return redirect('paciente_detalhes', pk=paciente.pk)
-        else:
-            messages.error(request, 'Erro ao adicionar foto.')
+        with arquivos_enviados(request, paciente, 'foto', 'imagem') as (upload, arquivos):
+            form = FotoForm(request.POST, arquivos)
+            if form.is_valid():
+                foto = form.save(commit=False)
+                foto.paciente = paciente
+                foto.save()
+                concluir_upload(upload, arquivos)
+                # Remoção do EXIF, checksum e miniaturas rodam no worker, fora da requisição
+                enfileirar('processar_foto', foto_id=foto.pk)
+                messages.success(request, 'Foto adicionada com sucesso!')
+                return redirect('paciente_detalhes', pk=paciente.pk)
+        messages.error(request, 'Erro ao adicionar foto.')
     else:
         form = FotoForm()
     
@@ -259,14 +585,49 @@ def foto_adicionar_view(request, paciente_pk):
 
 
 @login_required
+@orcamento_consultas(12)
 def foto_deletar_view(request, pk):
     """View para deletar foto"""
     foto = get_object_or_404(Foto, pk=pk, paciente__medico=request.user)
-    paciente_pk = foto.paciente.pk
+    paciente_pk = foto.paciente_id
     
     if request.method == 'POST':
         foto.delete()
         messages.success(request, 'Foto removida com sucesso!')
         return redirect('paciente_detalhes', pk=paciente_pk)
     
-    return render(request, 'pacientes/foto_confirmar_delete.html', {'foto': foto})
\ No newline at end of file
+    return render(request, 'pacientes/foto_confirmar_delete.html', {'foto': foto})
+
+
+@login_required
+@orcamento_consultas(3)
+def foto_imagem_view(request, pk):
+    """Entrega a foto original apenas para o médico do paciente"""
+    foto = get_object_or_404(
+        Foto.objects.only('imagem', 'checksum', 'nome_original'), pk=pk, paciente__medico=request.user
+    )
+    return servir_arquivo(request, foto.imagem.name, foto.checksum, nome_original=foto.nome_original)
+
+
+@login_required
+@orcamento_consultas(3)
+def foto_miniatura_view(request, pk, largura, extensao):
+    """Entrega uma das miniaturas geradas da foto"""
+    if largura not in LARGURAS_MINIATURA or extensao not in FORMATOS_MINIATURA:
+        raise Http404
+    foto = get_object_or_404(Foto.objects.only('imagem'), pk=pk, paciente__medico=request.user)
+    return servir_arquivo(request, nome_variante(foto.imagem.name, largura, extensao))
+
+
+# ==================== MÉTRICAS ====================
+
+def metricas_view(request):
+    """Histogramas por view no formato do Prometheus (staff ou token do scraper)"""
+    token = settings.METRICAS_TOKEN
+    autorizacao = request.headers.get('Authorization', '')
+    if not (
+        (token and constant_time_compare(autorizacao, f'Bearer {token}'))
+        or (request.user.is_authenticated and request.user.is_staff)
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(exportar_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -106,4 +106,260 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     }
+    
+    // ========== ROLAGEM INFINITA (DASHBOARD) ==========
+    const gradePacientes = document.getElementById('pacientes-grid');
+    if (gradePacientes && 'IntersectionObserver' in window) {
+        let carregando = false;
+        
+        const observador = new IntersectionObserver(function(entradas) {
+            entradas.forEach(function(entrada) {
+                if (entrada.isIntersecting) {
+                    carregarProximaPagina(entrada.target);
+                }
+            });
+        }, { rootMargin: '400px' });
+        
+        async function carregarProximaPagina(sentinela) {
+            if (carregando) return;
+            carregando = true;
+            observador.unobserve(sentinela);
+            
+            try {
+                const url = sentinela.dataset.proximaPagina + '&parcial=1';
+                const response = await fetch(url, { credentials: 'same-origin' });
+                if (!response.ok) throw new Error(response.status);
+                
+                // Substitui a sentinela pelos novos cards (que trazem a próxima sentinela)
+                sentinela.insertAdjacentHTML('beforebegin', await response.text());
+                sentinela.remove();
+                observarSentinela();
+            } catch (error) {
+                // Mantém o link "Carregar mais" como alternativa
+                console.error('Erro ao carregar pacientes:', error);
+            } finally {
+                carregando = false;
+            }
+        }
+        
+        function observarSentinela() {
+            const sentinela = gradePacientes.querySelector('[data-proxima-pagina]');
+            if (sentinela) {
+                observador.observe(sentinela);
+            }
+        }
+        
+        observarSentinela();
+    }
+    
+    // ========== SUGESTÕES DA BUSCA (DASHBOARD) ==========
+    const campoBusca = document.querySelector('input[data-sugestoes]');
+    const listaSugestoes = document.querySelector('[data-sugestoes-lista]');
+    if (campoBusca && listaSugestoes && window.fetch && window.AbortController) {
+        const MINIMO_CARACTERES = 2;
+        const ESPERA_MS = 150;
+        let temporizador = null;
+        let controlador = null;
+        let selecionada = -1;
+        
+        function fecharSugestoes() {
+            listaSugestoes.classList.add('d-none');
+            listaSugestoes.replaceChildren();
+            selecionada = -1;
+        }
+        
+        function mostrarSugestoes(resultados) {
+            listaSugestoes.replaceChildren(...resultados.map(function(paciente) {
+                const item = document.createElement('a');
+                item.href = paciente.pagina;
+                item.className = 'list-group-item list-group-item-action';
+                const nome = document.createElement('div');
+                nome.className = 'fw-semibold';
+                nome.textContent = paciente.nome_completo;
+                const detalhes = document.createElement('small');
+                detalhes.className = 'text-muted';
+                detalhes.textContent = paciente.cpf + ' · ' + paciente.telefone;
+                item.append(nome, detalhes);
+                return item;
+            }));
+            selecionada = -1;
+            listaSugestoes.classList.toggle('d-none', resultados.length === 0);
+        }
+        
+        async function buscarSugestoes(termo) {
+            // Só a resposta do texto atual interessa: cancela a que ainda estiver a caminho
+            if (controlador) controlador.abort();
+            controlador = new AbortController();
+            
+            try {
+                const url = campoBusca.dataset.sugestoes + '?q=' + encodeURIComponent(termo);
+                const response = await fetch(url, { credentials: 'same-origin', signal: controlador.signal });
+                if (!response.ok) throw new Error(response.status);
+                mostrarSugestoes((await response.json()).resultados);
+            } catch (error) {
+                if (error.name !== 'AbortError') {
+                    console.error('Erro ao buscar sugestões:', error);
+                    fecharSugestoes();
+                }
+            }
+        }
+        
+        campoBusca.addEventListener('input', function() {
+            clearTimeout(temporizador);
+            const termo = campoBusca.value.trim();
+            if (termo.length < MINIMO_CARACTERES) {
+                if (controlador) controlador.abort();
+                fecharSugestoes();
+                return;
+            }
+            // Consulta só quando a digitação pausa
+            temporizador = setTimeout(function() { buscarSugestoes(termo); }, ESPERA_MS);
+        });
+        
+        // Setas escolhem, Enter abre a sugestão escolhida (sem escolha, Enter faz a busca completa)
+        campoBusca.addEventListener('keydown', function(e) {
+            const itens = listaSugestoes.querySelectorAll('a');
+            if (e.key === 'Escape') {
+                fecharSugestoes();
+            } else if (itens.length && (e.key === 'ArrowDown' || e.key === 'ArrowUp')) {
+                e.preventDefault();
+                if (e.key === 'ArrowDown') {
+                    selecionada = (selecionada + 1) % itens.length;
+                } else {
+                    selecionada = (selecionada <= 0 ? itens.length : selecionada) - 1;
+                }
+                itens.forEach(function(item, i) {
+                    item.classList.toggle('active', i === selecionada);
+                });
+            } else if (e.key === 'Enter' && selecionada >= 0) {
+                e.preventDefault();
+                window.location.href = itens[selecionada].href;
+            }
+        });
+        
+        document.addEventListener('click', function(e) {
+            if (e.target !== campoBusca && !listaSugestoes.contains(e.target)) {
+                fecharSugestoes();
+            }
+        });
+    }
+    
+    // ========== UPLOAD EM PARTES (DOCUMENTOS E FOTOS) ==========
+    const formUpload = document.querySelector('form[data-upload-em-partes]');
+    if (formUpload && window.fetch && window.Blob && Blob.prototype.slice) {
+        const campoArquivo = formUpload.querySelector('input[type="file"]');
+        const campoUpload = formUpload.querySelector('input[name="upload"]');
+        const progresso = formUpload.querySelector('[data-upload-progresso]');
+        const barra = progresso.querySelector('.progress-bar');
+        const caixaErro = formUpload.querySelector('[data-upload-erro]');
+        const botaoEnviar = formUpload.querySelector('button[type="submit"]');
+        const csrfToken = formUpload.querySelector('input[name="csrfmiddlewaretoken"]').value;
+        let enviando = false;
+        
+        const esperar = ms => new Promise(resolve => setTimeout(resolve, ms));
+        
+        function mostrarProgresso(enviado, total) {
+            progresso.classList.remove('d-none');
+            barra.style.width = Math.round(enviado / total * 100) + '%';
+        }
+        
+        // Chave para retomar o mesmo arquivo depois de recarregar a página
+        function chaveArquivo(arquivo) {
+            return 'upload:' + formUpload.dataset.uploadEmPartes + ':' +
+                [arquivo.name, arquivo.size, arquivo.lastModified].join(':');
+        }
+        
+        async function consultarOffset(url) {
+            const response = await fetch(url, { method: 'HEAD', credentials: 'same-origin' });
+            if (!response.ok) return null;
+            return parseInt(response.headers.get('Upload-Offset'), 10);
+        }
+        
+        async function iniciarUpload(arquivo) {
+            const salvo = JSON.parse(localStorage.getItem(chaveArquivo(arquivo)) || 'null');
+            if (salvo) {
+                const offset = await consultarOffset(salvo.url);
+                if (offset !== null) return Object.assign(salvo, { offset: offset });
+            }
+            
+            const dados = new FormData();
+            dados.append('nome', arquivo.name);
+            dados.append('tamanho', arquivo.size);
+            const response = await fetch(formUpload.dataset.uploadEmPartes, {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: { 'X-CSRFToken': csrfToken },
+                body: dados,
+            });
+            const resposta = await response.json();
+            if (!response.ok) throw new Error(resposta.erro || 'Não foi possível iniciar o envio.');
+            
+            const upload = { id: resposta.id, url: resposta.url, tamanhoParte: resposta.tamanho_parte };
+            localStorage.setItem(chaveArquivo(arquivo), JSON.stringify(upload));
+            return Object.assign(upload, { offset: 0 });
+        }
+        
+        async function enviarPartes(arquivo, upload) {
+            let offset = upload.offset;
+            let falhas = 0;
+            
+            while (offset < arquivo.size) {
+                mostrarProgresso(offset, arquivo.size);
+                try {
+                    const response = await fetch(upload.url, {
+                        method: 'PATCH',
+                        credentials: 'same-origin',
+                        headers: {
+                            'X-CSRFToken': csrfToken,
+                            'Upload-Offset': offset,
+                            'Content-Type': 'application/offset+octet-stream',
+                        },
+                        body: arquivo.slice(offset, offset + upload.tamanhoParte),
+                    });
+                    if (response.status !== 204 && response.status !== 409) {
+                        throw new Error('Erro ' + response.status);
+                    }
+                    // 409: o servidor já tinha outra posição, continua de onde ele está
+                    offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                    falhas = 0;
+                } catch (error) {
+                    // Rede instável: espera cada vez mais e pergunta ao servidor o que já chegou
+                    falhas += 1;
+                    if (falhas > 8) throw new Error('Conexão instável. Tente novamente para continuar de onde parou.');
+                    await esperar(Math.min(1000 * 2 ** falhas, 30000));
+                    const atual = await consultarOffset(upload.url).catch(() => null);
+                    if (atual !== null) offset = atual;
+                }
+            }
+            mostrarProgresso(arquivo.size, arquivo.size);
+        }
+        
+        formUpload.addEventListener('submit', async function(e) {
+            const arquivo = campoArquivo.files[0];
+            if (!arquivo) return;
+
+            // Também durante o envio: um segundo submit (Enter) mandaria o arquivo inteiro no POST
+            e.preventDefault();
+            if (enviando) return;
+            enviando = true;
+            botaoEnviar.disabled = true;
+            caixaErro.classList.add('d-none');
+            
+            try {
+                const upload = await iniciarUpload(arquivo);
+                await enviarPartes(arquivo, upload);
+                localStorage.removeItem(chaveArquivo(arquivo));
+                
+                // O formulário segue sem o arquivo, só com o identificador do upload
+                campoUpload.value = upload.id;
+                campoArquivo.disabled = true;
+                formUpload.submit();
+            } catch (error) {
+                caixaErro.textContent = error.message;
+                caixaErro.classList.remove('d-none');
+                botaoEnviar.disabled = false;
+                enviando = false;
+            }
+        });
+    }
 });
\ No newline at end of file